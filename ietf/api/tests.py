@@ -12,7 +12,7 @@ from mock import patch
 
 from django.apps import apps
 from django.conf import settings
-from django.test import Client
+from django.test import Client, override_settings
 from django.urls import reverse as urlreverse
 from django.utils import timezone
 
@@ -354,6 +354,28 @@ class CustomApiTests(TestCase):
         self.assertEqual(data['version'], ietf.__version__+ietf.__patch__)
         self.assertIn(data['date'], ietf.__date__)
 
+    def test_api_metrics(self):
+        from ietf.utils.metrics import register_cache_metric, record_cache_hit, record_cache_miss
+        register_cache_metric('test-metric')
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-api-metrics'}}):
+            record_cache_hit('test-metric')
+            record_cache_hit('test-metric')
+            record_cache_hit('test-metric')
+            record_cache_miss('test-metric')
+            r = self.client.get(urlreverse('ietf.api.views.metrics'))
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(r.json()['cache']['test-metric'], {'hits': 3, 'misses': 1, 'hit_ratio': 0.75})
+
+    def test_api_latency_metrics(self):
+        from ietf.utils.metrics import register_latency_metric, record_latency
+        register_latency_metric('test-latency')
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-api-latency-metrics'}}):
+            record_latency('test-latency', 1)
+            record_latency('test-latency', 3)
+            r = self.client.get(urlreverse('ietf.api.views.metrics'))
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(r.json()['latency']['test-latency'], {'count': 2, 'mean': 2.0, 'max': 3.0})
+
     def test_api_appauth(self):
         url = urlreverse('ietf.api.views.app_auth')
         person = PersonFactory()
@@ -37,6 +37,7 @@ from ietf.meeting.models import Meeting
 from ietf.stats.models import MeetingRegistration
 from ietf.utils.decorators import require_api_key
 from ietf.utils.log import log
+from ietf.utils.metrics import cache_metrics, latency_metrics
 from ietf.utils.models import DumpInfo
 
 
@@ -216,6 +217,16 @@ def version(request):
             )
     
 
+def metrics(request):
+    return HttpResponse(
+            json.dumps({
+                        'cache': cache_metrics(),
+                        'latency': latency_metrics(),
+                    }),
+                content_type='application/json',
+            )
+
+
 @require_api_key
 @csrf_exempt
 def app_auth(request):
@@ -4,7 +4,7 @@
 
 from django.contrib import admin
 
-from ietf.community.models import CommunityList, SearchRule, EmailSubscription
+from ietf.community.models import CommunityList, SearchRule, EmailSubscription, PendingNotification
 
 class CommunityListAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'group']
@@ -22,3 +22,7 @@ class EmailSubscriptionAdmin(admin.ModelAdmin):
     raw_id_fields = ['community_list', 'email']
 admin.site.register(EmailSubscription, EmailSubscriptionAdmin)
 
+class PendingNotificationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event', 'time', 'claimed_until']
+    raw_id_fields = ['event']
+admin.site.register(PendingNotification, PendingNotificationAdmin)
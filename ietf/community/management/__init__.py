@@ -0,0 +1 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
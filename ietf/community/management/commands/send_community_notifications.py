@@ -0,0 +1,48 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+import time
+
+from django.core.management.base import BaseCommand
+
+import debug                            # pyflakes:ignore
+
+from ietf.community.utils import send_pending_notifications
+
+class Command(BaseCommand):
+    help = """
+
+    Send the community list notifications queued as PendingNotification
+    objects, which happens when settings.COMMUNITY_NOTIFICATION_QUEUE is set.
+    Changes are sent once they have waited for
+    settings.COMMUNITY_NOTIFICATION_DIGEST_WINDOW seconds, with one email per
+    subscriber and list.  With --loop, keep running and send new
+    notifications as they become due.
+
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action="store_true", default=False,
+            help="Keep running, checking the queue for due notifications.",
+        )
+        parser.add_argument(
+            '--interval', type=int, default=30,
+            help="Seconds to wait between checks of the queue with --loop (default %(default)s).",
+        )
+        parser.add_argument(
+            '--limit', type=int, default=1000,
+            help="Maximum number of events to send in one batch (default %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        while True:
+            events, emails = send_pending_notifications(limit=options['limit'])
+            if verbosity > 1 or (verbosity > 0 and events):
+                self.stdout.write('Sent %s emails for %s queued events' % (emails, events))
+            if not options['loop']:
+                break
+            if not events:
+                time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+import ietf.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doc', '0045_documentsearchindex'),
+        ('community', '0007_remove_docs2_m2m'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.DateTimeField(default=datetime.datetime.now)),
+                ('event', ietf.utils.models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='doc.DocEvent')),
+            ],
+            options={
+                'ordering': ['time'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0008_pendingnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingnotification',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, help_text='Set while a run of send_pending_notifications() is sending it', null=True),
+        ),
+    ]
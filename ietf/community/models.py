@@ -2,6 +2,9 @@
 # -*- coding: utf-8 -*-
 
 
+import datetime
+
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.db.models import signals
@@ -96,6 +99,20 @@ class EmailSubscription(models.Model):
         return "%s to %s (%s changes)" % (self.email, self.community_list, self.notify_on)
 
 
+class PendingNotification(models.Model):
+    """A document event waiting to be sent to the subscribers of the community
+    lists tracking the document, see ietf.community.utils.send_pending_notifications()."""
+    event = ForeignKey(DocEvent)
+    time = models.DateTimeField(default=datetime.datetime.now)
+    claimed_until = models.DateTimeField(null=True, blank=True, help_text="Set while a run of send_pending_notifications() is sending it")
+
+    class Meta:
+        ordering = ['time']
+
+    def __str__(self):
+        return "Notification of %s queued at %s" % (self.event, self.time)
+
+
 def notify_events(sender, instance, **kwargs):
     if not isinstance(instance, DocEvent):
         return
@@ -106,8 +123,21 @@ def notify_events(sender, instance, **kwargs):
     if getattr(instance, "skip_community_list_notification", False):
         return
 
+    if settings.COMMUNITY_NOTIFICATION_QUEUE:
+        PendingNotification.objects.create(event=instance)
+        return
+
     from ietf.community.utils import notify_event_to_subscribers
     notify_event_to_subscribers(instance)
 
 
 signals.post_save.connect(notify_events)
+
+
+def search_rule_changed(sender, instance, **kwargs):
+    from ietf.community.utils import bump_search_rule_generation
+    bump_search_rule_generation()
+
+
+signals.post_save.connect(search_rule_changed, sender=SearchRule)
+signals.post_delete.connect(search_rule_changed, sender=SearchRule)
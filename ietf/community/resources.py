@@ -10,10 +10,10 @@ from tastypie.cache import SimpleCache
 
 from ietf import api
 
-from ietf.community.models import CommunityList, SearchRule, EmailSubscription
+from ietf.community.models import CommunityList, SearchRule, EmailSubscription, PendingNotification
 
 
-from ietf.doc.resources import DocumentResource
+from ietf.doc.resources import DocumentResource, DocEventResource
 from ietf.group.resources import GroupResource
 from ietf.utils.resources import UserResource
 class CommunityListResource(ModelResource):
@@ -66,3 +66,20 @@ class EmailSubscriptionResource(ModelResource):
             "community_list": ALL_WITH_RELATIONS,
         }
 api.community.register(EmailSubscriptionResource())
+
+
+class PendingNotificationResource(ModelResource):
+    event            = ToOneField(DocEventResource, 'event')
+    class Meta:
+        queryset = PendingNotification.objects.all()
+        serializer = api.Serializer()
+        cache = SimpleCache()
+        #resource_name = 'pendingnotification'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "time": ALL,
+            "claimed_until": ALL,
+            "event": ALL_WITH_RELATIONS,
+        }
+api.community.register(PendingNotificationResource())
@@ -2,26 +2,32 @@
 # -*- coding: utf-8 -*-
 
 
+import datetime
+
 from pyquery import PyQuery
 
 from django.urls import reverse as urlreverse
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
 
 from django_webtest import WebTest
 
 import debug                            # pyflakes:ignore
 
-from ietf.community.models import CommunityList, SearchRule, EmailSubscription
+from ietf.community.models import CommunityList, SearchRule, EmailSubscription, PendingNotification
 from ietf.community.utils import docs_matching_community_list_rule, community_list_rules_matching_doc
-from ietf.community.utils import reset_name_contains_index_for_rule
+from ietf.community.utils import reset_name_contains_index_for_rule, docs_tracked_by_community_list, search_rule_index
+from ietf.community.utils import send_pending_notifications, search_rule_generation, SEARCH_RULE_GENERATION_KEY
 import ietf.community.views
 from ietf.group.models import Group
 from ietf.group.utils import setup_default_community_list_for_group
 from ietf.doc.models import State
 from ietf.doc.utils import add_state_change_event
 from ietf.person.models import Person, Email
+from ietf.utils.cache import bump_cache_generation
 from ietf.utils.test_utils import login_testing_unauthorized
-from ietf.utils.mail import outbox
+from ietf.utils.mail import outbox, get_payload_text
 from ietf.doc.factories import WgDraftFactory
 from ietf.group.factories import GroupFactory, RoleFactory
 from ietf.person.factories import PersonFactory
@@ -76,6 +82,45 @@ class CommunityListTests(WebTest):
         self.assertTrue(draft in list(docs_matching_community_list_rule(rule_shepherd)))
         self.assertTrue(draft in list(docs_matching_community_list_rule(rule_name_contains)))
 
+        # list -> docs
+        self.assertIn(draft, docs_tracked_by_community_list(clist))
+
+        # the rule index is rebuilt when rules change
+        rule_ad.delete()
+        self.assertNotIn(rule_ad, community_list_rules_matching_doc(draft))
+        rule_name_contains.text = "draft-nomatch"
+        rule_name_contains.save()
+        reset_name_contains_index_for_rule(rule_name_contains)
+        self.assertNotIn(rule_name_contains, community_list_rules_matching_doc(draft))
+        self.assertEqual(search_rule_index().name_contains_rules_matching(draft.name), set())
+        self.assertEqual(search_rule_index().name_contains_rules_matching("draft-nomatch-foo"), set([rule_name_contains.pk]))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-search-rule-generation'}})
+    def test_rule_index_generation(self):
+        draft = WgDraftFactory()
+        clist = CommunityList.objects.create(user=PersonFactory().user)
+        rule = SearchRule.objects.create(rule_type="group", group=draft.group, state=State.objects.get(type="draft", slug="active"), community_list=clist)
+
+        # the index is kept while the rules don't change
+        index = search_rule_index()
+        self.assertEqual(index.generation, search_rule_generation())
+        self.assertIs(search_rule_index(), index)
+        self.assertIn(rule.pk, index.rules_matching_doc(draft))
+
+        # a change in another process moves the counter on, without
+        # touching the index of this process
+        bump_cache_generation(SEARCH_RULE_GENERATION_KEY)
+        self.assertNotEqual(search_rule_generation(), index.generation)
+        SearchRule.objects.filter(pk=rule.pk).update(group=GroupFactory())
+        self.assertIsNot(search_rule_index(), index)
+        self.assertNotIn(rule.pk, search_rule_index().rules_matching_doc(draft))
+
+        # a lost counter starts again above the generation of the index
+        index = search_rule_index()
+        cache.delete(SEARCH_RULE_GENERATION_KEY)
+        self.assertGreater(search_rule_generation(), index.generation)
+        self.assertIsNot(search_rule_index(), index)
+
     def test_view_list(self):
         PersonFactory(user__username='plain')
         draft = WgDraftFactory()
@@ -393,5 +438,59 @@ class CommunityListTests(WebTest):
         add_state_change_event(draft, system, active_state, rfc_state)
         self.assertEqual(len(outbox), mailbox_before + 1)
         self.assertTrue(draft.name in outbox[-1]["Subject"])
+
+    @override_settings(COMMUNITY_NOTIFICATION_QUEUE=True)
+    def test_queued_notification(self):
+        PersonFactory(user__username='plain')
+        draft = WgDraftFactory()
+        other = WgDraftFactory()
+
+        clist = CommunityList.objects.create(user=User.objects.get(username="plain"))
+        clist.added_docs.add(draft, other)
+        EmailSubscription.objects.create(community_list=clist, email=Email.objects.filter(person__user__username="plain").first(), notify_on="all")
+        # drop the events from creating the drafts
+        PendingNotification.objects.all().delete()
+
+        mailbox_before = len(outbox)
+        system = Person.objects.get(name="(System)")
+        active_state = State.objects.get(type="draft", slug="active")
+        rfc_state = State.objects.get(type="draft", slug="rfc")
+        add_state_change_event(draft, system, active_state, rfc_state)
+        add_state_change_event(other, system, active_state, rfc_state)
+        self.assertEqual(len(outbox), mailbox_before)
+        self.assertEqual(PendingNotification.objects.count(), 2)
+
+        # not sent before the window has passed
+        self.assertEqual(send_pending_notifications(), (0, 0))
+        self.assertEqual(len(outbox), mailbox_before)
+
+        # nor while they are claimed by another run, until the claim runs out
+        PendingNotification.objects.update(claimed_until=datetime.datetime.now() + datetime.timedelta(hours=1))
+        self.assertEqual(send_pending_notifications(window=datetime.timedelta(0)), (0, 0))
+        self.assertEqual(len(outbox), mailbox_before)
+        PendingNotification.objects.update(claimed_until=datetime.datetime.now() - datetime.timedelta(seconds=1))
+
+        self.assertEqual(send_pending_notifications(window=datetime.timedelta(0)), (2, 1))
+        self.assertEqual(len(outbox), mailbox_before + 1)
+        self.assertIn(draft.name, outbox[-1]["Subject"])
+        self.assertIn(other.name, outbox[-1]["Subject"])
+        body = get_payload_text(outbox[-1])
+        self.assertIn("https://datatracker.ietf.org/doc/%s/" % draft.name, body)
+        self.assertIn("https://datatracker.ietf.org/doc/%s/" % other.name, body)
+        self.assertFalse(PendingNotification.objects.exists())
+
+        # the subject of a large digest only names a few of the documents
+        drafts = WgDraftFactory.create_batch(4)
+        clist.added_docs.add(*drafts)
+        PendingNotification.objects.all().delete()
+        for d in drafts:
+            add_state_change_event(d, system, active_state, rfc_state)
+        self.assertEqual(send_pending_notifications(window=datetime.timedelta(0)), (4, 1))
+        self.assertEqual(len(outbox), mailbox_before + 2)
+        self.assertIn("and 2 more", outbox[-1]["Subject"])
+        self.assertEqual(len([ d for d in drafts if d.name in outbox[-1]["Subject"] ]), 2)
+        body = get_payload_text(outbox[-1])
+        for d in drafts:
+            self.assertIn("https://datatracker.ietf.org/doc/%s/" % d.name, body)
         
         
@@ -2,22 +2,28 @@
 # -*- coding: utf-8 -*-
 
 
+import datetime
 import re
 
+from collections import defaultdict
+
 from django.db.models import Q
 from django.conf import settings
 
 import debug                            # pyflakes:ignore
 
-from ietf.community.models import CommunityList, EmailSubscription, SearchRule
+from ietf.community.models import CommunityList, EmailSubscription, PendingNotification, SearchRule
 from ietf.doc.models import Document, State
 from ietf.group.models import Role, Group
-from ietf.person.models import Person
 from ietf.ietfauth.utils import has_role
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 
-from ietf.utils.mail import send_mail
+from ietf.utils.cache import bump_cache_generation, cache_generation
+from ietf.utils.log import log
+from ietf.utils.mail import send_mail, send_mail_text
+from ietf.utils.metrics import register_latency_metric, record_latency
 
 def states_of_significant_change():
     return State.objects.filter(used=True).filter(
@@ -63,13 +69,14 @@ def reset_name_contains_index_for_rule(rule):
     rule.name_contains_index.set(Document.objects.filter(docalias__name__regex=rule.text))
 
 def update_name_contains_indexes_with_new_doc(doc):
-    for r in SearchRule.objects.filter(rule_type="name_contains"):
-        # in theory we could use the database to do this query, but
-        # Django doesn't support a reversed regex operator, and regexp
-        # support needs backend-specific code so custom SQL is a bit
-        # cumbersome too
-        if re.search(r.text, doc.name) and not doc in r.name_contains_index.all():
-            r.name_contains_index.add(doc)
+    # in theory we could use the database to do this query, but
+    # Django doesn't support a reversed regex operator, and regexp
+    # support needs backend-specific code so custom SQL is a bit
+    # cumbersome too
+    rule_ids = search_rule_index().name_contains_rules_matching(doc.name)
+    if rule_ids:
+        rule_ids -= set(doc.searchrule_set.values_list("pk", flat=True))
+        doc.searchrule_set.add(*rule_ids)
 
 def docs_matching_community_list_rule(rule):
     docs = Document.objects.all()
@@ -88,54 +95,150 @@ def docs_matching_community_list_rule(rule):
 
     raise NotImplementedError
 
-def community_list_rules_matching_doc(doc):
-    states = list(doc.states.values_list("pk", flat=True))
-
-    rules = SearchRule.objects.none()
-
-    if doc.group_id:
-        groups = [doc.group_id]
-        if doc.group.parent_id:
-            groups.append(doc.group.parent_id)
-        rules |= SearchRule.objects.filter(
-            rule_type__in=['group', 'area', 'group_rfc', 'area_rfc'],
-            state__in=states,
-            group__in=groups
-        )
-
-    rules |= SearchRule.objects.filter(
-        rule_type__in=['state_iab', 'state_iana', 'state_iesg', 'state_irtf', 'state_ise', 'state_rfceditor', 'state_ietf'],
-        state__in=states,
-    )
+SEARCH_RULE_GENERATION_KEY = "community:searchrule:generation"
+
+def search_rule_generation():
+    """Return the current search rule generation, which changes whenever a
+    search rule is saved or deleted."""
+    return cache_generation(SEARCH_RULE_GENERATION_KEY)
+
+def bump_search_rule_generation():
+    global _search_rule_index
+    _search_rule_index = None
+    bump_cache_generation(SEARCH_RULE_GENERATION_KEY)
+
+def search_rule_key(rule_type, group_id, person_id, rule_id):
+    """Return the kind of match and the value to match for a rule, rules
+    of the same kind are matched the same way."""
+    if rule_type in ['group', 'area', 'group_rfc', 'area_rfc']:
+        return "group", group_id
+    elif rule_type.startswith("state_"):
+        return "state", None
+    elif rule_type in ["author", "author_rfc"]:
+        return "author", person_id
+    elif rule_type in ["ad", "shepherd"]:
+        return rule_type, person_id
+    elif rule_type == "name_contains":
+        return "name_contains", rule_id
 
-    rules |= SearchRule.objects.filter(
-        rule_type__in=["author", "author_rfc"],
-        state__in=states,
-        person__in=list(Person.objects.filter(documentauthor__document=doc)),
-    )
+    raise NotImplementedError
 
-    if doc.ad_id:
-        rules |= SearchRule.objects.filter(
-            rule_type="ad",
-            state__in=states,
-            person=doc.ad_id,
-        )
-
-    if doc.shepherd_id:
-        rules |= SearchRule.objects.filter(
-            rule_type="shepherd",
-            state__in=states,
-            person__email=doc.shepherd_id,
-        )
-
-    rules |= SearchRule.objects.filter(
-        rule_type="name_contains",
-        state__in=states,
-        name_contains_index=doc, # search our materialized index to avoid full scan
-    )
+class SearchRuleIndex(object):
+    """All search rules, compiled for matching documents against them without
+    going through the database.  Rules are looked up in a dict by kind of
+    match, state and group or person, and the name_contains rules are
+    compiled to regular expressions, with one combined expression to rule
+    out names that don't match any of them."""
+
+    def __init__(self, generation=None):
+        self.generation = generation
+        self.rules = defaultdict(list)
+        self.name_contains_states = {}
+
+        patterns = defaultdict(list)
+        for rule_id, rule_type, state_id, group_id, person_id, text in SearchRule.objects.values_list("pk", "rule_type", "state", "group", "person", "text"):
+            kind, key = search_rule_key(rule_type, group_id, person_id, rule_id)
+            if kind == "name_contains":
+                self.name_contains_states[rule_id] = state_id
+                patterns[text].append(rule_id)
+            else:
+                self.rules[(kind, state_id, key)].append(rule_id)
+
+        self.name_patterns = []
+        for text, rule_ids in patterns.items():
+            try:
+                self.name_patterns.append((re.compile(text), rule_ids))
+            except re.error as e:
+                log("Ignoring name_contains rules %s with invalid regexp '%s': %s" % (rule_ids, text, e))
+
+        # back references would refer to the wrong groups in the combined
+        # expression, so patterns using them are always tried on their own
+        self.name_filter = None
+        self.unfiltered_name_patterns = []
+        combined = []
+        for r, rule_ids in self.name_patterns:
+            if re.search(r"\\[1-9]|\(\?P=", r.pattern):
+                self.unfiltered_name_patterns.append((r, rule_ids))
+            else:
+                combined.append("(?:%s)" % r.pattern)
+        if combined:
+            try:
+                self.name_filter = re.compile("|".join(combined))
+            except re.error:
+                self.unfiltered_name_patterns = self.name_patterns
+
+    def name_contains_rules_matching(self, name):
+        """Return the ids of the name_contains rules with a regexp matching name."""
+        if self.name_filter and self.name_filter.search(name):
+            patterns = self.name_patterns
+        else:
+            patterns = self.unfiltered_name_patterns
+        return set(rule_id for r, rule_ids in patterns if r.search(name) for rule_id in rule_ids)
+
+    def rules_matching_doc(self, doc):
+        """Return the ids of the rules matching doc."""
+        states = list(doc.states.values_list("pk", flat=True))
+
+        keys = [("state", None)]
+        if doc.group_id:
+            keys.append(("group", doc.group_id))
+            if doc.group.parent_id:
+                keys.append(("group", doc.group.parent_id))
+        keys.extend(("author", person_id) for person_id in doc.documentauthor_set.values_list("person", flat=True))
+        if doc.ad_id:
+            keys.append(("ad", doc.ad_id))
+        if doc.shepherd_id:
+            keys.append(("shepherd", doc.shepherd.person_id))
+
+        rule_ids = set()
+        for state_id in states:
+            for kind, key in keys:
+                rule_ids.update(self.rules.get((kind, state_id, key), []))
+
+        # search our materialized index of names
+        for rule_id in doc.searchrule_set.values_list("pk", flat=True):
+            if rule_id in self.name_contains_states and self.name_contains_states[rule_id] in states:
+                rule_ids.add(rule_id)
+
+        return rule_ids
+
+_search_rule_index = None
+
+def search_rule_index():
+    """Return the SearchRuleIndex of the current search rules, rebuilding it
+    if they have changed since it was last built."""
+    global _search_rule_index
+    generation = search_rule_generation()
+    index = _search_rule_index
+    if index is None or generation is None or index.generation != generation:
+        index = _search_rule_index = SearchRuleIndex(generation)
+    return index
 
-    return rules
+def community_list_rules_matching_doc(doc):
+    return SearchRule.objects.filter(pk__in=search_rule_index().rules_matching_doc(doc))
 
+def docs_matching_community_list_rules(rules):
+    """Return document querysets which together match the documents matched by
+    any of rules.  Rules of the same kind and state are matched in one query."""
+    keys = defaultdict(set)
+    for rule in rules:
+        kind, key = search_rule_key(rule.rule_type, rule.group_id, rule.person_id, rule.pk)
+        keys[(kind, rule.state_id)].add(key)
+
+    docs = Document.objects.all()
+    for (kind, state_id), values in keys.items():
+        if kind == "group":
+            yield docs.filter(Q(group__in=values) | Q(group__parent__in=values), states=state_id)
+        elif kind == "state":
+            yield docs.filter(states=state_id)
+        elif kind == "author":
+            yield docs.filter(states=state_id, documentauthor__person__in=values)
+        elif kind == "ad":
+            yield docs.filter(states=state_id, ad__in=values)
+        elif kind == "shepherd":
+            yield docs.filter(states=state_id, shepherd__person__in=values)
+        elif kind == "name_contains":
+            yield docs.filter(states=state_id, searchrule__in=values)
 
 def docs_tracked_by_community_list(clist):
     if clist.pk is None:
@@ -145,8 +248,8 @@ def docs_tracked_by_community_list(clist):
     # trouble with OR queries and complicated joins so do the OR'ing
     # manually
     doc_ids = set(clist.added_docs.values_list("pk", flat=True))
-    for rule in clist.searchrule_set.all():
-        doc_ids = doc_ids | set(docs_matching_community_list_rule(rule).values_list("pk", flat=True))
+    for docs in docs_matching_community_list_rules(clist.searchrule_set.all()):
+        doc_ids = doc_ids | set(docs.values_list("pk", flat=True))
 
     return Document.objects.filter(pk__in=doc_ids)
 
@@ -154,7 +257,7 @@ def community_lists_tracking_doc(doc):
     return CommunityList.objects.filter(Q(added_docs=doc) | Q(searchrule__in=community_list_rules_matching_doc(doc)))
 
 
-def notify_event_to_subscribers(event):
+def subscriptions_to_notify_of_event(event):
     try:
         significant = event.type == "changed_state" and event.state_id in [s.pk for s in states_of_significant_change()]
     except AttributeError:
@@ -165,7 +268,10 @@ def notify_event_to_subscribers(event):
     if not significant:
         subscriptions = subscriptions.filter(notify_on="all")
 
-    for sub in subscriptions.select_related("community_list", "email"):
+    return subscriptions.select_related("community_list", "email")
+
+def notify_event_to_subscribers(event):
+    for sub in subscriptions_to_notify_of_event(event):
         clist = sub.community_list
         subject = '%s notification: Changes to %s' % (clist.long_name(), event.doc.name)
 
@@ -174,3 +280,73 @@ def notify_event_to_subscribers(event):
                       'event': event,
                       'clist': clist,
                   })
+
+register_latency_metric("community-notification")
+
+def send_pending_notifications(window=None, limit=None):
+    """Send the notifications for the queued events which have waited for
+    window (a timedelta, settings.COMMUNITY_NOTIFICATION_DIGEST_WINDOW by
+    default).  Each subscriber gets one email per community list with all of
+    the changes, and the text for each change is rendered once and shared by
+    all of the emails.  Returns the number of events and of emails sent."""
+    if window is None:
+        window = datetime.timedelta(seconds=settings.COMMUNITY_NOTIFICATION_DIGEST_WINDOW)
+
+    now = datetime.datetime.now()
+    unclaimed = Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    due = (PendingNotification.objects.filter(unclaimed, time__lte=now - window)
+           .select_related("event__doc", "event__by")[:limit])
+    # claim the notifications, so that concurrent runs don't send them too.
+    # If this run dies before they are sent, they are sent once the claim
+    # has run out.
+    lease = now + datetime.timedelta(seconds=settings.COMMUNITY_NOTIFICATION_CLAIM_TIME)
+    pending = [ item for item in due
+                if PendingNotification.objects.filter(unclaimed, pk=item.pk).update(claimed_until=lease) ]
+    if not pending:
+        return 0, 0
+
+    changes = {}
+    clists = {}
+    digests = defaultdict(list)
+    for item in pending:
+        event = item.event
+        for sub in subscriptions_to_notify_of_event(event):
+            clists[sub.community_list_id] = sub.community_list
+            if event not in digests[(sub.community_list_id, sub.email.address)]:
+                digests[(sub.community_list_id, sub.email.address)].append(event)
+        if item.event_id not in changes:
+            changes[item.event_id] = render_to_string('community/notification_event.txt', { 'event': event })
+
+    emails = {}
+    for (clist_id, address), events in digests.items():
+        key = (clist_id, tuple(e.pk for e in events))
+        if not key in emails:
+            clist = clists[clist_id]
+            names = []
+            for e in events:
+                if e.doc.name not in names:
+                    names.append(e.doc.name)
+            # keep the subject short for large digests, the body lists all
+            # of the changes
+            if len(names) > 3:
+                names = names[:2] + ["and %s more" % (len(names) - 2)]
+            emails[key] = (
+                '%s notification: Changes to %s' % (clist.long_name(), ", ".join(names)),
+                render_to_string('community/notification_digest_email.txt', {
+                    'clist': clist,
+                    'changes': [ changes[e.pk] for e in events ],
+                }),
+            )
+        subject, text = emails[key]
+        send_mail_text(None, address, settings.DEFAULT_FROM_EMAIL, subject, text)
+
+    PendingNotification.objects.filter(pk__in=[ item.pk for item in pending ]).delete()
+
+    now = datetime.datetime.now()
+    latencies = [ (now - item.event.time).total_seconds() for item in pending ]
+    for latency in latencies:
+        record_latency("community-notification", latency)
+    log("Sent %s community list notifications for %s events, latency %.1fs mean, %.1fs max"
+        % (len(digests), len(pending), sum(latencies) / len(latencies), max(latencies)))
+
+    return len(pending), len(digests)
@@ -12,7 +12,7 @@ from .models import (StateType, State, RelatedDocument, DocumentAuthor, Document
     TelechatDocEvent, BallotPositionDocEvent, ReviewRequestDocEvent, InitialReviewDocEvent,
     AddedMessageEvent, SubmissionDocEvent, DeletedEvent, EditedAuthorsDocEvent, DocumentURL,
     ReviewAssignmentDocEvent, IanaExpertDocEvent, IRSGBallotDocEvent, DocExtResource, DocumentActionHolder,
-    BofreqEditorDocEvent, BofreqResponsibleDocEvent )
+    BofreqEditorDocEvent, BofreqResponsibleDocEvent, DocumentSearchIndex )
 
 from ietf.utils.validators import validate_external_resource_value
 
@@ -218,3 +218,14 @@ class DocExtResourceAdmin(admin.ModelAdmin):
     search_fields = ['doc__name', 'value', 'display_name', 'name__slug',]
     raw_id_fields = ['doc', ]
 admin.site.register(DocExtResource, DocExtResourceAdmin)
+
+class DocumentSearchIndexAdmin(admin.ModelAdmin):
+    # the index is maintained by signal handlers, see ietf.doc.utils_search
+    list_display = ['id', 'document', ]
+    search_fields = ['document__name', ]
+    raw_id_fields = ['document', ]
+    readonly_fields = ['document', 'names', 'authors', ]
+
+    def has_add_permission(self, request):
+        return False
+admin.site.register(DocumentSearchIndex, DocumentSearchIndexAdmin)
@@ -0,0 +1,62 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+import concurrent.futures
+
+from django.core.management.base import BaseCommand, CommandError
+
+import debug                            # pyflakes:ignore
+
+from ietf.doc.models import Document
+from ietf.doc.utils_render import prerender_document_args, prerender_text, render_pool
+
+
+class Command(BaseCommand):
+    help = ('Fill the htmlized and pdfized caches with renders of all active drafts and RFCs. '
+            'Documents which are already cached are skipped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4,
+                            help='number of rendering processes (default 4)')
+        parser.add_argument('--documents', nargs='*', metavar='NAME',
+                            help='render only these documents')
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+        verbosity = options.get('verbosity', 1)
+
+        docs = Document.objects.filter(type_id='draft', states__type_id='draft', states__slug__in=['active', 'rfc'])
+        if options['documents']:
+            docs = docs.filter(name__in=options['documents'])
+
+        pool = render_pool(options['processes'])
+        pending = set()
+        rendered = failed = 0
+
+        def collect(return_when):
+            nonlocal pending, rendered, failed
+            done, pending = concurrent.futures.wait(pending, return_when=return_when)
+            for future in done:
+                try:
+                    name = future.result()
+                    rendered += 1
+                    if verbosity > 1:
+                        self.stdout.write('Rendered %s' % name)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write('Render failed: %s' % e)
+
+        for doc in docs.distinct().order_by('name').iterator():
+            args = prerender_document_args(doc)
+            if not args:
+                continue
+            pending.add(pool.submit(prerender_text, *args))
+            # don't hold the text of the whole corpus in memory at once
+            if len(pending) >= options['processes'] * 4:
+                collect(concurrent.futures.FIRST_COMPLETED)
+        collect(concurrent.futures.ALL_COMPLETED)
+
+        if verbosity > 0:
+            self.stdout.write('Rendered %d documents, %d failed' % (rendered, failed))
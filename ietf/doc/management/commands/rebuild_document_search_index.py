@@ -0,0 +1,25 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+import debug                            # pyflakes:ignore
+
+from ietf.doc.utils_search import rebuild_document_search_index
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the document search index from scratch, from the document aliases, '
+            'titles and authors.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='number of documents to index per batch (default 1000)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_document_search_index(batch_size=options['batch_size'])
+        if options.get('verbosity', 1) > 0:
+            self.stdout.write('Indexed %d documents' % count)
@@ -0,0 +1,65 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+import ietf.utils.models
+
+
+def forward(apps, schema_editor):
+    Document = apps.get_model('doc', 'Document')
+    DocAlias = apps.get_model('doc', 'DocAlias')
+    DocumentAuthor = apps.get_model('doc', 'DocumentAuthor')
+    DocumentSearchIndex = apps.get_model('doc', 'DocumentSearchIndex')
+    Alias = apps.get_model('person', 'Alias')
+    Email = apps.get_model('person', 'Email')
+
+    names = defaultdict(list)
+    for doc_id, name in DocAlias.docs.through.objects.values_list('document_id', 'docalias__name'):
+        names[doc_id].append(name)
+    doc_authors = defaultdict(list)
+    for doc_id, person_id in DocumentAuthor.objects.values_list('document_id', 'person_id'):
+        doc_authors[doc_id].append(person_id)
+    person_texts = defaultdict(list)
+    for person_id, name in Alias.objects.values_list('person_id', 'name'):
+        person_texts[person_id].append(name)
+    for person_id, address in Email.objects.exclude(person=None).values_list('person_id', 'address'):
+        person_texts[person_id].append(address)
+
+    entries = []
+    for doc_id, title in Document.objects.values_list('pk', 'title').iterator():
+        entries.append(DocumentSearchIndex(
+            document_id=doc_id,
+            names='\n'.join(names[doc_id] + [title]),
+            authors='\n'.join(t for p in doc_authors[doc_id] for t in person_texts[p]),
+        ))
+        if len(entries) >= 1000:
+            DocumentSearchIndex.objects.bulk_create(entries)
+            entries = []
+    DocumentSearchIndex.objects.bulk_create(entries)
+
+
+def reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doc', '0044_procmaterials_states'),
+        ('person', '0021_auto_20211210_0805'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSearchIndex',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('names', models.TextField(blank=True, help_text='Document aliases and title, one per line')),
+                ('authors', models.TextField(blank=True, help_text='Names and email addresses of the document authors, one per line')),
+                ('document', ietf.utils.models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='searchindex', to='doc.Document')),
+            ],
+        ),
+        migrations.RunPython(forward, reverse),
+    ]
@@ -3,18 +3,16 @@
 
 
 import datetime
-import logging
 import io
+import logging
 import os
-import rfc2html
 import time
 
 from typing import Optional, TYPE_CHECKING
-from weasyprint import HTML as wpHTML
 
 from django.db import models
+from django.dispatch import receiver
 from django.core import checks
-from django.core.cache import caches
 from django.core.exceptions import ValidationError
 from django.core.validators import URLValidator, RegexValidator
 from django.urls import reverse as urlreverse
@@ -25,6 +23,7 @@ from django.utils.html import mark_safe # type:ignore
 
 import debug                            # pyflakes:ignore
 
+from ietf.doc.utils_render import htmlized_text, pdfized_text, schedule_prerender
 from ietf.group.models import Group
 from ietf.name.models import ( DocTypeName, DocTagName, StreamName, IntendedStdLevelName, StdLevelName,
     DocRelationshipName, DocReminderTypeName, BallotPositionName, ReviewRequestStateName, ReviewAssignmentStateName, FormalLanguageName,
@@ -36,7 +35,7 @@ from ietf.utils.admin import admin_link
 from ietf.utils.decorators import memoize
 from ietf.utils.validators import validate_no_control_chars
 from ietf.utils.mail import formataddr
-from ietf.utils.models import ForeignKey
+from ietf.utils.models import ForeignKey, OneToOneField
 if TYPE_CHECKING:
     # importing other than for type checking causes errors due to cyclic imports
     from ietf.meeting.models import ProceedingsMaterial, Session
@@ -552,39 +551,11 @@ class DocumentInfo(models.Model):
             return None
         html = ""
         if text:
-            cache = caches['htmlized']
-            cache_key = name.split('.')[0]
-            try:
-                html = cache.get(cache_key)
-            except EOFError:
-                html = None
-            if not html:
-                # The path here has to match the urlpattern for htmlized
-                # documents in order to produce correct intra-document links
-                html = rfc2html.markup(text, path=settings.HTMLIZER_URL_PREFIX)
-                if html:
-                    cache.set(cache_key, html, settings.HTMLIZER_CACHE_TIME)
+            html = htmlized_text(name, text)
         return html
 
     def pdfized(self):
-        name = self.get_base_name()
-        text = self.text()
-        cache = caches['pdfized']
-        cache_key = name.split('.')[0]
-        try:
-            pdf = cache.get(cache_key)
-        except EOFError:
-            pdf = None
-        if not pdf:
-            html = rfc2html.markup(text, path=settings.PDFIZER_URL_PREFIX)
-            try:
-                pdf = wpHTML(string=html.replace('\xad','')).write_pdf(stylesheets=[io.BytesIO(b'html { font-size: 94%;}')])
-            except AssertionError:
-                log.log(f'weasyprint failed with an assert on {self.name}')
-                pdf = None
-            if pdf:
-                cache.set(cache_key, pdf, settings.PDFIZER_CACHE_TIME)
-        return pdf
+        return pdfized_text(self.get_base_name(), self.text())
 
     def references(self):
         return self.relations_that_doc(('refnorm','refinfo','refunk','refold'))
@@ -828,6 +799,9 @@ class Document(DocumentInfo):
         save_document_in_history(self)
         log.log(f'{time.time()-mark:.3f} seconds to save {self.name} DocHistory')
 
+        from ietf.doc.utils_search import bump_document_corpus_generation
+        bump_document_corpus_generation()
+
     def save(self, *args, **kwargs):
         # if there's no primary key yet, we can allow the save to go
         # through to break the cycle between the document and any
@@ -1124,6 +1098,17 @@ class DocAlias(models.Model):
         verbose_name = "document alias"
         verbose_name_plural = "document aliases"
 
+class DocumentSearchIndex(models.Model):
+    """Denormalized search text for a document, so that the document search
+    can match names, titles and authors without joining several tables.  Kept
+    current by signal handlers, see ietf.doc.utils_search.update_document_search_index()."""
+    document = OneToOneField(Document, related_name='searchindex')
+    names = models.TextField(blank=True, help_text="Document aliases and title, one per line")
+    authors = models.TextField(blank=True, help_text="Names and email addresses of the document authors, one per line")
+
+    def __str__(self):
+        return u"Search index for %s" % self.document.name
+
 class DocReminder(models.Model):
     event = ForeignKey('DocEvent')
     type = ForeignKey(DocReminderTypeName)
@@ -1419,4 +1404,97 @@ class BofreqEditorDocEvent(DocEvent):
 
 class BofreqResponsibleDocEvent(DocEvent):
     """ Capture the responsible leadership (IAB and IESG members) for a BOF Request """
-    responsible = models.ManyToManyField('person.Person', blank=True)
\ No newline at end of file
+    responsible = models.ManyToManyField('person.Person', blank=True)
+
+
+# Keep the document search index current.  Only saving a document creates its
+# index entry; other changes update existing entries, so that they don't bring
+# back entries which have been deleted along with their document.
+def _update_search_index(doc_ids, create=False):
+    from ietf.doc.utils_search import update_document_search_index
+    update_document_search_index(doc_ids, create=create)
+
+def _update_search_index_for_person(person_id):
+    if person_id:
+        _update_search_index(DocumentAuthor.objects.filter(person_id=person_id).values_list('document_id', flat=True).distinct())
+
+@receiver(models.signals.post_save, sender=Document)
+def document_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_search_index([instance.pk], create=True)
+
+@receiver(models.signals.post_save)
+def docevent_saved(sender, instance, created=False, raw=False, **kwargs):
+    # DocEvent subclasses are senders in their own right
+    if created and not raw and isinstance(instance, DocEvent):
+        from ietf.doc.utils_search import bump_document_corpus_generation
+        bump_document_corpus_generation()
+
+@receiver(models.signals.post_save, sender=DocAlias)
+def docalias_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_search_index(instance.docs.values_list('pk', flat=True))
+
+@receiver(models.signals.m2m_changed, sender=DocAlias.docs.through)
+def docalias_docs_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        instance._cleared_doc_ids = [instance.pk] if reverse else list(instance.docs.values_list('pk', flat=True))
+    elif action == "post_clear":
+        _update_search_index(getattr(instance, '_cleared_doc_ids', []))
+    elif action in ("post_add", "post_remove"):
+        _update_search_index([instance.pk] if reverse else pk_set)
+
+@receiver(models.signals.post_save, sender=DocumentAuthor)
+@receiver(models.signals.post_delete, sender=DocumentAuthor)
+def documentauthor_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_search_index([instance.document_id])
+
+@receiver(models.signals.post_save, sender='person.Alias')
+@receiver(models.signals.post_delete, sender='person.Alias')
+@receiver(models.signals.post_save, sender=Email)
+@receiver(models.signals.post_delete, sender=Email)
+def author_name_or_email_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_search_index_for_person(instance.person_id)
+
+@receiver(models.signals.post_save, sender=NewRevisionDocEvent)
+@receiver(models.signals.post_save, sender=DocEvent)
+def prerender_new_text(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw and (sender is NewRevisionDocEvent or instance.type == "published_rfc"):
+        schedule_prerender(instance.doc_id)
+
+# Keep the document typeahead indexes current, see CurrentTypeahead.changed()
+def _document_typeahead_changed(model_name, pks):
+    from ietf.doc.utils_search import document_typeahead
+    for pk in pks:
+        document_typeahead.changed((model_name, pk))
+
+@receiver(models.signals.post_save, sender=Document)
+@receiver(models.signals.post_save, sender=DocAlias)
+def document_name_added(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        _document_typeahead_changed("docalias" if sender == DocAlias else "document", [instance.pk])
+
+@receiver(models.signals.pre_delete, sender=Document)
+def document_name_removing(sender, instance, **kwargs):
+    # the aliases of the document lose it along with their links to it
+    instance._typeahead_alias_ids = list(instance.docalias.values_list('pk', flat=True))
+
+@receiver(models.signals.post_delete, sender=Document)
+@receiver(models.signals.post_delete, sender=DocAlias)
+def document_name_removed(sender, instance, **kwargs):
+    if sender == DocAlias:
+        _document_typeahead_changed("docalias", [instance.pk])
+    else:
+        _document_typeahead_changed("document", [instance.pk])
+        _document_typeahead_changed("docalias", getattr(instance, '_typeahead_alias_ids', []))
+
+@receiver(models.signals.m2m_changed, sender=DocAlias.docs.through)
+def docalias_typeahead_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        instance._cleared_alias_ids = list(instance.docalias.values_list('pk', flat=True)) if reverse else [instance.pk]
+    elif action == "post_clear":
+        _document_typeahead_changed("docalias", getattr(instance, '_cleared_alias_ids', []))
+    elif action in ("post_add", "post_remove"):
+        _document_typeahead_changed("docalias", pk_set if reverse else [instance.pk])
@@ -18,7 +18,7 @@ from ietf.doc.models import (BallotType, DeletedEvent, StateType, State, Documen
     RelatedDocHistory, BallotPositionDocEvent, AddedMessageEvent, SubmissionDocEvent,
     ReviewRequestDocEvent, ReviewAssignmentDocEvent, EditedAuthorsDocEvent, DocumentURL,
     IanaExpertDocEvent, IRSGBallotDocEvent, DocExtResource, DocumentActionHolder, 
-    BofreqEditorDocEvent,BofreqResponsibleDocEvent)
+    BofreqEditorDocEvent,BofreqResponsibleDocEvent, DocumentSearchIndex)
 
 from ietf.name.resources import BallotPositionNameResource, DocTypeNameResource
 class BallotTypeResource(ModelResource):
@@ -301,6 +301,22 @@ class DocAliasResource(ModelResource):
         }
 api.doc.register(DocAliasResource())
 
+class DocumentSearchIndexResource(ModelResource):
+    document         = ToOneField(DocumentResource, 'document')
+    class Meta:
+        cache = SimpleCache()
+        queryset = DocumentSearchIndex.objects.all()
+        serializer = api.Serializer()
+        #resource_name = 'documentsearchindex'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "names": ALL,
+            "authors": ALL,
+            "document": ALL_WITH_RELATIONS,
+        }
+api.doc.register(DocumentSearchIndexResource())
+
 from ietf.person.resources import PersonResource
 class TelechatDocEventResource(ModelResource):
     by               = ToOneField(PersonResource, 'by')
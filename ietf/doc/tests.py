@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 
+import concurrent.futures.process
 import os
 import datetime
 import io
@@ -10,6 +11,8 @@ import bibtexparser
 import mock
 import json
 import copy
+import threading
+import time
 
 from http.cookies import SimpleCookie
 from pathlib import Path
@@ -17,6 +20,7 @@ from pyquery import PyQuery
 from urllib.parse import urlparse, parse_qs
 from tempfile import NamedTemporaryFile
 
+from django.core.cache import cache, caches
 from django.core.management import call_command
 from django.urls import reverse as urlreverse
 from django.conf import settings
@@ -31,7 +35,7 @@ import debug                            # pyflakes:ignore
 
 from ietf.doc.models import ( Document, DocAlias, DocRelationshipName, RelatedDocument, State,
     DocEvent, BallotPositionDocEvent, LastCallDocEvent, WriteupDocEvent, NewRevisionDocEvent, BallotType,
-    EditedAuthorsDocEvent )
+    EditedAuthorsDocEvent, DocumentAuthor, DocumentSearchIndex )
 from ietf.doc.factories import ( DocumentFactory, DocEventFactory, CharterFactory, 
     ConflictReviewFactory, WgDraftFactory, IndividualDraftFactory, WgRfcFactory, 
     IndividualRfcFactory, StateDocEventFactory, BallotPositionDocEventFactory, 
@@ -39,6 +43,8 @@ from ietf.doc.factories import ( DocumentFactory, DocEventFactory, CharterFactor
     StatusChangeFactory)
 from ietf.doc.fields import SearchableDocumentsField
 from ietf.doc.utils import create_ballot_if_not_open, uppercase_std_abbreviated_name
+from ietf.doc.utils_search import document_typeahead
+from ietf.doc.utils_render import schedule_prerender, single_flight_render
 from ietf.group.models import Group
 from ietf.group.factories import GroupFactory, RoleFactory
 from ietf.ipr.factories import HolderIprDisclosureFactory
@@ -138,6 +144,68 @@ class SearchTests(TestCase):
         self.assertEqual(r.status_code, 200)
         self.assertContains(r, draft.title)
 
+    def test_document_search_index(self):
+        draft = WgDraftFactory(title="Subterranean Routing", authors=[PersonFactory()])
+        index = DocumentSearchIndex.objects.get(document=draft)
+        self.assertIn(draft.name, index.names)
+        self.assertIn("Subterranean Routing", index.names)
+        author = draft.documentauthor_set.first().person
+        self.assertIn(author.name, index.authors)
+
+        # changes to the title, aliases and authors are picked up
+        draft.title = "Aerial Routing"
+        draft.save_with_history([DocEventFactory(doc=draft)])
+        DocAlias.objects.create(name="rfc9999").docs.add(draft)
+        new_author = PersonFactory(name="Jack Sprat")
+        DocumentAuthor.objects.create(document=draft, person=new_author, order=2)
+        EmailFactory(person=new_author, address="sprat@example.org")
+        index = DocumentSearchIndex.objects.get(document=draft)
+        self.assertIn("Aerial Routing", index.names)
+        self.assertNotIn("Subterranean", index.names)
+        self.assertIn("rfc9999", index.names)
+        self.assertIn("Jack Sprat", index.authors)
+        self.assertIn("sprat@example.org", index.authors)
+
+        base_url = urlreverse('ietf.doc.views_search.search')
+        r = self.client.get(base_url + "?rfcs=on&activedrafts=on&name=rfc9999")
+        self.assertContains(r, draft.title)
+        r = self.client.get(base_url + "?rfcs=on&activedrafts=on&by=author&author=sprat@example")
+        self.assertContains(r, draft.title)
+
+        DocumentAuthor.objects.filter(person=new_author).delete()
+        self.assertNotIn("Jack Sprat", DocumentSearchIndex.objects.get(document=draft).authors)
+
+        # rebuild from scratch
+        DocumentSearchIndex.objects.all().delete()
+        call_command('rebuild_document_search_index', verbosity=0)
+        self.assertEqual(DocumentSearchIndex.objects.get(document=draft).names, index.names)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-search-result-cache'}})
+    # the corpus generation is bumped once changes are committed, which
+    # doesn't happen in tests
+    @mock.patch('ietf.doc.utils_search.transaction.on_commit', side_effect=lambda f: f())
+    def test_search_result_cache(self, mock_on_commit):
+        from ietf.utils.metrics import cache_metrics
+        draft = WgDraftFactory(title="Subterranean Routing")
+        url = urlreverse('ietf.doc.views_search.search') + "?activedrafts=on&name=subterranean"
+        r = self.client.get(url)
+        self.assertContains(r, draft.name)
+        r = self.client.get(url)
+        self.assertContains(r, draft.name)
+        self.assertEqual(cache_metrics()['doc-search']['hits'], 1)
+        self.assertEqual(cache_metrics()['doc-search']['misses'], 1)
+
+        # a document change invalidates the cached results
+        other = WgDraftFactory(title="Subterranean Switching")
+        r = self.client.get(url)
+        self.assertContains(r, other.name)
+        draft.title = "Aerial Routing"
+        draft.save_with_history([DocEventFactory(doc=draft)])
+        r = self.client.get(url)
+        self.assertNotContains(r, draft.name)
+        self.assertContains(r, other.name)
+        self.assertEqual(cache_metrics()['doc-search']['misses'], 3)
+
     def test_search_for_name(self):
         draft = WgDraftFactory(name='draft-ietf-mars-test',group=GroupFactory(acronym='mars',parent=Group.objects.get(acronym='farfut')),authors=[PersonFactory()],ad=PersonFactory())
         draft.set_state(State.objects.get(used=True, type="draft-iesg", slug="pub-req"))
@@ -296,10 +364,34 @@ class SearchTests(TestCase):
         draft = IndividualDraftFactory()
         rfc = WgRfcFactory()
 
-        r = self.client.get(urlreverse('ietf.doc.views_search.index_all_drafts'))
+        url = urlreverse('ietf.doc.views_search.index_all_drafts')
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.streaming)
+        content = b''.join(r.streaming_content).decode('utf-8')
+        self.assertIn(draft.name, content)
+        self.assertIn(rfc.canonical_name().upper(), content)
+        # the draft name of the rfc is not listed
+        self.assertNotIn('/doc/%s/' % rfc.name, content)
+        self.assertNotIn('<!-- links:', content)
+        q = PyQuery(content)
+        self.assertIn('(1)', q('#rfc').text())
+
+        # unchanged index
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=r['ETag'])
+        self.assertEqual(r.status_code, 304)
+
+        etag = r['ETag']
+        # the page is rendered differently for a logged in user
+        self.client.login(username='secretary', password='secretary+password')
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r['ETag'], etag)
+        self.client.logout()
+
+        Document.objects.filter(pk=draft.pk).update(time=draft.time + datetime.timedelta(days=1))
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
         self.assertEqual(r.status_code, 200)
-        self.assertContains(r, draft.name)
-        self.assertContains(r, rfc.canonical_name().upper())
 
         r = self.client.get(urlreverse('ietf.doc.views_search.index_active_drafts'))
         self.assertEqual(r.status_code, 200)
@@ -331,6 +423,28 @@ class SearchTests(TestCase):
         data = r.json()
         self.assertEqual(data[0]["id"], doc_alias.pk)
 
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-document-typeahead'}})
+    def test_ajax_search_docs_index_updates(self):
+        url = urlreverse('ietf.doc.views_search.ajax_select2_search_docs', kwargs={"model_name": "docalias", "doc_type": "draft"})
+        IndividualDraftFactory(name="draft-somebody-qwertyzz-first")
+        r = self.client.get(url, dict(q="qwertyzz"))
+        self.assertEqual(len(r.json()), 1)
+        index = document_typeahead.get()
+
+        # new documents and aliases are added to the index, rather than
+        # rebuilding it
+        draft = IndividualDraftFactory(name="draft-somebody-qwertyzz-second")
+        r = self.client.get(url, dict(q="qwertyzz"))
+        self.assertEqual(len(r.json()), 2)
+        self.assertIs(document_typeahead.get(), index)
+
+        # and aliases which no longer name a draft are dropped from it
+        alias = draft.docalias.first()
+        alias.docs.remove(draft)
+        r = self.client.get(url, dict(q="qwertyzz"))
+        self.assertNotIn(alias.pk, [d["id"] for d in r.json()])
+        self.assertIs(document_typeahead.get(), index)
+
     def test_recent_drafts(self):
         # Three drafts to show with various warnings
         drafts = WgDraftFactory.create_batch(3,states=[('draft','active'),('draft-iesg','ad-eval')])
@@ -2195,10 +2309,13 @@ class DocumentMeetingTests(TestCase):
         self.assertEqual(2,len(q('select#id_version option')))
 
         self.assertEqual(1,doc.docevent_set.count())
+        Meeting.objects.filter(pk=sp.session.meeting_id).update(modified=datetime.datetime.now() - datetime.timedelta(days=1))
         response = self.client.post(url,{'version':'00','save':''})
         self.assertEqual(response.status_code, 302)
         self.assertEqual(doc.sessionpresentation_set.get(pk=sp.pk).rev,'00')
         self.assertEqual(2,doc.docevent_set.count())
+        # the agenda of the meeting is marked as modified
+        self.assertGreater(Meeting.objects.get(pk=sp.session.meeting_id).modified, datetime.datetime.now() - datetime.timedelta(hours=1))
 
     def test_edit_document_session_after_proceedings_closed(self):
         doc = IndividualDraftFactory.create()
@@ -2799,3 +2916,52 @@ class PdfizedTests(TestCase):
             for ext in ('pdf','txt','html','anythingatall'):
                 self.should_succeed(dict(name=rfc.name,rev=f'{r:02d}',ext=ext))
         self.should_404(dict(name=rfc.name,rev='02'))
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-render-lock'},
+        'pdfized': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-render-pdfized'},
+    })
+    def test_single_flight_render(self):
+        renders = []
+        def render():
+            renders.append(1)
+            return b'pdf'
+
+        self.assertEqual(single_flight_render('pdfized', 'draft-foo-00', 60, render), b'pdf')
+        self.assertEqual(single_flight_render('pdfized', 'draft-foo-00', 60, render), b'pdf')
+        self.assertEqual(len(renders), 1)
+
+        # a render in progress elsewhere is waited for rather than repeated
+        cache.add('doc:render:pdfized:draft-foo-01', 1)
+        def other_render():
+            time.sleep(0.5)
+            caches['pdfized'].set('draft-foo-01', b'other pdf')
+            cache.delete('doc:render:pdfized:draft-foo-01')
+        thread = threading.Thread(target=other_render)
+        thread.start()
+        self.assertEqual(single_flight_render('pdfized', 'draft-foo-01', 60, render), b'other pdf')
+        thread.join()
+        self.assertEqual(len(renders), 1)
+
+        # a render which doesn't show up is done here, and doesn't release
+        # the lock of the other render
+        cache.add('doc:render:pdfized:draft-foo-02', 1)
+        with mock.patch('ietf.doc.utils_render.RENDER_LOCK_TIMEOUT', 0.5):
+            self.assertEqual(single_flight_render('pdfized', 'draft-foo-02', 60, render), b'pdf')
+        self.assertEqual(len(renders), 2)
+        self.assertEqual(cache.get('doc:render:pdfized:draft-foo-02'), 1)
+
+    @override_settings(DOC_PRERENDER_WORKERS=1)
+    def test_schedule_prerender_broken_pool(self):
+        import ietf.doc.utils_render
+        draft = WgDraftFactory()
+        broken = mock.Mock()
+        broken.submit.side_effect = concurrent.futures.process.BrokenProcessPool('worker died')
+        ietf.doc.utils_render._render_pool = broken
+        with mock.patch('ietf.doc.utils_render.prerender_document_args', return_value=(draft.name + '-00.txt', 'text')), \
+             mock.patch('ietf.doc.utils_render.transaction.on_commit', side_effect=lambda f: f()):
+            schedule_prerender(draft.pk)
+        # the broken pool is dropped, so that the next render starts a new one
+        self.assertTrue(broken.submit.called)
+        self.assertTrue(broken.shutdown.called)
+        self.assertIsNone(ietf.doc.utils_render._render_pool)
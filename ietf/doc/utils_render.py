@@ -0,0 +1,151 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+"""
+Rendering of htmlized and pdfized documents.
+
+Renders are kept in the 'htmlized' and 'pdfized' caches.  Only one process
+renders a given document at a time: other requests for it wait for that
+render to show up in the cache, rather than starting a render of their own.
+New revisions and newly published RFCs are rendered ahead of the first
+request, in a pool of worker processes.
+"""
+
+import concurrent.futures
+import concurrent.futures.process
+import io
+import time
+
+import rfc2html
+
+from weasyprint import HTML as wpHTML
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+
+import debug                            # pyflakes:ignore
+
+from ietf.utils import log
+
+
+RENDER_LOCK_TIMEOUT = 120               # seconds; longer than any single render should take
+
+def render_cache_key(name):
+    return name.split('.')[0]
+
+def render_htmlized(text):
+    # The path here has to match the urlpattern for htmlized
+    # documents in order to produce correct intra-document links
+    return rfc2html.markup(text, path=settings.HTMLIZER_URL_PREFIX)
+
+def render_pdfized(text, name):
+    html = rfc2html.markup(text, path=settings.PDFIZER_URL_PREFIX)
+    try:
+        return wpHTML(string=html.replace('\xad','')).write_pdf(stylesheets=[io.BytesIO(b'html { font-size: 94%;}')])
+    except AssertionError:
+        log.log(f'weasyprint failed with an assert on {name}')
+        return None
+
+def single_flight_render(cache_name, cache_key, timeout, render):
+    """Return the cached render for cache_key, calling render() to produce it
+    if it isn't cached.  If another process is already rendering it, wait
+    for that render instead."""
+    render_cache = caches[cache_name]
+    try:
+        result = render_cache.get(cache_key)
+    except EOFError:
+        result = None
+    if result:
+        return result
+
+    lock_key = "doc:render:%s:%s" % (cache_name, cache_key)
+    locked = cache.add(lock_key, 1, RENDER_LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.time() + RENDER_LOCK_TIMEOUT
+        while time.time() < deadline and cache.get(lock_key):
+            time.sleep(0.2)
+        try:
+            result = render_cache.get(cache_key)
+        except EOFError:
+            result = None
+        if result:
+            return result
+        # the other render failed or timed out, try it here instead.  If yet
+        # another process has taken the lock meanwhile, render without it,
+        # and leave its lock alone.
+        locked = cache.add(lock_key, 1, RENDER_LOCK_TIMEOUT)
+
+    try:
+        result = render()
+        if result:
+            render_cache.set(cache_key, result, timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return result
+
+def htmlized_text(name, text):
+    return single_flight_render('htmlized', render_cache_key(name), settings.HTMLIZER_CACHE_TIME,
+                                lambda: render_htmlized(text))
+
+def pdfized_text(name, text):
+    return single_flight_render('pdfized', render_cache_key(name), settings.PDFIZER_CACHE_TIME,
+                                lambda: render_pdfized(text, name))
+
+def prerender_text(name, text):
+    """Render the htmlized and pdfized forms of a document into the caches.
+    Runs in the worker processes, so it doesn't use the database."""
+    htmlized_text(name, text)
+    pdfized_text(name, text)
+    return name
+
+
+def _init_render_worker():
+    # don't share the cache connections of the parent process
+    for c in caches.all():
+        c.close()
+
+_render_pool = None
+
+def render_pool(processes=None):
+    """Return the process pool for background renders, creating it on first use."""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes or settings.DOC_PRERENDER_WORKERS, initializer=_init_render_worker)
+    return _render_pool
+
+def prerender_document_args(doc):
+    """Return the (name, text) arguments for prerender_text() for doc, or
+    None if it doesn't have a text form to render."""
+    name = doc.get_base_name()
+    if not name.endswith('.txt'):
+        return None
+    text = doc.text()
+    if not text:
+        return None
+    return name, text
+
+def schedule_prerender(doc_id):
+    """Render the current revision of a document in the background, once the
+    current transaction has been committed."""
+    if not settings.DOC_PRERENDER_WORKERS:
+        return
+
+    def submit():
+        global _render_pool
+        from ietf.doc.models import Document
+        doc = Document.objects.filter(pk=doc_id).first()
+        args = doc and prerender_document_args(doc)
+        if args:
+            try:
+                render_pool().submit(prerender_text, *args)
+            except concurrent.futures.process.BrokenProcessPool as e:
+                # A worker died, e.g. in weasyprint or from running out of
+                # memory, which breaks the pool for good.  Start over with a
+                # new pool next time; the document is rendered on request.
+                log.log(f'prerender pool broken, not prerendering {args[0]}: {e}')
+                _render_pool.shutdown(wait=False)
+                _render_pool = None
+
+    transaction.on_commit(submit)
@@ -5,10 +5,18 @@ import re
 import datetime
 import debug                            # pyflakes:ignore
 
-from ietf.doc.models import Document, DocAlias, RelatedDocument, DocEvent, TelechatDocEvent, BallotDocEvent
+from collections import defaultdict
+
+from django.db import transaction
+
+from ietf.doc.models import ( Document, DocAlias, RelatedDocument, DocEvent, TelechatDocEvent, BallotDocEvent,
+    DocumentAuthor, DocumentSearchIndex )
 from ietf.doc.expire import expirable_drafts
 from ietf.doc.utils import augment_docs_and_user_with_user_info
 from ietf.meeting.models import SessionPresentation, Meeting, Session
+from ietf.person.models import Alias, Email
+from ietf.utils.cache import bump_cache_generation, cache_generation
+from ietf.utils.typeahead import CurrentTypeahead, TypeaheadIndex, normalize_typeahead_text, rank_matches
 
 def wrap_value(v):
     return lambda: v
@@ -244,4 +252,111 @@ def prepare_document_table(request, docs, query=None, max_results=200):
             else:
                 d["sort"] = h["key"]
 
-    return (docs, meta)
\ No newline at end of file
+    return (docs, meta)
+
+
+def document_search_index_texts(doc_ids):
+    """Return the search index texts for the given documents, as a dict
+    of document id -> (names, authors)."""
+    names = defaultdict(list)
+    for doc_id, name in DocAlias.docs.through.objects.filter(document_id__in=doc_ids).values_list("document_id", "docalias__name"):
+        names[doc_id].append(name)
+    for doc_id, title in Document.objects.filter(pk__in=doc_ids).values_list("pk", "title"):
+        names[doc_id].append(title)
+
+    doc_authors = defaultdict(list)
+    for doc_id, person_id in DocumentAuthor.objects.filter(document_id__in=doc_ids).values_list("document_id", "person_id"):
+        doc_authors[doc_id].append(person_id)
+    person_ids = set(p for l in doc_authors.values() for p in l)
+    person_texts = defaultdict(list)
+    for person_id, name in Alias.objects.filter(person_id__in=person_ids).values_list("person_id", "name"):
+        person_texts[person_id].append(name)
+    for person_id, address in Email.objects.filter(person_id__in=person_ids).values_list("person_id", "address"):
+        person_texts[person_id].append(address)
+
+    return dict((doc_id, ("\n".join(names[doc_id]), "\n".join(t for p in doc_authors[doc_id] for t in person_texts[p])))
+                for doc_id in names)
+
+def update_document_search_index(doc_ids, create=False):
+    """Recompute the search index entries of the given documents.  Entries
+    which don't exist are only created if create is True."""
+    doc_ids = list(doc_ids)
+    if not doc_ids:
+        return
+    texts = document_search_index_texts(doc_ids)
+    existing = set(DocumentSearchIndex.objects.filter(document_id__in=doc_ids).values_list("document_id", flat=True))
+    for doc_id in existing:
+        names, authors = texts.get(doc_id, ("", ""))
+        DocumentSearchIndex.objects.filter(document_id=doc_id).update(names=names, authors=authors)
+    if create:
+        DocumentSearchIndex.objects.bulk_create([
+            DocumentSearchIndex(document_id=doc_id, names=names, authors=authors)
+            for doc_id, (names, authors) in texts.items() if doc_id not in existing
+        ])
+
+def rebuild_document_search_index(batch_size=1000):
+    """Recreate the search index entries of all documents, and return the number
+    of entries."""
+    DocumentSearchIndex.objects.all().delete()
+    doc_ids = list(Document.objects.values_list("pk", flat=True).order_by("pk"))
+    for i in range(0, len(doc_ids), batch_size):
+        update_document_search_index(doc_ids[i:i+batch_size], create=True)
+    return len(doc_ids)
+
+DOCUMENT_CORPUS_GENERATION_KEY = "doc:document:corpus:generation"
+
+def document_corpus_generation():
+    """Return the current document corpus generation, which changes whenever
+    documents change, for versioning cached search results."""
+    return cache_generation(DOCUMENT_CORPUS_GENERATION_KEY)
+
+def bump_document_corpus_generation():
+    # Only once the change is committed, or a concurrent search could cache
+    # results from before the change under the new generation
+    transaction.on_commit(lambda: bump_cache_generation(DOCUMENT_CORPUS_GENERATION_KEY))
+
+class DocumentTypeahead(object):
+    """Names of documents and document aliases, indexed for the select2
+    document searches.  The index of each document type is built on first
+    use."""
+
+    def __init__(self):
+        self.indexes = {}
+
+    def index(self, model_name, doc_type):
+        key = (model_name, doc_type)
+        if key not in self.indexes:
+            if model_name == "docalias":
+                names = DocAlias.objects.filter(docs__type=doc_type).values_list("pk", "name").distinct()
+            else:
+                names = Document.objects.filter(type=doc_type).values_list("pk", "name")
+            index = TypeaheadIndex(names)
+            self.indexes[key] = (index, dict(zip(index.keys, index.texts)))
+        return self.indexes[key]
+
+    def update(self, change):
+        """Bring the entries of a document, given as ("document", pk), or of a
+        document alias, given as ("docalias", pk), up to date in the indexes
+        built so far."""
+        model_name, pk = change
+        if model_name == "docalias":
+            found = DocAlias.objects.filter(pk=pk, docs__isnull=False).values_list("docs__type", "name").distinct()
+        else:
+            found = Document.objects.filter(pk=pk).values_list("type", "name")
+        found = dict(found)
+        for (index_model_name, doc_type), (index, names) in self.indexes.items():
+            if index_model_name == model_name:
+                name = found.get(doc_type)
+                index.update(pk, [name] if name else [])
+                if name:
+                    names[pk] = normalize_typeahead_text(name)
+                else:
+                    names.pop(pk, None)
+
+    def search(self, model_name, doc_type, terms):
+        """Return the pks of the documents of doc_type, or with model_name
+        "docalias" their aliases, with names containing each term."""
+        index, names = self.index(model_name, doc_type)
+        return rank_matches([index.matches(t) for t in terms], names.get)
+
+document_typeahead = CurrentTypeahead("doc:typeahead:generation", DocumentTypeahead)
@@ -41,15 +41,19 @@ from django import forms
 from django.conf import settings
 from django.core.cache import cache, caches
 from django.urls import reverse as urlreverse
-from django.db.models import Q
-from django.http import Http404, HttpResponseBadRequest, HttpResponse, HttpResponseRedirect, QueryDict
+from django.db.models import Q, F, Case, When, Max, CharField
+from django.db.models.functions import Length
+from django.http import Http404, HttpResponseBadRequest, HttpResponse, HttpResponseRedirect, QueryDict, StreamingHttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.views.decorators.http import condition
 from django.utils.cache import _generate_cache_key # type: ignore
 
 
 
 import debug                            # pyflakes:ignore
 
+import ietf
 from ietf.doc.models import ( Document, DocHistory, DocAlias, State,
     LastCallDocEvent, NewRevisionDocEvent, IESG_SUBSTATE_TAGS, IESG_BALLOT_ACTIVE_STATES )
 from ietf.doc.fields import select2_id_doc_name_json
@@ -60,7 +64,8 @@ from ietf.name.models import DocTagName, DocTypeName, StreamName
 from ietf.person.models import Person
 from ietf.person.utils import get_active_ads
 from ietf.utils.draft_search import normalize_draftname
-from ietf.doc.utils_search import prepare_document_table
+from ietf.doc.utils_search import prepare_document_table, document_corpus_generation, document_typeahead
+from ietf.utils.metrics import register_cache_metric, record_cache_hit, record_cache_miss
 
 
 class SearchForm(forms.Form):
@@ -158,10 +163,9 @@ def retrieve_search_results(form, all_types=False):
 
         docs = Document.objects.filter(type__in=types)
 
-    # name
+    # name, matched against the aliases and title in the document search index
     if query["name"]:
-        docs = docs.filter(Q(docalias__name__icontains=query["name"]) |
-                           Q(title__icontains=query["name"])).distinct()
+        docs = docs.filter(searchindex__names__icontains=query["name"])
 
     # rfc/active/old check buttons
     allowed_draft_states = []
@@ -178,10 +182,7 @@ def retrieve_search_results(form, all_types=False):
     # radio choices
     by = query["by"]
     if by == "author":
-        docs = docs.filter(
-            Q(documentauthor__person__alias__name__icontains=query["author"]) |
-            Q(documentauthor__person__email__address__icontains=query["author"])
-        )
+        docs = docs.filter(searchindex__authors__icontains=query["author"])
     elif by == "group":
         docs = docs.filter(group__acronym=query["group"])
     elif by == "area":
@@ -201,6 +202,25 @@ def retrieve_search_results(form, all_types=False):
 
     return docs
 
+register_cache_metric('doc-search')
+
+def cached_search_result_ids(form, params, max_results=200):
+    """Return the primary keys of the first max_results documents matching a
+    valid search form, the ones prepare_document_table() shows.
+
+    Only the ordered list of keys is cached, and the cache key includes the
+    document corpus generation, so cached results are dropped as soon as any
+    document changes instead of being served stale."""
+    cache_key = "%s:%s:%s" % (get_search_cache_key(params), max_results, document_corpus_generation())
+    ids = cache.get(cache_key)
+    if ids is None:
+        record_cache_miss('doc-search')
+        ids = list(retrieve_search_results(form).values_list('pk', flat=True)[:max_results])
+        cache.set(cache_key, ids, settings.DOC_SEARCH_CACHE_TIME)
+    else:
+        record_cache_hit('doc-search')
+    return ids
+
 def search(request):
     if request.GET:
         # backwards compatibility
@@ -216,11 +236,7 @@ def search(request):
         if not form.is_valid():
             return HttpResponseBadRequest("form not valid: %s" % form.errors)
 
-        cache_key = get_search_cache_key(get_params)
-        results = cache.get(cache_key)
-        if not results:
-            results = retrieve_search_results(form)
-            cache.set(cache_key, results)
+        results = Document.objects.filter(pk__in=cached_search_result_ids(form, get_params))
 
         results, meta = prepare_document_table(request, results, get_params)
         meta['searching'] = True
@@ -509,8 +525,38 @@ def recent_drafts(request, days=7):
     })
 
 
+def index_all_drafts_names(state):
+    """
+    Return querysets of the names listed for documents in the given draft state
+    in the index of all drafts, first the RFCs and then the drafts, in index order.
+    Where a document has both a draft name and an RFC name, only the RFC name is
+    listed.
+    """
+    aliases = DocAlias.objects.filter(docs__states=state).annotate(doc_name=F("docs__name"))
+    # names paired with another name for the same document; the draft names are skipped
+    skip = aliases.exclude(name=F("doc_name")).annotate(
+        skip_name=Case(When(name__startswith="rfc", then=F("doc_name")), default=F("name"), output_field=CharField()),
+    ).values("skip_name")
+    names = aliases.annotate(
+        index_name=Case(When(name=F("doc_name"), then=F("name")),
+                        When(name__startswith="rfc", then=F("name")),
+                        default=F("doc_name"), output_field=CharField()),
+    ).exclude(index_name__in=skip)
+
+    # RFCs in descending RFC number order, then drafts by name
+    rfcs = names.filter(index_name__startswith="rfc").order_by(Length("index_name").desc(), "-index_name")
+    drafts = names.exclude(index_name__startswith="rfc").order_by("index_name")
+    return rfcs.values_list("index_name", flat=True), drafts.values_list("index_name", flat=True)
+
+def index_all_drafts_etag(request):
+    latest = Document.objects.aggregate(Max("time"))["time__max"]
+    # include the user, as pages differ between users, e.g., in the menus
+    return "%s-%s-%s" % (ietf.__version__, latest.strftime("%Y%m%d%H%M%S%f") if latest else "", request.user.pk or "")
+
+@condition(etag_func=index_all_drafts_etag)
 def index_all_drafts(request):
-    # try to be efficient since this view returns a lot of data
+    # this view returns a lot of data, so render the page around placeholders
+    # for the document links, and stream the links from the database in chunks
     categories = []
 
     for s in ("active", "rfc", "expired", "repl", "auth-rm", "ietf-rm"):
@@ -523,34 +569,39 @@ def index_all_drafts(request):
         else:
             heading = "%s Internet-Drafts" % state.name
 
-        draft_names = DocAlias.objects.filter(docs__states=state).values_list("name", "docs__name")
-
-        names = []
-        names_to_skip = set()
-        for name, doc in draft_names:
-            sort_key = name
-            if name != doc:
-                if not name.startswith("rfc"):
-                    name, doc = doc, name
-                names_to_skip.add(doc)
-
-            if name.startswith("rfc"):
-                name = name.upper()
-                sort_key = '%09d' % (100000000-int(name[3:]))
-
-            names.append((name, sort_key))
-
-        names.sort(key=lambda t: t[1])
-
-        names = ['<a href="/doc/' + n + '/">' + n +'</a>'
-                 for n, __ in names if n not in names_to_skip]
+        names = index_all_drafts_names(state)
 
         categories.append((state,
                       heading,
-                      len(names),
-                      "<br>".join(names)
+                      sum(n.count() for n in names),
+                      "<!-- links:%s -->" % state.slug,
+                      names,
                       ))
-    return render(request, 'doc/index_all_drafts.html', { "categories": categories })
+
+    page = render_to_string('doc/index_all_drafts.html', { "categories": [c[:4] for c in categories] }, request=request)
+
+    def stream(page):
+        chunk_size = 1000
+        for state, heading, count, placeholder, names in categories:
+            before, page = page.split(placeholder, 1)
+            yield before
+            sep = ""
+            for qs in names:
+                links = []
+                for n in qs.iterator(chunk_size=chunk_size):
+                    if n.startswith("rfc"):
+                        n = n.upper()
+                    links.append('<a href="/doc/' + n + '/">' + n +'</a>')
+                    if len(links) >= chunk_size:
+                        yield sep + "<br>".join(links)
+                        sep = "<br>"
+                        links = []
+                if links:
+                    yield sep + "<br>".join(links)
+                    sep = "<br>"
+        yield page
+
+    return StreamingHttpResponse(stream(page), content_type="text/html; charset=%s" % settings.DEFAULT_CHARSET)
 
 def index_active_drafts(request):
     cache_key = 'doc:index_active_drafts'
@@ -569,18 +620,10 @@ def ajax_select2_search_docs(request, model_name, doc_type):
     q = [w.strip() for w in request.GET.get('q', '').split() if w.strip()]
 
     if not q:
-        objs = model.objects.none()
+        objs = []
     else:
-        qs = model.objects.all()
-
-        if model == Document:
-            qs = qs.filter(type=doc_type)
-        elif model == DocAlias:
-            qs = qs.filter(docs__type=doc_type)
-
-        for t in q:
-            qs = qs.filter(name__icontains=t)
-
-        objs = qs.distinct().order_by("name")[:20]
+        pks = document_typeahead.get().search(model_name, doc_type, q)[:20]
+        found = model.objects.in_bulk(pks)
+        objs = [ found[pk] for pk in pks if pk in found ]
 
     return HttpResponse(select2_id_doc_name_json(objs), content_type='application/json')
@@ -4,7 +4,6 @@ import copy
 import datetime
 
 from django.conf import settings
-from django.core.cache import cache
 from django.urls import reverse as urlreverse
 from django.db.models.aggregates import Count
 from django.http import JsonResponse, HttpResponseBadRequest
@@ -15,7 +14,6 @@ import debug                            # pyflakes:ignore
 
 from ietf.doc.models import DocEvent
 from ietf.doc.templatetags.ietf_filters import comma_separated_list
-from ietf.doc.utils import get_search_cache_key
 from ietf.doc.views_search import SearchForm, retrieve_search_results
 from ietf.name.models import DocTypeName
 from ietf.person.models import Person
@@ -127,19 +125,12 @@ def chart_newrevisiondocevent(request):
 def chart_data_newrevisiondocevent(request):
     queryargs = request.GET
     if queryargs:
-        cache_key = get_search_cache_key(queryargs)
-        results = cache.get(cache_key)
-        if not results:
-            form = SearchForm(queryargs)
-            if not form.is_valid():
-                return HttpResponseBadRequest("form not valid: %s" % form.errors)
-            results = retrieve_search_results(form)
-            if results.exists():
-                cache.set(cache_key, results)
-        if results.exists():
-            data = model_to_timeline_data(DocEvent, doc__in=results, type='new_revision')
-        else:
-            data = []
+        form = SearchForm(queryargs)
+        if not form.is_valid():
+            return HttpResponseBadRequest("form not valid: %s" % form.errors)
+        # the timeline covers all of the matching documents, more than are
+        # cached for the search page, so take them in a subquery
+        data = model_to_timeline_data(DocEvent, doc__in=retrieve_search_results(form), type='new_revision')
     else:
         data = []
     return JsonResponse(data, safe=False)
@@ -3,10 +3,23 @@
 # -*- check-flake8 -*-
 
 
+import concurrent.futures
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Q
 from django.template.loader import render_to_string
 
 from ietf.doc.models import RelatedDocument
+from ietf.doc.utils_search import document_corpus_generation
+from ietf.utils.log import log
+from ietf.utils.pipe import pipe
 
 
 class Edge(object):
@@ -126,8 +139,105 @@ def make_dot(group):
         node.nodename = nodename(node.name)
         node.styles = get_node_styles(node, group)
 
+    # The rendered graphs are named by the hash of the dot source, so it has
+    # to come out the same for the same graph, in every process: list the
+    # nodes and edges in a fixed order rather than in set order, which
+    # depends on the per-process string hashing.
+    nodes = sorted(nodes, key=lambda node: node.nodename)
+    edges = sorted(edges, key=lambda edge: (edge.sourcename(), edge.targetname(), edge.relateddocument.relationship.slug))
+
     return render_to_string('group/dot.txt',
                              dict( nodes=nodes, edges=edges )
                             )
 
 
+
+
+def dependency_graph_dot(group):
+    """Return the dot source of the document dependency graph of group.  It is
+    cached until documents change."""
+    cache_key = "group:dependencies:dot:%s:%s" % (group.pk, document_corpus_generation())
+    dot = cache.get(cache_key)
+    if dot is None:
+        dot = make_dot(group)
+        cache.set(cache_key, dot, 24*60*60)
+    return dot
+
+
+# Rendered graphs are named by the hash of their dot source, so a graph is
+# rendered once for each change of its edges or nodes, and then served from
+# disk.  Both formats are rendered together.
+
+DEPENDENCY_GRAPH_OUTPUT_TYPES = ["pdf", "svg"]
+
+def dependency_graph_path(directory, dot, output_type):
+    digest = hashlib.sha1(dot.encode('utf-8')).hexdigest()
+    return os.path.join(directory, "%s.%s" % (digest, output_type))
+
+def render_dependency_graph(dot, directory):
+    """Render dot to pdf and svg files in directory.  The files are written
+    under temporary names and then renamed, so that they are only seen when
+    complete."""
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=directory, prefix=".tmp-") as tmpdir:
+        dotname = os.path.join(tmpdir, "graph.dot")
+        unflatname = os.path.join(tmpdir, "graph.unflat")
+        with io.open(dotname, "w") as dotfile:
+            dotfile.write(dot)
+
+        code, out, err = pipe("%s -f -l 10 -o %s %s" % (settings.UNFLATTEN_BINARY, unflatname, dotname))
+        if code != 0:
+            raise RuntimeError("unflatten failed: %s" % err)
+        for output_type in DEPENDENCY_GRAPH_OUTPUT_TYPES:
+            outname = os.path.join(tmpdir, "graph.%s" % output_type)
+            code, out, err = pipe("%s -T%s -o %s %s" % (settings.DOT_BINARY, output_type, outname, unflatname))
+            if code != 0:
+                raise RuntimeError("dot -T%s failed: %s" % (output_type, err))
+            os.rename(outname, dependency_graph_path(directory, dot, output_type))
+
+    cutoff = time.time() - settings.GROUP_DEPENDENCY_GRAPH_MAX_AGE
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+_render_pool = None
+_rendering = {}                         # hash of dot -> future of the render in progress
+_rendering_lock = threading.Lock()
+
+def schedule_dependency_graph(dot):
+    """Render dot in the worker pool, unless it is already being rendered,
+    and return the future of the render."""
+    global _render_pool
+    digest = hashlib.sha1(dot.encode('utf-8')).hexdigest()
+    with _rendering_lock:
+        future = _rendering.get(digest)
+        if future is None:
+            if _render_pool is None:
+                # the rendering is done by subprocesses, threads are enough here
+                _render_pool = concurrent.futures.ThreadPoolExecutor(max_workers=settings.GROUP_DEPENDENCY_GRAPH_WORKERS)
+            future = _rendering[digest] = _render_pool.submit(render_dependency_graph, dot, settings.GROUP_DEPENDENCY_GRAPH_DIR)
+            future.add_done_callback(lambda f: _rendering.pop(digest, None))
+    return future
+
+def dependency_graph_file(dot, output_type):
+    """Return the path of the graph rendered from dot, rendering it first if
+    it isn't on disk yet."""
+    path = dependency_graph_path(settings.GROUP_DEPENDENCY_GRAPH_DIR, dot, output_type)
+    if not os.path.exists(path):
+        try:
+            schedule_dependency_graph(dot).result()
+        except Exception as e:
+            log("Rendering dependency graph %s failed: %s" % (path, e))
+            raise
+    return path
+
+def render_dependency_graph_bytes(dot, output_type):
+    """Render dot without saving it, for when there is no
+    settings.GROUP_DEPENDENCY_GRAPH_DIR."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        render_dependency_graph(dot, tmpdir)
+        with io.open(dependency_graph_path(tmpdir, dot, output_type), "rb") as f:
+            return f.read()
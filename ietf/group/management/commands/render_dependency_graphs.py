@@ -0,0 +1,52 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+import concurrent.futures
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import debug                            # pyflakes:ignore
+
+from ietf.group.dot import dependency_graph_dot, dependency_graph_path, schedule_dependency_graph, DEPENDENCY_GRAPH_OUTPUT_TYPES
+from ietf.group.models import Group
+
+
+class Command(BaseCommand):
+    help = ('Render the document dependency graphs of active groups which have changed '
+            'since they were last rendered.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('groups', nargs='*', metavar='ACRONYM',
+                            help='render only the graphs of these groups')
+
+    def handle(self, *args, **options):
+        directory = settings.GROUP_DEPENDENCY_GRAPH_DIR
+        if not directory:
+            raise CommandError('settings.GROUP_DEPENDENCY_GRAPH_DIR is not set')
+        verbosity = options.get('verbosity', 1)
+
+        groups = Group.objects.filter(state="active", type__features__has_documents=True)
+        if options['groups']:
+            groups = groups.filter(acronym__in=options['groups'])
+
+        futures = {}
+        for group in groups.order_by('acronym'):
+            dot = dependency_graph_dot(group)
+            if not all(os.path.exists(dependency_graph_path(directory, dot, t)) for t in DEPENDENCY_GRAPH_OUTPUT_TYPES):
+                futures[schedule_dependency_graph(dot)] = group.acronym
+
+        failed = 0
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+                if verbosity > 1:
+                    self.stdout.write('Rendered %s' % futures[future])
+            except Exception as e:
+                failed += 1
+                self.stderr.write('Rendering %s failed: %s' % (futures[future], e))
+
+        if verbosity > 0:
+            self.stdout.write('Rendered %d dependency graphs, %d failed' % (len(futures) - failed, failed))
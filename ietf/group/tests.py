@@ -3,7 +3,9 @@
 
 import io
 import os
+import re
 import datetime
+import mock
 
 from unittest import skipIf
 from tempfile import NamedTemporaryFile
@@ -18,6 +20,7 @@ import debug                             # pyflakes:ignore
 
 from ietf.doc.factories import DocumentFactory, WgDraftFactory
 from ietf.doc.models import DocEvent, RelatedDocument
+from ietf.group.dot import make_dot
 from ietf.group.models import Role, Group
 from ietf.group.utils import get_group_role_emails, get_child_group_role_emails, get_group_ad_emails
 from ietf.group.factories import GroupFactory, RoleFactory
@@ -74,6 +77,7 @@ class StreamTests(TestCase):
 
 @skipIf(skip_dot_to_pdf, skip_message)
 class GroupDocDependencyGraphTests(TestCase):
+    settings_temp_path_overrides = TestCase.settings_temp_path_overrides + ['GROUP_DEPENDENCY_GRAPH_DIR']
 
     def setUp(self):
         super().setUp()
@@ -107,7 +111,7 @@ class GroupDocDependencyGraphTests(TestCase):
                 r = client.get(url)
                 self.assertTrue(r.status_code == 200, "Failed to receive "
                     "a pdf dependency graph for group: %s"%group.acronym)
-                self.assertGreater(len(r.content), 0, "Pdf dependency graph for group "
+                self.assertGreater(len(b"".join(r.streaming_content)), 0, "Pdf dependency graph for group "
                     "%s has no content"%group.acronym)
 
     def test_group_document_dependency_svgfile(self):
@@ -119,9 +123,39 @@ class GroupDocDependencyGraphTests(TestCase):
                 r = client.get(url)
                 self.assertTrue(r.status_code == 200, "Failed to receive "
                     "a svg dependency graph for group: %s"%group.acronym)
-                self.assertGreater(len(r.content), 0, "svg dependency graph for group "
+                self.assertGreater(len(b"".join(r.streaming_content)), 0, "svg dependency graph for group "
                     "%s has no content"%group.acronym)
-            
+
+    def test_group_document_dependency_graph_rendered_once(self):
+        group = Group.objects.filter(type="wg").first()
+        url = urlreverse("ietf.group.views.dependencies", kwargs=dict(acronym=group.acronym, output_type="svg"))
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        svg = b"".join(r.streaming_content)
+        # both formats are rendered, and kept on disk
+        rendered = sorted(os.listdir(settings.GROUP_DEPENDENCY_GRAPH_DIR))
+        self.assertEqual([os.path.splitext(n)[1] for n in rendered], [".pdf", ".svg"])
+        with mock.patch('ietf.group.dot.pipe') as pipe:
+            r = self.client.get(url)
+            self.assertEqual(b"".join(r.streaming_content), svg)
+            r = self.client.get(urlreverse("ietf.group.views.dependencies", kwargs=dict(acronym=group.acronym, output_type="pdf")))
+            self.assertEqual(r.status_code, 200)
+            self.assertFalse(pipe.called)
+
+    def test_group_document_dependency_dot_order(self):
+        # the rendered files are named by the hash of the dot source, so the
+        # nodes and edges come out in a fixed order, not in set order
+        source = WgDraftFactory(name="draft-ietf-mars-zzz")
+        for name in ["draft-ietf-mars-ccc", "draft-ietf-mars-aaa", "draft-ietf-mars-bbb"]:
+            RelatedDocument.objects.create(source=source, target=WgDraftFactory(name=name).docalias.first(), relationship_id='refinfo')
+        dot = make_dot(source.group)
+        nodes = re.findall(r'^    (\w+) \[ status=', dot, re.MULTILINE)
+        edges = re.findall(r'^    (\w+ -> \w+) ', dot, re.MULTILINE)
+        self.assertEqual(nodes, sorted(nodes))
+        self.assertEqual(len(nodes), 4)
+        self.assertEqual(edges, sorted(edges))
+        self.assertEqual(len(edges), 3)
+
 
 class GenerateGroupAliasesTests(TestCase):
     def setUp(self):
@@ -39,10 +39,8 @@ import datetime
 import itertools
 import io
 import math
-import os
 import re
 
-from tempfile import mkstemp
 from collections import OrderedDict, defaultdict
 from simple_history.utils import update_change_reason
 
@@ -50,7 +48,7 @@ from django import forms
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q, Count
-from django.http import HttpResponse, HttpResponseRedirect, Http404, JsonResponse
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, Http404, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.template.loader import render_to_string
 from django.urls import reverse as urlreverse
@@ -67,7 +65,7 @@ from ietf.doc.utils import get_chartering_type, get_tags_for_stream_id
 from ietf.doc.utils_charter import charter_name_for_group, replace_charter_of_replaced_group
 from ietf.doc.utils_search import prepare_document_table
 #
-from ietf.group.dot import make_dot
+from ietf.group.dot import dependency_graph_dot, dependency_graph_file, render_dependency_graph_bytes
 from ietf.group.forms import (GroupForm, StatusUpdateForm, ConcludeGroupForm, StreamEditForm,
                               ManageReviewRequestForm, EmailOpenAssignmentsForm, ReviewerSettingsForm,
                               AddUnavailablePeriodForm, EndUnavailablePeriodForm, ReviewSecretarySettingsForm, )
@@ -117,7 +115,6 @@ from ietf.dbtemplate.models import DBTemplate
 from ietf.mailtrigger.utils import gather_address_lists
 from ietf.mailtrigger.models import Recipient
 from ietf.settings import MAILING_LIST_INFO_URL
-from ietf.utils.pipe import pipe
 from ietf.utils.response import permission_denied
 from ietf.utils.text import strip_suffix
 from ietf.utils import markdown
@@ -705,44 +702,27 @@ def materials(request, acronym, group_type=None):
                       "can_manage_materials": can_manage_materials(request.user, group)
                   }))
 
-@cache_page(60 * 60)
 def dependencies(request, acronym, group_type=None, output_type="pdf"):
     group = get_group_or_404(acronym, group_type)
     if not group.features.has_documents or output_type not in ["dot", "pdf", "svg"]:
         raise Http404
 
-    dothandle, dotname = mkstemp()
-    os.close(dothandle)
-    dotfile = io.open(dotname, "w")
-    dotfile.write(make_dot(group))
-    dotfile.close()
+    dot = dependency_graph_dot(group)
 
     if (output_type == "dot"):
-        return HttpResponse(make_dot(group),
+        return HttpResponse(dot,
                             content_type='text/plain; charset=UTF-8'
                             )
 
-    unflathandle, unflatname = mkstemp()
-    os.close(unflathandle)
-    outhandle, outname = mkstemp()
-    os.close(outhandle)
-
-    pipe("%s -f -l 10 -o %s %s" % (settings.UNFLATTEN_BINARY, unflatname, dotname))
-    pipe("%s -T%s -o %s %s" % (settings.DOT_BINARY, output_type, outname, unflatname))
-
-    outhandle = io.open(outname, "rb")
-    out = outhandle.read()
-    outhandle.close()
-
-    os.unlink(outname)
-    os.unlink(unflatname)
-    os.unlink(dotname)
-
     if (output_type == "pdf"):
-        output_type = "application/pdf"
+        content_type = "application/pdf"
     elif (output_type == "svg"):
-        output_type = "image/svg+xml"
-    return HttpResponse(out, content_type=output_type)
+        content_type = "image/svg+xml"
+
+    if not settings.GROUP_DEPENDENCY_GRAPH_DIR:
+        return HttpResponse(render_dependency_graph_bytes(dot, output_type), content_type=content_type)
+
+    return FileResponse(open(dependency_graph_file(dot, output_type), "rb"), content_type=content_type)
 
 def email_aliases(request, acronym=None, group_type=None):
     group = get_group_or_404(acronym,group_type) if acronym else None
@@ -9,8 +9,11 @@ import datetime
 import os
 import pytz
 
+from collections import defaultdict
+
 from django.conf import settings
 from django.template.loader import render_to_string
+from django.utils.functional import cached_property
 
 import debug    # pyflakes:ignore
 
@@ -21,25 +24,93 @@ from ietf.doc.templatetags.ietf_filters import clean_whitespace
 from ietf.group.models import Group
 from ietf.person.models import Person, Email
 
-def all_id_txt():
-    # this returns a lot of data so try to be efficient
+class IndexSnapshot(object):
+    """
+    Draft data shared by the index generators.  Each part is loaded from the
+    database when it is first used, so that indexes generated from the same
+    snapshot query the data they have in common only once.
+    """
+
+    def __init__(self):
+        self._active_drafts_by_group = {}
+
+    @cached_property
+    def revision_time(self):
+        return dict(NewRevisionDocEvent.objects.filter(type="new_revision", doc__name__startswith="draft-").order_by('time').values_list("doc__name", "time"))
+
+    @cached_property
+    def revision_event_time(self):
+        return dict(DocEvent.objects.filter(type="new_revision", doc__name__startswith="draft-").order_by('time').values_list("doc__name", "time"))
+
+    @cached_property
+    def rfc_aliases(self):
+        return dict(DocAlias.objects.filter(name__startswith="rfc", docs__states__type="draft",
+                                            docs__states__slug="rfc").values_list("docs__name", "name"))
+
+    @cached_property
+    def replacements(self):
+        return dict(RelatedDocument.objects.filter(target__docs__states__type="draft", target__docs__states__slug="repl",
+                                                   relationship="replaces").values_list("target__name", "source__name"))
+
+    @cached_property
+    def file_types(self):
+        return file_types_for_drafts()
+
+    @cached_property
+    def doc_states(self):
+        """Draft and IESG states of drafts, as lists in state order by (doc id, state type)"""
+        states = dict((s.pk, s) for s in State.objects.filter(type__in=("draft", "draft-iesg")))
+        doc_states = defaultdict(list)
+        for doc_id, state_id in Document.states.through.objects.filter(document__type="draft", state__type__in=("draft", "draft-iesg")).values_list("document_id", "state_id"):
+            state = states[state_id]
+            doc_states[(doc_id, state.type_id)].append(state)
+        for l in doc_states.values():
+            l.sort(key=lambda s: s.order)
+        return doc_states
+
+    def states(self, doc_id, state_type):
+        return self.doc_states.get((doc_id, state_type), [])
+
+    def state(self, doc_id, state_type):
+        # like Document.get_state(), use the last state in state order
+        states = self.states(doc_id, state_type)
+        return states[-1] if states else None
+
+    @cached_property
+    def iesg_substate_tags(self):
+        """Names of the IESG substate tags of drafts, by doc id"""
+        tags = defaultdict(list)
+        for doc_id, tag_name in (Document.tags.through.objects.filter(document__type="draft", doctagname__in=IESG_SUBSTATE_TAGS)
+                                 .order_by("doctagname__order", "doctagname__name").values_list("document_id", "doctagname__name")):
+            tags[doc_id].append(tag_name)
+        return tags
+
+    def active_drafts_by_group(self, with_abstracts=False):
+        """Active drafts by group, see active_drafts_index_by_group().  Drafts
+        loaded with their abstracts also serve when abstracts aren't needed."""
+        if True in self._active_drafts_by_group:
+            return self._active_drafts_by_group[True]
+        if with_abstracts not in self._active_drafts_by_group:
+            self._active_drafts_by_group[with_abstracts] = active_drafts_index_by_group(("abstract",) if with_abstracts else ())
+        return self._active_drafts_by_group[with_abstracts]
+
+def all_id_txt(snapshot=None):
+    # this returns a lot of data so try to be efficient; everything is
+    # fetched with a fixed number of bulk queries and joined up here
+    if snapshot is None:
+        snapshot = IndexSnapshot()
 
     # precalculations
-    revision_time = dict(NewRevisionDocEvent.objects.filter(type="new_revision", doc__name__startswith="draft-").order_by('time').values_list("doc__name", "time"))
+    revision_time = snapshot.revision_time
 
     def formatted_rev_date(name):
         t = revision_time.get(name)
         return t.strftime("%Y-%m-%d") if t else ""
 
-    rfc_aliases = dict(DocAlias.objects.filter(name__startswith="rfc",
-                                               docs__states=State.objects.get(type="draft", slug="rfc")).values_list("docs__name", "name"))
-
-    replacements = dict(RelatedDocument.objects.filter(target__docs__states=State.objects.get(type="draft", slug="repl"),
-                                                       relationship="replaces").values_list("target__name", "source__name"))
-
+    rfc_aliases = snapshot.rfc_aliases
+    replacements = snapshot.replacements
 
-    # we need a distinct to prevent the queries below from multiplying the result
-    all_ids = Document.objects.filter(type="draft").order_by('name').exclude(name__startswith="rfc").distinct()
+    all_ids = list(Document.objects.filter(type="draft").order_by('name').exclude(name__startswith="rfc").values_list("pk", "name", "rev"))
 
     res = ["\nInternet-Drafts Status Summary\n"]
 
@@ -50,18 +121,22 @@ def all_id_txt():
 
     inactive_states = ["idexists", "pub", "watching", "dead"]
 
-    excludes = list(State.objects.filter(type="draft", slug__in=["rfc","repl"]))
-    includes = list(State.objects.filter(type="draft-iesg").exclude(slug__in=inactive_states))
-    in_iesg_process = all_ids.exclude(states__in=excludes).filter(states__in=includes).only("name", "rev")
+    def in_iesg_process(doc_id):
+        return (not any(s.slug in ("rfc", "repl") for s in snapshot.states(doc_id, "draft"))
+                and any(s.slug not in inactive_states for s in snapshot.states(doc_id, "draft-iesg")))
 
     # handle those actively in the IESG process
-    for d in in_iesg_process:
-        state = d.get_state("draft-iesg").name
-        tags = d.tags.filter(slug__in=IESG_SUBSTATE_TAGS).values_list("name", flat=True)
+    not_in_process = []
+    for doc_id, name, rev in all_ids:
+        if not in_iesg_process(doc_id):
+            not_in_process.append((doc_id, name, rev))
+            continue
+        state = snapshot.state(doc_id, "draft-iesg").name
+        tags = snapshot.iesg_substate_tags.get(doc_id)
         if tags:
             state += "::" + "::".join(tags)
-        add_line(d.name + "-" + d.rev,
-                 formatted_rev_date(d.name),
+        add_line(name + "-" + rev,
+                 formatted_rev_date(name),
                  "In IESG processing - ID Tracker state <" + state + ">",
                  "",
                  )
@@ -69,10 +144,13 @@ def all_id_txt():
 
     # handle the rest
 
-    not_in_process = all_ids.exclude(pk__in=[d.pk for d in in_iesg_process])
+    not_in_process_by_state = defaultdict(list)
+    for doc_id, name, rev in not_in_process:
+        for s in snapshot.states(doc_id, "draft"):
+            not_in_process_by_state[s].append((name, rev))
 
-    for s in State.objects.filter(type="draft").order_by("order"):
-        for name, rev in not_in_process.filter(states=s).values_list("name", "rev"):
+    for s in sorted(not_in_process_by_state, key=lambda s: s.order):
+        for name, rev in not_in_process_by_state[s]:
             state = s.name
             last_field = ""
 
@@ -105,25 +183,21 @@ def file_types_for_drafts():
 
     return file_types
 
-def all_id2_txt():
+def all_id2_txt(snapshot=None):
     # this returns a lot of data so try to be efficient
+    if snapshot is None:
+        snapshot = IndexSnapshot()
 
     drafts = Document.objects.filter(type="draft").exclude(name__startswith="rfc").order_by('name')
     drafts = drafts.select_related('group', 'group__parent', 'ad', 'intended_std_level', 'shepherd', )
-    drafts = drafts.prefetch_related("states")
-
-    rfc_aliases = dict(DocAlias.objects.filter(name__startswith="rfc",
-                                               docs__states=State.objects.get(type="draft", slug="rfc")).values_list("docs__name", "name"))
-
-    replacements = dict(RelatedDocument.objects.filter(target__docs__states=State.objects.get(type="draft", slug="repl"),
-                                                       relationship="replaces").values_list("target__name", "source__name"))
-
-    revision_time = dict(DocEvent.objects.filter(type="new_revision", doc__name__startswith="draft-").order_by('time').values_list("doc__name", "time"))
 
-    file_types = file_types_for_drafts()
+    rfc_aliases = snapshot.rfc_aliases
+    replacements = snapshot.replacements
+    revision_time = snapshot.revision_event_time
+    file_types = snapshot.file_types
 
     authors = {}
-    for a in DocumentAuthor.objects.filter(document__name__startswith="draft-").order_by("order").select_related("email", "person").iterator():
+    for a in DocumentAuthor.objects.filter(document__name__startswith="draft-").order_by("order").select_related("document", "email", "person").iterator():
         if a.document.name not in authors:
             l = authors[a.document.name] = []
         else:
@@ -140,8 +214,9 @@ def all_id2_txt():
 
     res = []
     for d in drafts:
-        state = d.get_state_slug()
-        iesg_state = d.get_state("draft-iesg")
+        draft_state = snapshot.state(d.pk, "draft")
+        state = draft_state.slug if draft_state else None
+        iesg_state = snapshot.state(d.pk, "draft-iesg")
 
         fields = []
         # 0
@@ -149,13 +224,13 @@ def all_id2_txt():
         # 1
         fields.append("-1") # used to be internal numeric identifier, we don't have that anymore
         # 2
-        fields.append(d.get_state().name if state else "")
+        fields.append(draft_state.name if state else "")
         # 3
         if state == "active":
             s = "I-D Exists"
             if iesg_state:
                 s = iesg_state.name
-                tags = d.tags.filter(slug__in=IESG_SUBSTATE_TAGS).values_list("name", flat=True)
+                tags = snapshot.iesg_substate_tags.get(d.pk)
                 if tags:
                     s += "::" + "::".join(tags)
             fields.append(s)
@@ -276,13 +351,12 @@ def active_drafts_index_by_group(extra_values=()):
 
     return groups
     
-def id_index_txt(with_abstracts=False):
-    extra_values = ()
-    if with_abstracts:
-        extra_values = ("abstract",)
-    groups = active_drafts_index_by_group(extra_values)
+def id_index_txt(with_abstracts=False, snapshot=None):
+    if snapshot is None:
+        snapshot = IndexSnapshot()
+    groups = snapshot.active_drafts_by_group(with_abstracts)
 
-    file_types = file_types_for_drafts()
+    file_types = snapshot.file_types
     for g in groups:
         for d in g.active_drafts:
             # we need to output a multiple extension thing
@@ -0,0 +1,62 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+import debug                            # pyflakes:ignore
+
+from ietf.idindex.index import IndexSnapshot, all_id_txt, all_id2_txt, id_index_txt
+
+
+class Command(BaseCommand):
+    help = ('Generate the all_id.txt, 1id-abstracts.txt, 1id-index.txt and all_id2.txt draft '
+            'index files from a single snapshot of the draft data, and write each of them '
+            'atomically to the given paths.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all-id', action='append', default=[], metavar='PATH',
+                            help='write all_id.txt to PATH (may be given more than once)')
+        parser.add_argument('--id-abstracts', action='append', default=[], metavar='PATH',
+                            help='write 1id-abstracts.txt to PATH (may be given more than once)')
+        parser.add_argument('--id-index', action='append', default=[], metavar='PATH',
+                            help='write 1id-index.txt to PATH (may be given more than once)')
+        parser.add_argument('--all-id2', action='append', default=[], metavar='PATH',
+                            help='write all_id2.txt to PATH (may be given more than once)')
+
+    def handle(self, *args, **options):
+        self.verbosity = options.get("verbosity", 1)
+        # the abstracts index is generated before the plain one, which can then
+        # reuse the active drafts loaded for it
+        outputs = (
+            (options['all_id'], all_id_txt),
+            (options['id_abstracts'], lambda snapshot: id_index_txt(with_abstracts=True, snapshot=snapshot)),
+            (options['id_index'], lambda snapshot: id_index_txt(snapshot=snapshot)),
+            (options['all_id2'], all_id2_txt),
+        )
+        if not any(paths for paths, generate in outputs):
+            raise CommandError('No output paths given')
+
+        snapshot = IndexSnapshot()
+        for paths, generate in outputs:
+            if paths:
+                content = generate(snapshot).encode('utf-8')
+                for path in paths:
+                    self.write_atomically(path, content)
+
+    def write_atomically(self, path, content):
+        """Write content to a temporary file next to path, and move it into place"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.%s.' % os.path.basename(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        if self.verbosity > 1:
+            self.stdout.write('Wrote %s' % path)
@@ -3,10 +3,17 @@
 
 
 import datetime
+import io
+import os
+import re
+import tempfile
 
 from pathlib import Path
 
 from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import debug    # pyflakes:ignore
 
@@ -14,7 +21,7 @@ from ietf.doc.factories import WgDraftFactory
 from ietf.doc.models import Document, DocAlias, RelatedDocument, State, LastCallDocEvent, NewRevisionDocEvent
 from ietf.group.factories import GroupFactory
 from ietf.name.models import DocRelationshipName
-from ietf.idindex.index import all_id_txt, all_id2_txt, id_index_txt
+from ietf.idindex.index import IndexSnapshot, all_id_txt, all_id2_txt, id_index_txt
 from ietf.person.factories import PersonFactory, EmailFactory
 from ietf.utils.test_utils import TestCase
 
@@ -58,6 +65,24 @@ class IndexTests(TestCase):
         self.assertTrue(draft.name + "-" + draft.rev in txt)
         self.assertTrue("Replaced replaced by draft-test-replacement" in txt)
 
+    def test_all_id_txt_query_count(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                all_id_txt()
+            return len(queries)
+
+        WgDraftFactory(states=[('draft','active'),('draft-iesg','lc')])
+        WgDraftFactory(states=[('draft','active'),('draft-iesg','idexists')])
+        num_queries = count_queries()
+
+        for i in range(5):
+            draft = WgDraftFactory(states=[('draft','active'),('draft-iesg','iesg-eva')])
+            draft.tags.add('need-rev')
+            WgDraftFactory(states=[('draft','expired'),('draft-iesg','idexists')])
+            WgDraftFactory(states=[('draft','repl')])
+        self.assertEqual(count_queries(), num_queries)
+        self.assertIn("IESG Evaluation::Revised I-D Needed>", all_id_txt())
+
     def test_all_id2_txt(self):
         draft = WgDraftFactory(
                     states=[('draft','active'),('draft-iesg','review-e')],
@@ -139,3 +164,29 @@ class IndexTests(TestCase):
         txt = id_index_txt(with_abstracts=True)
 
         self.assertTrue(draft.abstract[:20] in txt)
+
+    def test_generate_id_indexes(self):
+        draft = WgDraftFactory(states=[('draft','active'),('draft-iesg','lc')],abstract='a'*20,authors=[PersonFactory()])
+
+        with tempfile.TemporaryDirectory() as dir:
+            paths = dict((name, [os.path.join(dir, '%s-%s.txt' % (name, i)) for i in range(2)])
+                         for name in ('all_id', 'id_abstracts', 'id_index', 'all_id2'))
+            call_command('generate_id_indexes', **paths)
+
+            self.assertCountEqual(os.listdir(dir), [os.path.basename(p) for l in paths.values() for p in l])
+            for name, generate in (
+                    ('all_id', all_id_txt),
+                    ('id_abstracts', lambda snapshot: id_index_txt(with_abstracts=True, snapshot=snapshot)),
+                    ('id_index', lambda snapshot: id_index_txt(snapshot=snapshot)),
+                    ('all_id2', all_id2_txt)):
+                for path in paths[name]:
+                    with io.open(path) as f:
+                        content = f.read()
+                    self.assertIn(draft.name + "-" + draft.rev, content)
+                    # the index time stamps may differ
+                    self.assertEqual(re.sub(r'generated:? .*', '', content, flags=re.IGNORECASE),
+                                     re.sub(r'generated:? .*', '', generate(IndexSnapshot()), flags=re.IGNORECASE))
+            with io.open(paths['id_abstracts'][0]) as f:
+                self.assertIn(draft.abstract, f.read())
+            with io.open(paths['id_index'][0]) as f:
+                self.assertNotIn(draft.abstract, f.read())
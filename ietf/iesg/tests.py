@@ -467,7 +467,7 @@ class IESGAgendaTests(TestCase):
         r = self.client.get(url)
         self.assertEqual(r.status_code, 200)
 
-        tar = tarfile.open(None, fileobj=io.BytesIO(r.content))
+        tar = tarfile.open(None, fileobj=io.BytesIO(b"".join(r.streaming_content)))
         names = tar.getnames()
         self.assertIn(d1_filename, names)
         self.assertNotIn(d2_filename, names)
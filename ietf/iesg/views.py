@@ -35,12 +35,9 @@
 
 
 import datetime
-import io
 import itertools
 import json
 import os
-import tarfile
-import time
 
 from django import forms
 from django.conf import settings
@@ -48,7 +45,6 @@ from django.db import models
 from django.http import HttpResponse
 from django.shortcuts import render, redirect
 from django.contrib.sites.models import Site
-from django.utils.encoding import force_bytes
 #from django.views.decorators.cache import cache_page
 #from django.views.decorators.vary import vary_on_cookie
 
@@ -63,6 +59,7 @@ from ietf.iesg.utils import telechat_page_count
 from ietf.ietfauth.utils import has_role, role_required, user_is_person
 from ietf.person.models import Person
 from ietf.doc.utils_search import fill_in_document_table_attributes, fill_in_telechat_date
+from ietf.utils.archive import tarfile_response
 
 def review_decisions(request, year=None):
     events = DocEvent.objects.filter(type__in=("iesg_disapproved", "iesg_approved"))
@@ -437,33 +434,9 @@ def telechat_docs_tarfile(request, date):
         if d.telechat_date() == date:
             docs.append(d)
 
-    response = HttpResponse(content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename=telechat-%s-docs.tgz' % date.isoformat()
+    files = [ (doc.name + "-" + doc.rev + ".txt", os.path.join(doc.get_file_path(), doc.name + "-" + doc.rev + ".txt")) for doc in docs ]
 
-    tarstream = tarfile.open('', 'w:gz', response)
-
-    manifest = io.BytesIO()
-
-    for doc in docs:
-        doc_path = force_bytes(os.path.join(doc.get_file_path(), doc.name + "-" + doc.rev + ".txt"))
-        if os.path.exists(doc_path):
-            try:
-                tarstream.add(doc_path, str(doc.name + "-" + doc.rev + ".txt"))
-                manifest.write(b"Included:  %s\n" % doc_path)
-            except Exception as e:
-                manifest.write(b"Failed (%s): %s\n" % (force_bytes(e), doc_path))
-        else:
-            manifest.write(b"Not found: %s\n" % doc_path)
-
-    manifest.seek(0)
-    t = tarfile.TarInfo(name="manifest.txt")
-    t.size = len(manifest.getvalue())
-    t.mtime = time.time()
-    tarstream.addfile(t, manifest)
-
-    tarstream.close()
-
-    return response
+    return tarfile_response('telechat-%s-docs.tgz' % date.isoformat(), 'telechat', [ (doc.name, doc.rev) for doc in docs ], files)
 
 def discusses(request):
     possible_docs = Document.objects.filter(models.Q(states__type="draft-iesg",
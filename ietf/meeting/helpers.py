@@ -2,23 +2,26 @@
 # -*- coding: utf-8 -*-
 
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 import datetime
 import io
 import os
 import re
 from tempfile import mkstemp
 
+from django.core.cache import cache, caches
 from django.http import Http404
-from django.db.models import F, Prefetch
+from django.db.models import F, Max, Prefetch
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.urls import reverse
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
+from django.views.decorators.http import condition
 
 import debug                            # pyflakes:ignore
 
+import ietf
 from ietf.doc.models import Document
 from ietf.group.models import Group
 from ietf.group.utils import can_manage_some_groups, can_manage_group
@@ -93,6 +96,9 @@ def preprocess_assignments_for_agenda(assignments_queryset, meeting, extra_prefe
       a.session.historic_parent
       a.session.rescheduled_to (if rescheduled)
       a.session.prefetched_active_materials
+      a.session.order_number
+
+    and returns the assignments as a list.
     """
     assignments_queryset = assignments_queryset.prefetch_related(
             'timeslot', 'timeslot__type', 'timeslot__meeting',
@@ -111,28 +117,30 @@ def preprocess_assignments_for_agenda(assignments_queryset, meeting, extra_prefe
         )
 
 
-    # removed list(); it was consuming a very large amount of processor time
-    # assignments = list(assignments_queryset) # make sure we're set in stone
-    assignments = assignments_queryset
+    # Work on one materialized list, and use dict lookups rather than list
+    # scans, so that the processing stays linear in the number of assignments
+    assignments = list(assignments_queryset)
 
     meeting_time = datetime.datetime.combine(meeting.date, datetime.time())
 
     # replace groups with historic counterparts
-    groups = [ ]
+    groups = {}
+    sessions_for_groups = defaultdict(list)
     for a in assignments:
         if a.session:
             a.session.historic_group = None
             a.session.order_number = None
 
-            if a.session.group and a.session.group not in groups:
-                groups.append(a.session.group)
+            if a.session.group:
+                groups.setdefault(a.session.group_id, a.session.group)
+                sessions_for_groups[(a.session.group_id, a.session.type_id)].append(a)
 
-    sessions_for_groups = defaultdict(list)
-    for a in assignments:
-        if a.session and a.session.group:
-            sessions_for_groups[(a.session.group, a.session.type_id)].append(a)
+    order_numbers = {}
+    for l in sessions_for_groups.values():
+        for i, a in enumerate(l):
+            order_numbers.setdefault(a.pk, i + 1)
 
-    group_replacements = find_history_replacements_active_at(groups, meeting_time)
+    group_replacements = find_history_replacements_active_at(list(groups.values()), meeting_time)
 
     parent_id_set = set()
     for a in assignments:
@@ -145,10 +153,9 @@ def preprocess_assignments_for_agenda(assignments_queryset, meeting, extra_prefe
                 if a.session.historic_group.parent_id:
                     parent_id_set.add(a.session.historic_group.parent_id)
 
-            l = sessions_for_groups.get((a.session.group, a.session.type_id), [])
-            a.session.order_number = l.index(a) + 1 if a in l else 0
+            a.session.order_number = order_numbers.get(a.pk, 0)
 
-    parents = Group.objects.filter(pk__in=parent_id_set)
+    parents = list(Group.objects.filter(pk__in=parent_id_set))
     parent_replacements = find_history_replacements_active_at(parents, meeting_time)
 
     timeslot_by_session_pk = {a.session_id: a.timeslot for a in assignments}
@@ -629,6 +636,115 @@ class AgendaKeywordTagger(AgendaKeywordTool):
         return kw if token is None else '{}-{}'.format(kw, token)
 
 
+def get_assignments_for_agenda(schedule):
+    """Get queryset containing assignments to show on the agenda"""
+    return SchedTimeSessAssignment.objects.filter(
+        schedule__in=[schedule, schedule.base],
+        session__on_agenda=True,
+    )
+
+def agenda_condition(find_meeting):
+    """Decorator adding conditional GET support to an agenda view
+
+    find_meeting is called with the arguments of the view, and returns the
+    meeting shown by the view, or None.  The ETag and Last-Modified headers
+    are derived from Meeting.modified, so that polling clients get a 304
+    response without any of the work of rendering the agenda.
+    """
+    def get_agenda_meeting(request, *args, **kwargs):
+        if not hasattr(request, 'agenda_meeting'):
+            request.agenda_meeting = find_meeting(*args, **kwargs)
+        return request.agenda_meeting
+
+    def etag(request, *args, **kwargs):
+        meeting = get_agenda_meeting(request, *args, **kwargs)
+        if meeting is None:
+            return None
+        # include the user, as pages differ between users, e.g., in the menus
+        return '%s-%s-%f-%s' % (ietf.__version__, meeting.pk, meeting.modified.timestamp(), request.user.pk or '')
+
+    def last_modified(request, *args, **kwargs):
+        meeting = get_agenda_meeting(request, *args, **kwargs)
+        return meeting.updated() if meeting else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+def ical_session_status(assignment):
+    if assignment.session.current_status == 'canceled':
+        return "CANCELLED"
+    elif assignment.session.current_status == 'resched':
+        t = "RESCHEDULED"
+        if assignment.session.tombstone_for_id is not None:
+            other_assignment = SchedTimeSessAssignment.objects.filter(schedule=assignment.schedule_id, session=assignment.session.tombstone_for_id).first()
+            if other_assignment:
+                t = "RESCHEDULED TO {}-{}".format(
+                    other_assignment.timeslot.time.strftime("%A %H:%M").upper(),
+                    other_assignment.timeslot.end_time().strftime("%H:%M")
+                )
+        return t
+    else:
+        return "CONFIRMED"
+
+AgendaICalEvent = namedtuple('AgendaICalEvent', ['session_id', 'acronym', 'filter_keywords', 'vevent'])
+
+def agenda_ical_events(meeting, schedule):
+    """Return the iCalendar events of the agenda of a schedule
+
+    Each event carries the rendered VEVENT block of an assignment, and what
+    is needed to filter the events of an agenda feed without going back to
+    the assignments.  The events are cached per agenda snapshot version.
+    """
+    cache_key = 'meeting:agenda:ical:%s:%s:%s' % (meeting.pk, schedule.pk, agenda_snapshot_version(meeting, schedule))
+    events = cache.get(cache_key)
+    if events is None:
+        events = []
+        for a in agenda_snapshot(meeting, schedule):
+            if a.session.historic_group:
+                a.session.ical_status = ical_session_status(a)
+                events.append(AgendaICalEvent(
+                    session_id=a.session_id,
+                    acronym=a.session.historic_group.acronym,
+                    filter_keywords=a.filter_keywords,
+                    vevent=render_to_string('meeting/agenda_vevent.ics', {'schedule': schedule, 'item': a}),
+                ))
+        cache.set(cache_key, events, settings.MEETING_AGENDA_SNAPSHOT_CACHE_TIME)
+    return events
+
+def agenda_snapshot_version(meeting, schedule):
+    """Return a version string which changes whenever the agenda of the schedule
+    may have changed: when timeslots, sessions or assignments are modified, and
+    when session materials are added, removed or revised.  All of these update
+    Meeting.modified, and revisions of materials also update their Document.time."""
+    materials_time = Document.objects.filter(session__meeting=meeting).aggregate(Max('time'))['time__max']
+    return '%s:%f:%f' % (ietf.__version__, meeting.modified.timestamp(),
+                         materials_time.timestamp() if materials_time else 0)
+
+def agenda_snapshot(meeting, schedule):
+    """Return the preprocessed and keyword tagged agenda assignments of a schedule
+
+    The agenda views all need the assignments prepared by
+    preprocess_assignments_for_agenda() and AgendaKeywordTagger, which is
+    expensive.  The prepared assignments are cached, keyed on the meeting,
+    schedule and agenda_snapshot_version(), so they are rebuilt only when
+    the agenda has changed.  The pickled assignments of a full meeting run
+    to megabytes, more than memcached will store, so they are kept in the
+    file based 'agenda' cache.
+    """
+    agenda_cache = caches['agenda']
+    cache_key = 'meeting:agenda:%s:%s:%s' % (meeting.pk, schedule.pk, agenda_snapshot_version(meeting, schedule))
+    try:
+        assignments = agenda_cache.get(cache_key)
+    except EOFError:
+        assignments = None
+    if assignments is None:
+        assignments = preprocess_assignments_for_agenda(get_assignments_for_agenda(schedule), meeting)
+        tagger = AgendaKeywordTagger(assignments=assignments)
+        tagger.apply()  # annotate assignments with filter_keywords attribute
+        tagger.apply_session_keywords()  # annotate assignments with session_keyword attribute
+        agenda_cache.set(cache_key, assignments, settings.MEETING_AGENDA_SNAPSHOT_CACHE_TIME)
+    return assignments
+
+
 def read_session_file(type, num, doc):
     # XXXX FIXME: the path fragment in the code below should be moved to
     # settings.py.  The *_PATH settings should be generalized to format()
@@ -0,0 +1,67 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+"""Benchmark preprocess_assignments_for_agenda
+
+Schedules the sessions of the dummy meeting from create_dummy_meeting, and
+reports the runtime and number of queries of preparing its agenda with
+preprocess_assignments_for_agenda.  The assignments made for the benchmark
+are rolled back afterwards.
+"""
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+import debug                            # pyflakes:ignore
+
+from ietf.meeting.helpers import get_assignments_for_agenda, preprocess_assignments_for_agenda
+from ietf.meeting.models import Meeting, SchedTimeSessAssignment
+
+
+class Command(BaseCommand):
+    help = 'Benchmark agenda preprocessing on the dummy meeting IETF 999'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-r', '--repeat', type=int, default=5,
+                            help='number of timed runs; the fastest is reported (default 5)')
+        parser.add_argument('--keep', action='store_true', default=False,
+                            help='keep the dummy meeting if it was created by this command')
+
+    def handle(self, repeat, keep, *args, **options):
+        created = not Meeting.objects.filter(number='999').exists()
+        if created:
+            call_command('create_dummy_meeting', stdout=self.stdout, stderr=self.stderr)
+        try:
+            with transaction.atomic():
+                self.benchmark(repeat)
+                transaction.set_rollback(True)
+        finally:
+            if created and not keep:
+                call_command('create_dummy_meeting', delete=True, stdout=self.stdout, stderr=self.stderr)
+
+    def benchmark(self, repeat):
+        meeting = Meeting.objects.get(number='999')
+        schedule = meeting.schedule
+        if not schedule.assignments.exists():
+            sessions = meeting.session_set.filter(type='regular').order_by('pk')
+            timeslots = meeting.timeslot_set.filter(type='regular').order_by('time', 'location__name')
+            SchedTimeSessAssignment.objects.bulk_create(
+                SchedTimeSessAssignment(schedule=schedule, session=session, timeslot=timeslot)
+                for session, timeslot in zip(sessions, timeslots)
+            )
+        count = get_assignments_for_agenda(schedule).count()
+        if not count:
+            raise CommandError('No sessions to put on the agenda of the dummy meeting')
+        self.stdout.write('Preprocessing {} assignments'.format(count))
+
+        timings = []
+        for __ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                beg_time = time.time()
+                preprocess_assignments_for_agenda(get_assignments_for_agenda(schedule), meeting)
+                timings.append(time.time() - beg_time)
+
+        self.stdout.write('Runtime: {:.3f}s (fastest of {} runs)'.format(min(timings), repeat))
+        self.stdout.write('Queries: {}'.format(len(queries)))
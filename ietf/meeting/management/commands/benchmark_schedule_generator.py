@@ -0,0 +1,72 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+"""Benchmark cost evaluation of the automatic schedule generator
+
+Runs the schedule generator on the dummy meeting from create_dummy_meeting, and
+reports how many switch evaluations per second are made by the reference cost
+calculation and by the incremental, precomputed cost calculation the optimiser uses.
+"""
+import random
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+import debug                            # pyflakes:ignore
+
+from ietf.meeting.models import Meeting
+from ietf.meeting.management.commands.generate_schedule import ScheduleHandler
+
+
+class Command(BaseCommand):
+    help = 'Benchmark schedule generator cost evaluation on the dummy meeting IETF 999'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-e', '--evaluations', type=int, default=2000,
+                            help='number of switch evaluations to time (default 2000)')
+        parser.add_argument('--keep', action='store_true', default=False,
+                            help='keep the dummy meeting if it was created by this command')
+
+    def handle(self, evaluations, keep, *args, **options):
+        created = not Meeting.objects.filter(number='999').exists()
+        if created:
+            call_command('create_dummy_meeting', stdout=self.stdout, stderr=self.stderr)
+        try:
+            self.benchmark(evaluations)
+        finally:
+            if created and not keep:
+                call_command('create_dummy_meeting', delete=True, stdout=self.stdout, stderr=self.stderr)
+
+    def benchmark(self, evaluations):
+        beg_time = time.time()
+        handler = ScheduleHandler(self.stdout, '999', verbosity=0)
+        schedule = handler.schedule
+        self.stdout.write('Loaded {} in {:.2f}s'.format(schedule, time.time() - beg_time))
+
+        beg_time = time.time()
+        schedule.fill_initial_schedule()
+        self.stdout.write('Initial schedule filled in {:.2f}s'.format(time.time() - beg_time))
+
+        scheduled = list(schedule.schedule)
+        free_timeslots = list(schedule.free_timeslots)
+        if not scheduled:
+            raise CommandError('No sessions to schedule in the dummy meeting')
+        switches = [(random.choice(scheduled), random.choice(free_timeslots)) for __ in range(evaluations)]
+
+        beg_time = time.time()
+        full_costs = [schedule._cost_for_switch(t1, t2) for t1, t2 in switches]
+        full_time = time.time() - beg_time
+
+        beg_time = time.time()
+        schedule._reset_delta_cost()
+        delta_costs = [schedule._delta_cost_for_switch(t1, t2)[0] for t1, t2 in switches]
+        delta_time = time.time() - beg_time
+
+        mismatches = sum(1 for full, delta in zip(full_costs, delta_costs) if full != delta)
+        if mismatches:
+            raise CommandError('{} of {} incremental cost evaluations did not match the full calculation'
+                               .format(mismatches, evaluations))
+
+        self.stdout.write('Full cost calculation:        {:10.1f} evaluations/s'.format(evaluations / full_time))
+        self.stdout.write('Incremental cost calculation: {:10.1f} evaluations/s'.format(evaluations / delta_time))
+        self.stdout.write('Speedup: {:.1f}x'.format(full_time / delta_time))
@@ -6,6 +6,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 import calendar
 import datetime
 import math
+import multiprocessing
 import random
 import string
 import sys
@@ -71,18 +72,37 @@ class Command(BaseCommand):
                                 'Base schedule for generated schedule, specified as "[owner/]name"'
                                 ' (default is no base schedule; owner not required if name is unique)'
                             ))
+        parser.add_argument('--verify-delta-cost', action='store_true', default=False,
+                            help=(
+                                'check every incremental cost evaluation made by the optimiser against'
+                                ' a full schedule cost calculation (slow, for debugging)'
+                            ))
+        parser.add_argument('-w', '--workers', type=int, default=1,
+                            help=(
+                                'number of worker processes running independent randomized schedule'
+                                ' generations; all stop as soon as one finds a zero-cost schedule'
+                            ))
+        parser.add_argument('-s', '--starts', type=int, default=None,
+                            help='number of randomized schedule generations to run with --workers (default: one per worker)')
 
-    def handle(self, meeting, name, max_cycles, verbosity, base_id, *args, **kwargs):
-        ScheduleHandler(self.stdout, meeting, name, max_cycles, verbosity, base_id).run()
+    def handle(self, meeting, name, max_cycles, verbosity, base_id, verify_delta_cost, workers, starts,
+               *args, **kwargs):
+        ScheduleHandler(self.stdout, meeting, name, max_cycles, verbosity, base_id, verify_delta_cost,
+                        workers, starts).run()
 
 
 class ScheduleHandler(object):
     def __init__(self, stdout, meeting_number, name=None, max_cycles=OPTIMISER_MAX_CYCLES,
-                 verbosity=1, base_id=None):
+                 verbosity=1, base_id=None, verify_delta_cost=False, workers=1, starts=None):
         self.stdout = stdout
         self.verbosity = verbosity
         self.name = name
         self.max_cycles = max_cycles
+        self.verify_delta_cost = verify_delta_cost
+        if workers < 1:
+            raise CommandError('Number of workers must be at least 1')
+        self.workers = workers
+        self.starts = starts or workers
         if meeting_number:
             try:
                 self.meeting = models.Meeting.objects.get(type="ietf", number=meeting_number)
@@ -116,17 +136,21 @@ class ScheduleHandler(object):
 
     def run(self):
         """Schedule all sessions"""
-        beg_time = time.time()
-        self.schedule.fill_initial_schedule()
-        violations, cost = self.schedule.total_schedule_cost()
-        end_time = time.time()
-        tot_time = end_time - beg_time
-        if self.verbosity >= 1:
-            self.stdout.write('Initial schedule completed with %s violations, total cost %s, in %dm %.2fs'
-                               % (len(violations), intcomma(cost), tot_time//60, tot_time%60))
+        if self.workers > 1:
+            beg_time = time.time()
+            runs = self._optimise_in_workers()
+        else:
+            beg_time = time.time()
+            self.schedule.fill_initial_schedule()
+            violations, cost = self.schedule.total_schedule_cost()
+            end_time = time.time()
+            tot_time = end_time - beg_time
+            if self.verbosity >= 1:
+                self.stdout.write('Initial schedule completed with %s violations, total cost %s, in %dm %.2fs'
+                                   % (len(violations), intcomma(cost), tot_time//60, tot_time%60))
 
-        beg_time = time.time()
-        runs = self.schedule.optimise_schedule()
+            beg_time = time.time()
+            runs = self.schedule.optimise_schedule()
         violations, cost = self.schedule.total_schedule_cost()
         end_time = time.time()
         tot_time = end_time - beg_time
@@ -144,6 +168,51 @@ class ScheduleHandler(object):
         self._save_schedule(cost)
         return violations, cost
     
+    def _optimise_in_workers(self):
+        """Generate schedules from several randomized starts in a pool of worker processes
+
+        Each start runs fill_initial_schedule() and optimise_schedule() on a copy of
+        the schedule in a forked worker. The workers share the best dynamic cost found
+        so far, and stop as soon as any of them reaches a cost of 0. The schedule with
+        the lowest cost is placed in self.schedule, nothing is saved by the workers.
+
+        Returns the number of optimiser runs made for the winning schedule.
+        """
+        if self.verbosity >= 1:
+            self.stdout.write('Running {} randomized schedule generations in {} worker processes'
+                              .format(self.starts, self.workers))
+        context = multiprocessing.get_context('fork')
+        shared_best_cost = context.Value('d', math.inf)
+        # The workers only use the in-memory schedule and never touch the database
+        # connection inherited from this process.
+
+        best = None
+        with context.Pool(
+                self.workers,
+                initializer=_init_schedule_worker,
+                initargs=(self.schedule, shared_best_cost),
+        ) as pool:
+            for result in pool.imap_unordered(_run_schedule_worker, range(self.starts)):
+                start, cost, runs, assignments = result
+                if best is None or cost < best[1]:
+                    best = result
+                if self.verbosity >= 1:
+                    self.stdout.write('Start {}: dynamic cost {} after {} runs, best so far {}'
+                                      .format(start, intcomma(cost), runs, intcomma(best[1])))
+                if cost == 0:
+                    break  # leaving the with block terminates the other workers
+
+        start, cost, runs, assignments = best
+        timeslot_lut = {t.timeslot_pk: t for t in self.schedule.timeslots}
+        session_lut = {s.session_pk: s for s in self.schedule.sessions}
+        self.schedule.schedule = {
+            timeslot_lut[timeslot_pk]: session_lut[session_pk]
+            for timeslot_pk, session_pk in assignments
+        }
+        if self.verbosity >= 1:
+            self.stdout.write('Using schedule from start {}'.format(start))
+        return runs
+
     def _save_schedule(self, cost):
         if not self.name:
             count = models.Schedule.objects.filter(name__startswith='auto-%s-'%self.meeting.number).count()
@@ -243,8 +312,10 @@ class ScheduleHandler(object):
             self.max_cycles,
             self.verbosity,
             self.base_schedule,
+            self.verify_delta_cost,
         )
         self.schedule.adjust_for_timeslot_availability()  # calculates some fixed costs
+        self.schedule.precompute_costs()
 
 
 class Schedule(object):
@@ -252,9 +323,14 @@ class Schedule(object):
     The Schedule object represents the schedule, and contains code to generate/optimise it.
     The schedule is internally represented as a dict, timeslots being keys, sessions being values.
     Note that "timeslot" means the combination of a timeframe and a location.
+
+    While optimising, the cost of each scheduled session is cached, so that the cost of
+    a proposed switch can be found by recalculating only the sessions affected by it.
+    calculate_dynamic_cost() remains the reference implementation; with verify_delta_cost
+    set, every incremental result is checked against it.
     """
     def __init__(self, stdout, timeslots, sessions, business_constraint_costs,
-                 max_cycles, verbosity, base_schedule=None):
+                 max_cycles, verbosity, base_schedule=None, verify_delta_cost=False):
         self.stdout = stdout
         self.timeslots = timeslots
         self.sessions = sessions or []
@@ -267,6 +343,29 @@ class Schedule(object):
         self._fixed_violations = dict()  # key = type of cost
         self.max_cycles = max_cycles
         self.base_schedule = self._load_base_schedule(base_schedule) if base_schedule else None
+        self.verify_delta_cost = verify_delta_cost
+
+        # Reverse lookups of the timeslot relations, for finding the sessions affected by a switch.
+        # The overlaps relation is not symmetric for timeslots that share a start or end time.
+        self._overlapped_by = defaultdict(set)
+        self._adjacent_to = defaultdict(set)
+        for timeslot in self.timeslots:
+            for other in timeslot.overlaps:
+                self._overlapped_by[other].add(timeslot)
+            for other in timeslot.adjacent:
+                self._adjacent_to[other].add(timeslot)
+        self._delta_schedule = None  # merged schedule the cached costs were calculated for
+        self._delta_positions = None
+        self._delta_group_slots = None
+        self._delta_overlapping = None
+        self._delta_costs = None
+        self._delta_finite_total = 0
+        self._delta_infinite_count = 0
+        self._pair_costs = None  # set by precompute_costs()
+        self._timeslot_costs = None
+        # When optimising in a worker process, a multiprocessing.Value shared with the
+        # other workers, holding the best dynamic cost found by any of them.
+        self.shared_best_cost = None
 
     def __str__(self):
         return 'Schedule ({} timeslots, {} sessions, {} scheduled, {} in base schedule)'.format(
@@ -450,18 +549,24 @@ class Schedule(object):
             self.stdout.write('== Initial scheduler starting, scheduling {} sessions in {} timeslots =='
                               .format(len(list(self.free_sessions)), len(list(self.free_timeslots))))
         sessions = sorted(self.free_sessions, key=lambda s: s.complexity, reverse=True)
+        self._reset_delta_cost()
 
         for session in sessions:
             possible_slots = [t for t in self.free_timeslots if t not in self.schedule.keys()]
             random.shuffle(possible_slots)
-            
+            costs_updates = {}
+
             def timeslot_preference(t):
-                proposed_schedule = self.schedule.copy()
-                proposed_schedule[t] = session
-                return self.calculate_dynamic_cost(proposed_schedule)[1], t.duration, t.capacity
+                cost, costs_updates[t] = self._delta_cost_for_changes({t: session})
+                if self.verify_delta_cost:
+                    proposed_schedule = self.schedule.copy()
+                    proposed_schedule[t] = session
+                    self._verify_delta_cost(cost, self.calculate_dynamic_cost(proposed_schedule)[1])
+                return cost, t.duration, t.capacity
 
             possible_slots.sort(key=timeslot_preference)
             self._schedule_session(session, possible_slots[0])
+            self._apply_delta_cost(costs_updates[possible_slots[0]])
             if self.verbosity >= 3:
                 self.stdout.write('Scheduled {} at {} in location {}'
                                   .format(session.group, possible_slots[0].start,
@@ -502,12 +607,21 @@ class Schedule(object):
                 shuffle_next_run = False
                 last_run_cost = None  # After a shuffle, attempt at least two regular runs
                 self._shuffle_conflicted_sessions(items)
+            self._reset_delta_cost()
 
             for original_timeslot, session in items:
                 if session.is_fixed:
                     continue
-                best_cost = self.calculate_dynamic_cost()[1]
+                if self.shared_best_cost is not None and self.shared_best_cost.value == 0:
+                    if self.verbosity >= 2:
+                        self.stdout.write('Optimiser stopped, another worker found an optimal schedule')
+                    self._save(self._delta_cost_total())
+                    if self.best_schedule is not None:
+                        self.schedule = self.best_schedule
+                    return run_count
+                best_cost = self._delta_cost_total()
                 if best_cost == 0:
+                    self._save(best_cost)
                     if self.verbosity >= 1 and self.stdout.isatty():
                         sys.stderr.write('\n')
                     if self.verbosity >= 2:
@@ -515,15 +629,18 @@ class Schedule(object):
 
                     return run_count
                 best_timeslot = None
+                best_costs_update = None
 
                 for possible_new_slot in self.free_timeslots:
-                    cost = self._cost_for_switch(original_timeslot, possible_new_slot)
+                    cost, costs_update = self._delta_cost_for_switch(original_timeslot, possible_new_slot)
                     if cost < best_cost:
                         best_cost = cost
                         best_timeslot = possible_new_slot
+                        best_costs_update = costs_update
 
                 if best_timeslot:
                     switched_with = self._switch_sessions(original_timeslot, best_timeslot)
+                    self._apply_delta_cost(best_costs_update)
                     switched_with = switched_with.group if switched_with else '<empty slot>'
                     if self.verbosity >= 3:
                         self.stdout.write('Run {:2}: found cost reduction to {:,} by switching {} with {}'
@@ -543,7 +660,9 @@ class Schedule(object):
         if self.verbosity >= 2:
             self.stdout.write('Optimiser did not find perfect schedule, using best schedule at dynamic cost {:,}'
                               .format(self.best_cost))
-        self.schedule = self.best_schedule
+        # keep the current schedule if no cost was ever saved
+        if self.best_schedule is not None:
+            self.schedule = self.best_schedule
 
         return run_count
 
@@ -629,6 +748,201 @@ class Schedule(object):
             del proposed_schedule[timeslot1]
         return self.calculate_dynamic_cost(proposed_schedule)[1]
 
+    def _delta_cost_for_switch(self, timeslot1, timeslot2):
+        """
+        Incremental equivalent of _cost_for_switch(), using the session costs cached by
+        _reset_delta_cost().
+
+        Returns a tuple of the total dynamic cost and an update of the cached costs that
+        can be passed to _apply_delta_cost() if the switch is made. Does not perform the
+        switch, self.schedule remains unchanged.
+        """
+        session1 = self.schedule.get(timeslot1)
+        session2 = self.schedule.get(timeslot2)
+        if (session1 and not session1.fits_in_timeslot(timeslot2)) or \
+                (session2 and not session2.fits_in_timeslot(timeslot1)):
+            cost, costs_update = math.inf, None
+        else:
+            # a single change if timeslot1 == timeslot2
+            cost, costs_update = self._delta_cost_for_changes({timeslot1: session2, timeslot2: session1})
+        if self.verify_delta_cost:
+            self._verify_delta_cost(cost, self._cost_for_switch(timeslot1, timeslot2))
+        return cost, costs_update
+
+    def _delta_cost_for_changes(self, changes):
+        """
+        Calculate the total dynamic cost of self.schedule with the changes applied, where
+        changes is a dict with timeslots as keys, and the new session or None as values.
+        Only sessions whose timeslot, overlapping sessions, group sessions or adjacent
+        sessions are changed are recalculated.
+
+        Returns a tuple of the total dynamic cost and an update of the cached costs that
+        can be passed to _apply_delta_cost() if the changes are made.
+        """
+        current = self._delta_schedule
+
+        def proposed(t):
+            return changes[t] if t in changes else current.get(t)
+
+        # A session placed in an empty timeslot is appended to the schedule dict. The
+        # order matters, as it determines the order in which group sessions are considered.
+        appended = [t for t, session in changes.items() if session and t not in self.schedule]
+
+        def position(t):
+            if t in appended:
+                return (0, len(self.schedule) + appended.index(t))
+            return self._delta_positions[t]
+
+        affected_groups = {session.group for session in changes.values() if session}
+        affected_groups.update(current[t].group for t in changes if t in current)
+        changed_group_slots = {}
+        affected = set(changes)
+        for group in affected_groups:
+            slots = set(self._delta_group_slots.get(group, ()))
+            affected.update(slots)
+            slots.difference_update(changes)
+            slots.update(t for t, session in changes.items() if session and session.group == group)
+            changed_group_slots[group] = sorted(slots, key=position)
+        for t in changes:
+            affected.update(self._overlapped_by[t])
+            affected.update(self._adjacent_to[t])
+
+        costs_update = {}
+        for t in affected:
+            session = proposed(t)
+            if session:
+                overlapping_sessions = self._delta_overlapping[t]
+                changed = changes.keys() & t.overlaps
+                if changed:
+                    overlapping_sessions = set(overlapping_sessions)
+                    overlapping_sessions.difference_update(current.get(c) for c in changed)
+                    overlapping_sessions.update(changes[c] for c in changed)
+                    overlapping_sessions.discard(None)
+                group_slots = changed_group_slots.get(session.group)
+                if group_slots is None:
+                    group_slots = self._delta_group_slots[session.group]
+                costs_update[t] = self._session_cost(t, session, proposed, overlapping_sessions, group_slots)
+            else:
+                costs_update[t] = None
+
+        old_costs = [self._delta_costs[t] for t in affected if t in self._delta_costs]
+        new_costs = [c for c in costs_update.values() if c is not None]
+        finite_total = (self._delta_finite_total
+                        - sum(c for c in old_costs if c != math.inf)
+                        + sum(c for c in new_costs if c != math.inf))
+        infinite_count = (self._delta_infinite_count
+                          - sum(1 for c in old_costs if c == math.inf)
+                          + sum(1 for c in new_costs if c == math.inf))
+        cost = math.inf if infinite_count else finite_total
+        return cost, costs_update
+
+    def _verify_delta_cost(self, cost, full_cost):
+        if cost != full_cost:
+            raise CommandError('Incremental schedule cost {} does not match full cost {}'
+                               .format(cost, full_cost))
+
+    def precompute_costs(self):
+        """
+        Precompute the costs that only depend on a pair of sessions, or on a session and
+        a timeslot. Sessions and timeslots are numbered, and the costs stored in dense
+        matrices, so that evaluating these costs is a lookup instead of a walk through
+        the constraints of the sessions. Costs involving more than two sessions (group
+        sessions, adjacency) are still calculated by Session when needed.
+
+        Must be called after adjust_for_timeslot_availability(), which may trim sessions.
+        """
+        sessions = sorted(self.sessions, key=lambda s: s.session_pk)
+        timeslots = sorted(self.timeslots, key=lambda t: t.timeslot_pk)
+        for index, session in enumerate(sessions):
+            session.index = index
+        for index, timeslot in enumerate(timeslots):
+            timeslot.index = index
+
+        # Bypass the lru_cache, the single-session arguments would only fill it up.
+        overlapping_groups_cost = Session._calculate_cost_overlapping_groups.__wrapped__
+        business_logic_cost = Session._calculate_cost_business_logic.__wrapped__
+        self._pair_costs = [
+            [
+                overlapping_groups_cost(session, (other, ))[1] + business_logic_cost(session, (other, ))[1]
+                for other in sessions
+            ]
+            for session in sessions
+        ]
+        self._timeslot_costs = [
+            [0 if session.is_fixed else session._calculate_cost_timeslot(timeslot)[1] for timeslot in timeslots]
+            for session in sessions
+        ]
+
+    def _session_cost(self, timeslot, session, lookup, overlapping_sessions, group_slots):
+        """
+        Calculate the dynamic cost of a single session in timeslot, in the same way as
+        calculate_dynamic_cost(), using the matrices from precompute_costs(). lookup
+        returns the session in a timeslot, or None, and group_slots lists the timeslots
+        of all sessions of the group, in schedule order.
+        """
+        cost = self._timeslot_costs[session.index][timeslot.index]
+        pair_costs = self._pair_costs[session.index]
+        for other in overlapping_sessions:
+            cost += pair_costs[other.index]
+        group_sessions = set()
+        for t in group_slots:
+            group_sessions.add((t, lookup(t)))
+        cost += session._calculate_cost_my_other_sessions(tuple(group_sessions))[1]
+        if session.wg_adjacent and not session.is_fixed:
+            adjacent_groups = tuple([lookup(t).group for t in timeslot.adjacent if lookup(t)])
+            cost += session._calculate_cost_adjacent(adjacent_groups)[1]
+        return cost
+
+    def _reset_delta_cost(self):
+        """Calculate and cache the dynamic cost of every session in self.schedule"""
+        self._load_delta_schedule()
+        self._delta_costs = {}
+        for t, session in self._delta_schedule.items():
+            self._delta_costs[t] = self._session_cost(
+                t, session, self._delta_schedule.get,
+                self._delta_overlapping[t], self._delta_group_slots[session.group],
+            )
+        self._update_delta_cost_total()
+
+    def _apply_delta_cost(self, costs_update):
+        """Update the cached costs after a switch evaluated by _delta_cost_for_switch() was made"""
+        self._load_delta_schedule()
+        for t, cost in costs_update.items():
+            if cost is None:
+                self._delta_costs.pop(t, None)
+            else:
+                self._delta_costs[t] = cost
+        self._update_delta_cost_total()
+
+    def _load_delta_schedule(self):
+        """Store self.schedule merged with the base schedule, and lookups into it"""
+        current = dict(self.schedule)
+        if self.base_schedule is not None:
+            current.update(self.base_schedule)
+        self._delta_schedule = current
+        self._delta_positions = {}
+        for t in self.schedule:
+            self._delta_positions[t] = (0, len(self._delta_positions))
+        for t in current:
+            self._delta_positions.setdefault(t, (1, len(self._delta_positions)))
+        self._delta_group_slots = defaultdict(list)
+        for t, session in current.items():  # in schedule order
+            self._delta_group_slots[session.group].append(t)
+        self._delta_overlapping = {
+            t: {current[o] for o in t.overlaps if o in current}
+            for t in self.timeslots
+        }
+
+    def _update_delta_cost_total(self):
+        costs = self._delta_costs.values()
+        self._delta_finite_total = sum(c for c in costs if c != math.inf)
+        self._delta_infinite_count = sum(1 for c in costs if c == math.inf)
+        if self.verify_delta_cost:
+            self._verify_delta_cost(self._delta_cost_total(), self.calculate_dynamic_cost()[1])
+
+    def _delta_cost_total(self):
+        return math.inf if self._delta_infinite_count else self._delta_finite_total
+
     def _switch_sessions(self, timeslot1, timeslot2):
         """
         Switch the sessions currently in timeslot1 and timeslot2.
@@ -652,10 +966,20 @@ class Schedule(object):
             del self.schedule[timeslot1]
         return session2
     
+    def reset(self):
+        """Clear the schedule, so a new one can be generated from scratch"""
+        self.schedule = dict()
+        self.best_cost = math.inf
+        self.best_schedule = None
+
     def _save(self, cost):
         if cost < self.best_cost:
             self.best_cost = cost
             self.best_schedule = self.schedule.copy()
+        if self.shared_best_cost is not None:
+            with self.shared_best_cost.get_lock():
+                if cost < self.shared_best_cost.value:
+                    self.shared_best_cost.value = cost
 
 
 class TimeSlot(object):
@@ -684,6 +1008,7 @@ class TimeSlot(object):
         self.overlaps = set()
         self.full_overlaps = set()
         self.adjacent = set()
+        self.index = None  # position in the cost matrices of the Schedule
 
     def store_relations(self, other_timeslots):
         """
@@ -764,6 +1089,7 @@ class Session(object):
         self.timeranges_unavailable_penalty = 0
 
         self.last_cost = None
+        self.index = None  # position in the cost matrices of the Schedule
 
         for constraint_db in constraints_db:
             if constraint_db.name.is_group_conflict:
@@ -832,19 +1158,10 @@ class Session(object):
         )
 
         if include_fixed or (not self.is_fixed):
-            if self.attendees > my_timeslot.capacity:
-                violations.append('{}: scheduled in too small room'.format(self.group))
-                cost += self.business_constraint_costs['session_requires_trim']
-
-            if self.requested_duration > my_timeslot.duration:
-                violations.append('{}: scheduled in too short timeslot'.format(self.group))
-                cost += self.business_constraint_costs['session_requires_trim']
-
-            if my_timeslot.time_group in self.timeranges_unavailable:
-                violations.append('{}: scheduled in unavailable timerange {}'
-                                  .format(self.group, my_timeslot.time_group))
-                cost += self.timeranges_unavailable_penalty
-            
+            v, c = self._calculate_cost_timeslot(my_timeslot)
+            violations += v
+            cost += c
+
         v, c = self._calculate_cost_overlapping_groups(overlapping_sessions)
         violations += v
         cost += c
@@ -859,14 +1176,39 @@ class Session(object):
 
         if self.wg_adjacent and (include_fixed or not self.is_fixed):
             adjacent_groups = tuple([schedule[t].group for t in my_timeslot.adjacent if t in schedule])
-            if self.wg_adjacent not in adjacent_groups:
-                violations.append('{}: missing adjacency with {}, adjacents are: {}'
-                                  .format(self.group, self.wg_adjacent, ', '.join(adjacent_groups)))
-                cost += self.wg_adjacent_penalty
+            v, c = self._calculate_cost_adjacent(adjacent_groups)
+            violations += v
+            cost += c
 
         self.last_cost = cost
         return violations, cost
 
+    def _calculate_cost_timeslot(self, my_timeslot):
+        """Calculate cost due to the capacity, duration and time of my_timeslot"""
+        violations, cost = [], 0
+        if self.attendees > my_timeslot.capacity:
+            violations.append('{}: scheduled in too small room'.format(self.group))
+            cost += self.business_constraint_costs['session_requires_trim']
+
+        if self.requested_duration > my_timeslot.duration:
+            violations.append('{}: scheduled in too short timeslot'.format(self.group))
+            cost += self.business_constraint_costs['session_requires_trim']
+
+        if my_timeslot.time_group in self.timeranges_unavailable:
+            violations.append('{}: scheduled in unavailable timerange {}'
+                              .format(self.group, my_timeslot.time_group))
+            cost += self.timeranges_unavailable_penalty
+        return violations, cost
+
+    def _calculate_cost_adjacent(self, adjacent_groups):
+        """Calculate cost due to the groups scheduled adjacent to this session"""
+        violations, cost = [], 0
+        if self.wg_adjacent not in adjacent_groups:
+            violations.append('{}: missing adjacency with {}, adjacents are: {}'
+                              .format(self.group, self.wg_adjacent, ', '.join(adjacent_groups)))
+            cost += self.wg_adjacent_penalty
+        return violations, cost
+
     @lru_cache(maxsize=10000)
     def _calculate_cost_overlapping_groups(self, overlapping_sessions):
         violations, cost = [], 0
@@ -966,3 +1308,31 @@ class Session(object):
                                           .format(self.group, difference_days))
                         cost += self.time_relation_penalty
         return violations, cost
+
+
+# State of a worker process started by ScheduleHandler._optimise_in_workers().
+_worker_schedule = None
+
+
+def _init_schedule_worker(schedule, shared_best_cost):
+    global _worker_schedule
+    random.seed()  # do not repeat the random choices of the other forked workers
+    schedule.shared_best_cost = shared_best_cost
+    schedule.verbosity = 0
+    _worker_schedule = schedule
+
+
+def _run_schedule_worker(start):
+    """Generate a schedule from scratch in a worker process
+
+    Returns a tuple of the start number, the dynamic cost, the number of optimiser
+    runs, and the assignments as (timeslot pk, session pk) tuples.
+    """
+    schedule = _worker_schedule
+    schedule.reset()
+    schedule.fill_initial_schedule()
+    runs = schedule.optimise_schedule()
+    cost = schedule.calculate_dynamic_cost()[1]
+    schedule._save(cost)
+    assignments = [(t.timeslot_pk, s.session_pk) for t, s in schedule.schedule.items()]
+    return start, cost, runs, assignments
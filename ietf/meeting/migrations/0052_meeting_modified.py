@@ -0,0 +1,20 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0051_populate_session_on_agenda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Last change of the meeting or its timeslots, sessions, assignments or session materials'),
+            preserve_default=False,
+        ),
+    ]
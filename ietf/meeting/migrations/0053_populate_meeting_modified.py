@@ -0,0 +1,34 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+import datetime
+
+from django.db import migrations
+from django.db.models import Max
+
+
+def forward(apps, schema_editor):
+    Meeting = apps.get_model('meeting', 'Meeting')
+    SchedTimeSessAssignment = apps.get_model('meeting', 'SchedTimeSessAssignment')
+    # use the latest change of the timeslots, sessions and assignments, as
+    # Meeting.updated() used to compute it
+    min_time = datetime.datetime(1970, 1, 1, 0, 0, 0)
+    for meeting in Meeting.objects.all():
+        modified = max(
+            meeting.timeslot_set.aggregate(Max('modified'))['modified__max'] or min_time,
+            meeting.session_set.aggregate(Max('modified'))['modified__max'] or min_time,
+            SchedTimeSessAssignment.objects.filter(schedule__meeting=meeting).aggregate(Max('modified'))['modified__max'] or min_time,
+        )
+        Meeting.objects.filter(pk=meeting.pk).update(modified=modified)
+
+def reverse(apps, schema_editor):
+    pass
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meeting', '0052_meeting_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, reverse),
+    ]
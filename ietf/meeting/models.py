@@ -20,7 +20,8 @@ import debug                            # pyflakes:ignore
 
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
-from django.db.models import Max, Subquery, OuterRef, TextField, Value, Q
+from django.dispatch import receiver
+from django.db.models import Subquery, OuterRef, TextField, Value, Q
 from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.urls import reverse as urlreverse
@@ -125,6 +126,7 @@ class Meeting(models.Model):
     group_conflict_types = models.ManyToManyField(
         ConstraintName, blank=True, limit_choices_to=dict(is_group_conflict=True),
         help_text='Types of scheduling conflict between groups to consider')
+    modified = models.DateTimeField(auto_now=True, help_text='Last change of the meeting or its timeslots, sessions, assignments or session materials')
 
     def __str__(self):
         if self.type_id == "ietf":
@@ -378,16 +380,9 @@ class Meeting(models.Model):
             self.save()
 
     def updated(self):
-        min_time = datetime.datetime(1970, 1, 1, 0, 0, 0) # should be Meeting.modified, but we don't have that
-        timeslots_updated = self.timeslot_set.aggregate(Max('modified'))["modified__max"] or min_time
-        sessions_updated = self.session_set.aggregate(Max('modified'))["modified__max"] or min_time
-        assignments_updated = min_time
-        if self.schedule:
-            assignments_updated = SchedTimeSessAssignment.objects.filter(schedule__in=[self.schedule, self.schedule.base if self.schedule else None]).aggregate(Max('modified'))["modified__max"] or min_time
-        ts = max(timeslots_updated, sessions_updated, assignments_updated)
+        # self.modified is kept up to date by the signal receivers at the end of this file
         tz = pytz.timezone(settings.PRODUCTION_TIMEZONE)
-        ts = tz.localize(ts)
-        return ts
+        return tz.localize(self.modified)
 
     @memoize
     def previous_meeting(self):
@@ -1377,3 +1372,30 @@ class MeetingHost(models.Model):
     class Meta:
         unique_together = (('meeting', 'name'),)
         ordering = ('pk',)
+
+
+def _update_meeting_modified(meetings):
+    meetings.update(modified=datetime.datetime.now())
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=TimeSlot)
+@receiver([models.signals.post_save, models.signals.post_delete], sender=Session)
+def timeslot_or_session_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_meeting_modified(Meeting.objects.filter(pk=instance.meeting_id))
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=SchedTimeSessAssignment)
+def assignment_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_meeting_modified(Meeting.objects.filter(schedule_set__pk=instance.schedule_id))
+
+@receiver([models.signals.post_save, models.signals.post_delete], sender=SessionPresentation)
+@receiver(models.signals.post_save, sender=SchedulingEvent)
+def session_related_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_meeting_modified(Meeting.objects.filter(session__pk=instance.session_id))
+
+@receiver(models.signals.post_save, sender=Document)
+def session_material_saved(sender, instance, raw=False, **kwargs):
+    # most saved documents aren't session materials, check that before updating
+    if not raw and instance.sessionpresentation_set.exists():
+        _update_meeting_modified(Meeting.objects.filter(session__materials=instance))
@@ -1,13 +1,18 @@
 # Copyright The IETF Trust 2020, All Rights Reserved
 # -*- coding: utf-8 -*-
 
+import datetime
+
 from django.conf import settings
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
+from ietf.doc.models import Document
 from ietf.group.factories import GroupFactory
 from ietf.group.models import Group
-from ietf.meeting.factories import SessionFactory, MeetingFactory, TimeSlotFactory
-from ietf.meeting.helpers import AgendaFilterOrganizer, AgendaKeywordTagger
+from ietf.meeting.factories import SessionFactory, MeetingFactory, TimeSlotFactory, SessionPresentationFactory
+from ietf.meeting.helpers import AgendaFilterOrganizer, AgendaKeywordTagger, agenda_snapshot, preprocess_assignments_for_agenda
 from ietf.meeting.models import SchedTimeSessAssignment
 from ietf.meeting.test_data import make_meeting_test_data
 from ietf.utils.test_utils import TestCase
@@ -332,4 +337,63 @@ class AgendaFilterOrganizerTests(TestCase):
         self.assertEqual(filter_organizer.get_non_area_keywords(), expected)
 
         filter_organizer = AgendaFilterOrganizer(assignments=assignments, single_category=True)
-        self.assertEqual(filter_organizer.get_non_area_keywords(), expected)
\ No newline at end of file
+        self.assertEqual(filter_organizer.get_non_area_keywords(), expected)
+
+class PreprocessAssignmentsForAgendaTests(TestCase):
+    def test_order_number(self):
+        meeting = MeetingFactory(type_id='ietf')
+        group = GroupFactory()
+        other = GroupFactory()
+        schedule = meeting.schedule
+        for g in (group, other, group, group):
+            SchedTimeSessAssignment.objects.create(
+                schedule=schedule,
+                session=SessionFactory(meeting=meeting, group=g, add_to_schedule=False),
+                timeslot=TimeSlotFactory(meeting=meeting),
+            )
+        assignments = preprocess_assignments_for_agenda(
+            SchedTimeSessAssignment.objects.filter(schedule=schedule).order_by('pk'),
+            meeting,
+        )
+        self.assertEqual(
+            [(a.session.group, a.session.order_number) for a in assignments],
+            [(group, 1), (other, 1), (group, 2), (group, 3)],
+        )
+
+@override_settings(CACHES=dict(settings.CACHES, agenda={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-agenda-snapshot'}))
+class AgendaSnapshotTests(TestCase):
+    def test_agenda_snapshot(self):
+        meeting = make_meeting_test_data()
+        schedule = meeting.schedule
+        with CaptureQueriesContext(connection) as built:
+            assignments = agenda_snapshot(meeting, schedule)
+        self.assertTrue(assignments)
+        mars = [a for a in assignments if a.session.group.acronym == 'mars'][0]
+        self.assertIn('mars', mars.filter_keywords)
+        self.assertTrue(mars.session_keyword.startswith('mars'))
+        self.assertTrue(mars.session.prefetched_active_materials)
+
+        # a second request only checks the snapshot version
+        with CaptureQueriesContext(connection) as cached:
+            self.assertEqual([a.pk for a in agenda_snapshot(meeting, schedule)], [a.pk for a in assignments])
+        self.assertLess(len(cached), len(built))
+
+        # session changes and new materials invalidate the snapshot
+        session = mars.session
+        session.agenda_note = 'Bring a towel'
+        session.save()
+        meeting.refresh_from_db()
+        mars = [a for a in agenda_snapshot(meeting, schedule) if a.session.pk == session.pk][0]
+        self.assertEqual(mars.session.agenda_note, 'Bring a towel')
+
+        count = len(mars.session.prefetched_active_materials)
+        SessionPresentationFactory(session=session, document__type_id='slides')
+        meeting.refresh_from_db()
+        mars = [a for a in agenda_snapshot(meeting, schedule) if a.session.pk == session.pk][0]
+        self.assertEqual(len(mars.session.prefetched_active_materials), count + 1)
+
+        # so do revisions of materials, even when the meeting isn't touched
+        slides = mars.session.prefetched_active_materials[-1]
+        Document.objects.filter(pk=slides.pk).update(title='Towels', time=slides.time + datetime.timedelta(seconds=1))
+        mars = [a for a in agenda_snapshot(meeting, schedule) if a.session.pk == session.pk][0]
+        self.assertIn('Towels', [d.title for d in mars.session.prefetched_active_materials])
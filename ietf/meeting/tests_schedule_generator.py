@@ -1,14 +1,17 @@
 # Copyright The IETF Trust 2020, All Rights Reserved
 import calendar
 import datetime
+import multiprocessing
 from io import StringIO
+from mock import patch
 
+from django.core.management import call_command
 from django.core.management.base import CommandError
 
 from ietf.utils.test_utils import TestCase
 from ietf.group.factories import GroupFactory, RoleFactory
 from ietf.person.factories import PersonFactory
-from ietf.meeting.models import Constraint, TimerangeName, BusinessConstraint, SchedTimeSessAssignment, Schedule
+from ietf.meeting.models import Meeting, Constraint, TimerangeName, BusinessConstraint, SchedTimeSessAssignment, Schedule
 from ietf.meeting.factories import MeetingFactory, RoomFactory, TimeSlotFactory, SessionFactory, ScheduleFactory
 from ietf.meeting.management.commands import generate_schedule
 from ietf.name.models import ConstraintName
@@ -81,6 +84,68 @@ class ScheduleGeneratorTest(TestCase):
         schedule = self.meeting.schedule_set.get(name__startswith='Auto-')
         self.assertEqual(schedule.assignments.count(), 13)
 
+    def test_delta_cost_matches_full_cost(self):
+        """Incremental cost evaluation in the optimiser should agree with a full calculation"""
+        self._create_basic_sessions()
+        base_schedule = self._create_base_schedule()
+        generator = generate_schedule.ScheduleHandler(
+            self.stdout,
+            self.meeting.number,
+            verbosity=0,
+            base_id=generate_schedule.ScheduleId.from_schedule(base_schedule),
+            verify_delta_cost=True,
+        )
+        # a mismatch between the incremental and full costs raises a CommandError
+        violations, cost = generator.run()
+        self.assertEqual(cost, generator.schedule.total_schedule_cost()[1])
+
+    def test_schedule_in_workers(self):
+        self._create_basic_sessions()
+        generator = generate_schedule.ScheduleHandler(self.stdout, self.meeting.number, verbosity=1,
+                                                      workers=2, starts=4)
+        violations, cost = generator.run()
+        self.assertEqual(violations, self.fixed_violations)
+        self.assertEqual(cost, self.fixed_cost)
+
+        self.stdout.seek(0)
+        output = self.stdout.read()
+        self.assertIn('Running 4 randomized schedule generations in 2 worker processes', output)
+        self.assertIn('Using schedule from start', output)
+
+        # only the winning schedule is saved
+        schedule = self.meeting.schedule_set.get(name__startswith='Auto-')
+        self.assertEqual(schedule.assignments.count(), 13)
+
+    def test_optimiser_stopped_before_saving(self):
+        """A worker stopped by another worker keeps its schedule if it never saved one"""
+        self._create_basic_sessions()
+        generator = generate_schedule.ScheduleHandler(self.stdout, self.meeting.number, verbosity=0)
+        schedule = generator.schedule
+        schedule.fill_initial_schedule()
+        initial = schedule.schedule.copy()
+        schedule.shared_best_cost = multiprocessing.Value('d', 0)
+        with patch.object(schedule, '_save'):
+            schedule.optimise_schedule()
+        self.assertIsNone(schedule.best_schedule)
+        self.assertEqual(schedule.schedule, initial)
+
+    def test_benchmark_command(self):
+        # the benchmark uses the existing meeting IETF 999 instead of creating a dummy meeting
+        self.meeting.number = '999'
+        self.meeting.save()
+        self._create_basic_sessions()
+        call_command('benchmark_schedule_generator', evaluations=50, stdout=self.stdout)
+        self.stdout.seek(0)
+        output = self.stdout.read()
+        self.assertIn('Initial schedule filled', output)
+        self.assertIn('Incremental cost calculation:', output)
+        self.assertIn('Speedup:', output)
+        self.assertTrue(Meeting.objects.filter(number='999').exists())
+
+    def test_invalid_workers(self):
+        with self.assertRaises(CommandError):
+            generate_schedule.ScheduleHandler(self.stdout, self.meeting.number, verbosity=0, workers=0)
+
     def test_unresolvable_schedule(self):
         self._create_basic_sessions()
         for group in self.all_groups:
@@ -23,8 +23,11 @@ from pathlib import Path
 
 from django.urls import reverse as urlreverse
 from django.conf import settings
+from django.core.cache import cache, caches
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.db.models import F, Max
 from django.http import QueryDict, FileResponse
 from django.template import Context, Template
@@ -37,7 +40,7 @@ from ietf.doc.models import Document
 from ietf.group.models import Group, Role, GroupFeatures
 from ietf.group.utils import can_manage_group
 from ietf.person.models import Person
-from ietf.meeting.helpers import can_approve_interim_request, can_view_interim_request
+from ietf.meeting.helpers import agenda_snapshot, can_approve_interim_request, can_view_interim_request
 from ietf.meeting.helpers import send_interim_approval_request
 from ietf.meeting.helpers import send_interim_meeting_cancellation_notice, send_interim_session_cancellation_notice
 from ietf.meeting.helpers import send_interim_minutes_reminder, populate_important_dates, update_important_dates
@@ -415,6 +418,32 @@ class MeetingTests(BaseMeetingTestCase):
         self.assertEqual(r_with_tz.status_code,200)
         self.assertEqual(r.content, r_with_tz.content)
 
+    def test_agenda_conditional_get(self):
+        meeting = make_meeting_test_data()
+        session = Session.objects.filter(meeting=meeting, group__acronym="mars").first()
+        for url in [
+            urlreverse("ietf.meeting.views.agenda", kwargs=dict(num=meeting.number)),
+            urlreverse("ietf.meeting.views.agenda_ical", kwargs=dict(num=meeting.number)),
+            urlreverse("ietf.meeting.views.agenda_json", kwargs=dict(num=meeting.number)),
+            urlreverse("ietf.meeting.views.week_view", kwargs=dict(num=meeting.number)),
+        ]:
+            r = self.client.get(url)
+            self.assertEqual(r.status_code, 200)
+            etag = r['ETag']
+            r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(r.status_code, 304)
+            r = self.client.get(url, HTTP_IF_MODIFIED_SINCE=r['Last-Modified'])
+            self.assertEqual(r.status_code, 304)
+
+            # changes to the agenda's sessions and materials change the ETag
+            session.save()
+            r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(r.status_code, 200)
+            etag = r['ETag']
+            SessionPresentationFactory(session=session, document__type_id='slides')
+            r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(r.status_code, 200)
+
     def test_agenda_personalize(self):
         """Session selection page should have a checkbox for each session with appropriate keywords"""
         meeting = make_meeting_test_data()
@@ -786,6 +815,20 @@ class MeetingTests(BaseMeetingTestCase):
             ]
         )
 
+    @override_settings(CACHES=dict(settings.CACHES, default={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-ical-filter-cached-events'}))
+    def test_ical_filter_cached_events(self):
+        meeting = make_meeting_test_data()
+        self.do_ical_filter_test(meeting, querystring='?show=mars', expected_session_summaries=[
+            'mars - Martian Special Interest Group',
+        ])
+        # other filters are put together from the cached events, without another agenda snapshot
+        with patch('ietf.meeting.helpers.agenda_snapshot') as mock_snapshot:
+            self.do_ical_filter_test(meeting, querystring='?show=ames,plenary', expected_session_summaries=[
+                'IETF Plenary',
+                'ames - Asteroid Mining Equipment Standardization Group',
+            ])
+            self.assertFalse(mock_snapshot.called)
+
     def build_session_setup(self):
         # This setup is intentionally unusual - the session has one draft attached as a session presentation,
         # but lists a different on in its agenda. The expectation is that the pdf and tgz views will return both.
@@ -5461,6 +5504,36 @@ class IphoneAppJsonTests(TestCase):
         for s in jsessions:
             self.assertTrue(msessions.filter(group__acronym=s['group']['acronym']).exists())
 
+    @override_settings(CACHES=dict(settings.CACHES,
+                                   default={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-iphone-app-json-query-count'},
+                                   agenda={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-iphone-app-json-agenda'}))
+    def test_iphone_app_json_query_count(self):
+        make_meeting_test_data()
+        meeting = Meeting.objects.filter(type_id='ietf').order_by('id').last()
+        for session in meeting.session_set.filter(type='regular'):
+            SessionPresentationFactory.create_batch(3, session=session, document__type_id='slides')
+        url = urlreverse('ietf.meeting.views.agenda_json',kwargs={'num':meeting.number})
+
+        # without an agenda snapshot
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code,200)
+        self.assertLessEqual(len(queries), 80)
+
+        # the agenda snapshot is shared with the other agenda views, so build
+        # it beforehand.  Adding the materials above has updated
+        # meeting.modified, which is part of the snapshot key.
+        cache.clear()
+        caches['agenda'].clear()
+        meeting.refresh_from_db()
+        agenda_snapshot(meeting, meeting.schedule)
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get(url)
+        self.assertEqual(r.status_code,200)
+        self.assertLessEqual(len(queries), 20)
+        jsessions = [ s for s in r.json()[meeting.number] if s['objtype'] == 'session' ]
+        self.assertTrue(any(len(s.get('presentations', [])) >= 3 for s in jsessions))
+
 class FinalizeProceedingsTests(TestCase):
     @override_settings(STATS_REGISTRATION_ATTENDEES_JSON_URL='https://ietf.example.com/{number}')
     @requests_mock.Mocker()
@@ -12,7 +12,6 @@ import math
 import os
 import pytz
 import re
-import tarfile
 import tempfile
 
 from calendar import timegm
@@ -25,7 +24,7 @@ from django import forms
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import (HttpResponse, HttpResponseRedirect, HttpResponseForbidden,
                          HttpResponseNotFound, Http404, HttpResponseBadRequest,
-                         JsonResponse, HttpResponseGone)
+                         JsonResponse, HttpResponseGone, FileResponse)
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
@@ -62,7 +61,8 @@ from ietf.meeting.helpers import get_person_by_email, get_schedule_by_name
 from ietf.meeting.helpers import get_meeting, get_ietf_meeting, get_current_ietf_meeting_num
 from ietf.meeting.helpers import get_schedule, schedule_permissions
 from ietf.meeting.helpers import preprocess_assignments_for_agenda, read_agenda_file
-from ietf.meeting.helpers import AgendaFilterOrganizer, AgendaKeywordTagger
+from ietf.meeting.helpers import AgendaFilterOrganizer, AgendaKeywordTagger, agenda_condition, agenda_snapshot
+from ietf.meeting.helpers import agenda_ical_events, ical_session_status
 from ietf.meeting.helpers import convert_draft_to_pdf, get_earliest_session_date
 from ietf.meeting.helpers import can_view_interim_request, can_approve_interim_request
 from ietf.meeting.helpers import can_edit_interim_request
@@ -87,6 +87,7 @@ from ietf.name.models import SlideSubmissionStatusName, ProceedingsMaterialTypeN
 from ietf.secr.proceedings.proc_utils import (get_progress_stats, post_process, import_audio_files,
     create_recording)
 from ietf.utils import markdown
+from ietf.utils.archive import bundle_cache_path, open_bundle_cache_file, save_bundle_cache_file, tarfile_response
 from ietf.utils.decorators import require_api_key
 from ietf.utils.hedgedoc import Note, NoteError
 from ietf.utils.history import find_history_replacements_active_at
@@ -779,6 +780,7 @@ def edit_meeting_schedule(request, num=None, owner=None, name=None):
                     )
 
                 existing_assignments.update(timeslot=timeslot, modified=datetime.datetime.now())
+                Meeting.objects.filter(pk=meeting.pk).update(modified=datetime.datetime.now())
             else:
                 SchedTimeSessAssignment.objects.create(
                     session=session,
@@ -1474,15 +1476,8 @@ def session_materials(request, session_id):
     return render(request, 'meeting/session_materials.html', dict(item=assignment))
 
 
-def get_assignments_for_agenda(schedule):
-    """Get queryset containing assignments to show on the agenda"""
-    return SchedTimeSessAssignment.objects.filter(
-        schedule__in=[schedule, schedule.base],
-        session__on_agenda=True,
-    )
-
-
 @ensure_csrf_cookie
+@agenda_condition(lambda num=None, **kwargs: get_ietf_meeting(num))
 def agenda(request, num=None, name=None, base=None, ext=None, owner=None, utc=""):
     base = base if base else 'agenda'
     ext = ext if ext else '.html'
@@ -1520,11 +1515,7 @@ def agenda(request, num=None, name=None, base=None, ext=None, owner=None, utc=""
     updated = meeting.updated()
 
     # Select and prepare sessions that should be included
-    filtered_assignments = preprocess_assignments_for_agenda(
-        get_assignments_for_agenda(schedule),
-        meeting
-    )
-    AgendaKeywordTagger(assignments=filtered_assignments).apply()
+    filtered_assignments = agenda_snapshot(meeting, schedule)
 
     # Done processing for CSV output
     if ext == ".csv":
@@ -1671,6 +1662,7 @@ def agenda_by_type(request, num=None, type=None, name=None, owner=None):
     return render(request,"meeting/agenda_by_type.html",{"meeting":meeting,"schedule":schedule,"assignments":assignments})
 
 @role_required('Area Director','Secretariat','IAB')
+@agenda_condition(lambda num=None, **kwargs: get_meeting(num))
 def agenda_by_type_ics(request,num=None,type=None):
     meeting = get_meeting(num) 
     schedule = get_schedule(meeting)
@@ -1685,19 +1677,15 @@ def agenda_by_type_ics(request,num=None,type=None):
     return render(request,"meeting/agenda.ics",{"schedule":schedule,"updated":updated,"assignments":assignments},content_type="text/calendar")
 
 
+@agenda_condition(lambda num=None, **kwargs: get_ietf_meeting(num))
 def agenda_personalize(request, num):
     meeting = get_ietf_meeting(num)  # num may be None, which requests the current meeting
     if meeting is None or meeting.schedule is None:
         raise Http404('No such meeting')
 
-    # Select and prepare sessions that should be included
-    filtered_assignments = preprocess_assignments_for_agenda(
-        get_assignments_for_agenda(meeting.schedule),
-        meeting
-    )
-    tagger = AgendaKeywordTagger(assignments=filtered_assignments)
-    tagger.apply()  # annotate assignments with filter_keywords attribute
-    tagger.apply_session_keywords()  # annotate assignments with session_keyword attribute
+    # Select and prepare sessions that should be included, annotated with
+    # filter_keywords and session_keyword attributes
+    filtered_assignments = agenda_snapshot(meeting, meeting.schedule)
 
     # Now prep the filter UI
     filter_organizer = AgendaFilterOrganizer(assignments=filtered_assignments)
@@ -1756,71 +1744,69 @@ def session_draft_list(num, acronym):
 
     return sorted(result)
 
-def session_draft_tarfile(request, num, acronym):
-    drafts = session_draft_list(num, acronym);
-
-    response = HttpResponse(content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename=%s-drafts.tgz'%(acronym)
-    tarstream = tarfile.open('','w:gz',response)
-    mfh, mfn = mkstemp()
-    os.close(mfh)
-    manifest = io.open(mfn, "w")
-
+def session_draft_pdf_paths(drafts):
+    """Yield the PDF path of each of drafts, converting drafts to PDF as needed."""
     for doc_name in drafts:
         pdf_path = os.path.join(settings.INTERNET_DRAFT_PDF_PATH, doc_name + ".pdf")
 
         if not os.path.exists(pdf_path):
             convert_draft_to_pdf(doc_name)
 
-        if os.path.exists(pdf_path):
-            try:
-                tarstream.add(pdf_path, str(doc_name + ".pdf"))
-                manifest.write("Included:  "+pdf_path+"\n")
-            except Exception as e:
-                manifest.write(("Failed (%s): "%e)+pdf_path+"\n")
-        else:
-            manifest.write("Not found: "+pdf_path+"\n")
+        yield doc_name, pdf_path
 
-    manifest.close()
-    tarstream.add(mfn, "manifest.txt")
-    tarstream.close()
-    os.unlink(mfn)
-    return response
+def session_draft_tarfile(request, num, acronym):
+    drafts = session_draft_list(num, acronym);
+
+    files = ( (doc_name + ".pdf", pdf_path) for doc_name, pdf_path in session_draft_pdf_paths(drafts) )
+
+    return tarfile_response('%s-drafts.tgz' % acronym, 'session-tgz', [ tuple(d.rsplit("-", 1)) for d in drafts ], files)
 
 def session_draft_pdf(request, num, acronym):
     drafts = session_draft_list(num, acronym);
+
+    cache_path = bundle_cache_path('session-pdf', [ tuple(d.rsplit("-", 1)) for d in drafts ])
+    if cache_path and os.path.exists(cache_path):
+        return FileResponse(open(cache_path, "rb"), content_type="application/pdf")
+
     curr_page = 1
     pmh, pmn = mkstemp()
     os.close(pmh)
     pdfmarks = io.open(pmn, "w")
     pdf_list = ""
+    complete = True
 
-    for draft in drafts:
-        pdf_path = os.path.join(settings.INTERNET_DRAFT_PDF_PATH, draft + ".pdf")
-        if not os.path.exists(pdf_path):
-            convert_draft_to_pdf(draft)
-
+    for draft, pdf_path in session_draft_pdf_paths(drafts):
         if os.path.exists(pdf_path):
             pages = pdf_pages(pdf_path)
             pdfmarks.write("[/Page "+str(curr_page)+" /View [/XYZ 0 792 1.0] /Title (" + draft + ") /OUT pdfmark\n")
             pdf_list = pdf_list + " " + pdf_path
             curr_page = curr_page + pages
+        else:
+            complete = False
 
     pdfmarks.close()
-    pdfh, pdfn = mkstemp()
-    os.close(pdfh)
+    # write the combined PDF straight into the bundle cache if it is complete
+    tmp = open_bundle_cache_file(cache_path) if cache_path and complete else None
+    if tmp:
+        tmp.close()
+        pdfn = tmp.name
+    else:
+        pdfh, pdfn = mkstemp()
+        os.close(pdfh)
     gs = settings.GHOSTSCRIPT_COMMAND
     code, out, err = pipe(gs + " -dBATCH -dNOPAUSE -q -sDEVICE=pdfwrite -sOutputFile=" + pdfn + " " + pdf_list + " " + pmn)
     assertion('code == 0')
-
-    pdf = io.open(pdfn,"rb")
-    pdf_contents = pdf.read()
-    pdf.close()
-
     os.unlink(pmn)
-    os.unlink(pdfn)
-    return HttpResponse(pdf_contents, content_type="application/pdf")
 
+    if tmp and code == 0:
+        save_bundle_cache_file(tmp, cache_path)
+        pdf = io.open(cache_path, "rb")
+    else:
+        pdf = io.open(pdfn, "rb")
+        os.unlink(pdfn)
+    return FileResponse(pdf, content_type="application/pdf")
+
+@agenda_condition(lambda num=None, **kwargs: get_meeting(num))
 def week_view(request, num=None, name=None, owner=None):
     meeting = get_meeting(num)
 
@@ -1833,12 +1819,7 @@ def week_view(request, num=None, name=None, owner=None):
     if not schedule:
         raise Http404
 
-    filtered_assignments = SchedTimeSessAssignment.objects.filter(
-        schedule__in=[schedule, schedule.base],
-        session__on_agenda=True,
-    )
-    filtered_assignments = preprocess_assignments_for_agenda(filtered_assignments, meeting)
-    AgendaKeywordTagger(assignments=filtered_assignments).apply()
+    filtered_assignments = agenda_snapshot(meeting, schedule)
 
     items = []
     for a in filtered_assignments:
@@ -1948,22 +1929,6 @@ def room_view(request, num=None, name=None, owner=None):
     template = "meeting/room-view.html"
     return render(request, template,{"meeting":meeting,"schedule":schedule,"unavailable":unavailable,"assignments":assignments,"rooms":rooms,"days":days})
 
-def ical_session_status(assignment):
-    if assignment.session.current_status == 'canceled':
-        return "CANCELLED"
-    elif assignment.session.current_status == 'resched':
-        t = "RESCHEDULED"
-        if assignment.session.tombstone_for_id is not None:
-            other_assignment = SchedTimeSessAssignment.objects.filter(schedule=assignment.schedule_id, session=assignment.session.tombstone_for_id).first()
-            if other_assignment:
-                t = "RESCHEDULED TO {}-{}".format(
-                    other_assignment.timeslot.time.strftime("%A %H:%M").upper(),
-                    other_assignment.timeslot.end_time().strftime("%H:%M")
-                )
-        return t
-    else:
-        return "CONFIRMED"
-
 def parse_agenda_filter_params(querydict):
     """Parse agenda filter parameters from a request"""
     if len(querydict) == 0:
@@ -1991,6 +1956,7 @@ def should_include_assignment(filter_params, assignment):
     hidden = len(set(filter_params['hide']).intersection(assignment.filter_keywords)) > 0
     return shown and not hidden
 
+@agenda_condition(lambda num=None, **kwargs: get_meeting(num, type_in=None))
 def agenda_ical(request, num=None, name=None, acronym=None, session_id=None):
     """Agenda ical view
 
@@ -2016,12 +1982,9 @@ def agenda_ical(request, num=None, name=None, acronym=None, session_id=None):
     if schedule is None and acronym is None and session_id is None:
         raise Http404
 
-    assignments = SchedTimeSessAssignment.objects.filter(
-        schedule__in=[schedule, schedule.base],
-        session__on_agenda=True,
-    )
-    assignments = preprocess_assignments_for_agenda(assignments, meeting)
-    AgendaKeywordTagger(assignments=assignments).apply()
+    # The events are rendered once per agenda version, so a feed is put
+    # together from the pre-rendered events of the selected sessions
+    events = agenda_ical_events(meeting, schedule)
 
     try:
         filt_params = parse_agenda_filter_params(request.GET)
@@ -2030,23 +1993,20 @@ def agenda_ical(request, num=None, name=None, acronym=None, session_id=None):
 
     if filt_params is not None:
         # Apply the filter
-        assignments = [a for a in assignments if should_include_assignment(filt_params, a)]
+        events = [e for e in events if should_include_assignment(filt_params, e)]
 
     if acronym:
-        assignments = [ a for a in assignments if a.session.historic_group and a.session.historic_group.acronym == acronym ]
+        events = [ e for e in events if e.acronym == acronym ]
     elif session_id:
-        assignments = [ a for a in assignments if a.session_id == int(session_id) ]
-
-    for a in assignments:
-        if a.session:
-            a.session.ical_status = ical_session_status(a)
+        events = [ e for e in events if e.session_id == int(session_id) ]
 
     return render(request, "meeting/agenda.ics", {
         "schedule": schedule,
-        "assignments": assignments,
+        "vevents": [e.vevent for e in events],
         "updated": updated
     }, content_type="text/calendar")
 
+@agenda_condition(lambda num=None, **kwargs: get_meeting(num, type_in=['ietf','interim']))
 @cache_page(15 * 60)
 def agenda_json(request, num=None):
     meeting = get_meeting(num, type_in=['ietf','interim'])
@@ -2054,19 +2014,27 @@ def agenda_json(request, num=None):
     sessions = []
     locations = set()
     parent_acronyms = set()
-    assignments = SchedTimeSessAssignment.objects.filter(
-        schedule__in=[meeting.schedule, meeting.schedule.base if meeting.schedule else None],
-        session__on_agenda=True,
-    ).exclude(
-        session__type__in=['break', 'reg']
-    )
-    # Update the assignments with historic information, i.e., valid at the
+    # The assignments carry historic information, i.e., valid at the
     # time of the meeting
-    assignments = preprocess_assignments_for_agenda(assignments, meeting, extra_prefetches=[
-        "session__materials__docevent_set",
-        "session__sessionpresentation_set",
-        "timeslot__meeting"
-    ])
+    assignments = []
+    if meeting.schedule:
+        assignments = [ a for a in agenda_snapshot(meeting, meeting.schedule) if a.session.type_id not in ['break', 'reg'] ]
+
+    # Fetch the presentations and the latest revision times of the materials
+    # of all the sessions up front, rather than querying for each session
+    presentations_for_session = defaultdict(list)
+    material_ids_for_session = defaultdict(set)
+    for pres in SessionPresentation.objects.filter(session__in=[a.session_id for a in assignments]).select_related('document'):
+        material_ids_for_session[pres.session_id].add(pres.document_id)
+        if pres.document.type_id == 'slides':
+            presentations_for_session[pres.session_id].append(pres)
+    revision_times = dict(
+        NewRevisionDocEvent.objects.filter(
+            type='new_revision',
+            doc__in=set().union(*material_ids_for_session.values()),
+        ).values_list('doc').annotate(Max('time'))
+    )
+
     for asgn in assignments:
         sessdict = dict()
         sessdict['objtype'] = 'session'
@@ -2109,8 +2077,7 @@ def agenda_json(request, num=None):
             sessdict['minutes'] = asgn.session.minutes().get_href()
         if asgn.session.slides():
             sessdict['presentations'] = []
-            presentations = SessionPresentation.objects.filter(session=asgn.session, document__type__slug='slides')
-            for pres in presentations:
+            for pres in presentations_for_session[asgn.session_id]:
                 sessdict['presentations'].append(
                     {
                         'name':     pres.document.name,
@@ -2122,9 +2089,8 @@ def agenda_json(request, num=None):
         sessdict['session_res_uri'] = '/api/v1/meeting/session/%s/'%asgn.session.id
         sessdict['session_id'] = asgn.session.id
         modified = asgn.session.modified
-        for doc in asgn.session.materials.all():
-            rev_docevent = doc.latest_event(NewRevisionDocEvent,'new_revision')
-            modified = max(modified, (rev_docevent and rev_docevent.time) or modified)
+        for doc_id in material_ids_for_session[asgn.session_id]:
+            modified = max(modified, revision_times.get(doc_id) or modified)
         sessdict['modified'] = modified
         sessdict['status'] = asgn.session.current_status
         sessions.append(sessdict)
@@ -2171,7 +2137,10 @@ def agenda_json(request, num=None):
 
     data = {"%s"%num: meetinfo}
 
-    response = HttpResponse(json.dumps(data, indent=2, sort_keys=True), content_type='application/json;charset=%s'%settings.DEFAULT_CHARSET)
+    # Encode incrementally, rather than building the whole document as one
+    # string first.  This is not a StreamingHttpResponse, as cache_page only
+    # caches regular responses.
+    response = HttpResponse(json.JSONEncoder(indent=2, sort_keys=True).iterencode(data), content_type='application/json;charset=%s'%settings.DEFAULT_CHARSET)
     if last_modified:
         last_modified = tz.localize(last_modified).astimezone(pytz.utc)
         response['Last-Modified'] = format_date_time(timegm(last_modified.timetuple()))
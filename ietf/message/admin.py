@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from ietf.message.models import Message, MessageAttachment, SendQueue, AnnouncementFrom
+from ietf.message.models import Message, MessageAttachment, SendQueue, AnnouncementFrom, OutboundMessage
 
 class MessageAdmin(admin.ModelAdmin):
     list_display = ["subject", "by", "time", "groups"]
@@ -25,6 +25,13 @@ class SendQueueAdmin(admin.ModelAdmin):
     ordering = ["-time"]
 admin.site.register(SendQueue, SendQueueAdmin)
 
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ["time", "message", "attempts", "next_attempt", "sent_at"]
+    list_filter = ["time", "sent_at"]
+    raw_id_fields = ["message"]
+    ordering = ["-time"]
+admin.site.register(OutboundMessage, OutboundMessageAdmin)
+
 class AnnouncementFromAdmin(admin.ModelAdmin):
     list_display = ['name', 'group', 'address', ]
 admin.site.register(AnnouncementFrom, AnnouncementFromAdmin)
@@ -0,0 +1,50 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+import time
+
+from django.core.management.base import BaseCommand
+
+import debug                            # pyflakes:ignore
+
+from ietf.message.utils import send_outbound_messages
+from ietf.utils.mail import close_smtp_connections
+
+class Command(BaseCommand):
+    help = """
+
+    Send the outgoing emails queued as OutboundMessage objects, which happens
+    when settings.EMAIL_OUTBOUND_QUEUE is set.  Failed messages are retried
+    with increasing delays.  With --loop, keep running and send new messages
+    as they are queued.
+
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action="store_true", default=False,
+            help="Keep running, checking the queue for new messages.",
+        )
+        parser.add_argument(
+            '--interval', type=int, default=5,
+            help="Seconds to wait between checks of an empty queue with --loop (default %(default)s).",
+        )
+        parser.add_argument(
+            '--limit', type=int, default=500,
+            help="Maximum number of messages to send in one batch (default %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        try:
+            while True:
+                sent, failed = send_outbound_messages(limit=options['limit'])
+                if verbosity > 1 or (verbosity > 0 and (sent or failed)):
+                    self.stdout.write('Sent %s queued messages, %s failed' % (sent, failed))
+                if not options['loop']:
+                    break
+                if not sent:
+                    time.sleep(options['interval'])
+        finally:
+            close_smtp_connections()
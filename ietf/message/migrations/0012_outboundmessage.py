@@ -0,0 +1,37 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+import ietf.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('message', '0011_auto_20201109_0439'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.DateTimeField(default=datetime.datetime.now)),
+                ('content', models.TextField()),
+                ('bcc', models.TextField(blank=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(default=datetime.datetime.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('message', ietf.utils.models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='message.Message')),
+            ],
+            options={
+                'ordering': ['time'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboundmessage',
+            index=models.Index(fields=['sent_at', 'next_attempt'], name='message_out_sent_at_acb692_idx'),
+        ),
+    ]
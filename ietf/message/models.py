@@ -82,6 +82,29 @@ class SendQueue(models.Model):
         return "'%s' %s -> %s (sent at %s)" % (self.message.subject, self.message.frm, self.message.to, self.sent_at or "<not yet>")
 
 
+class OutboundMessage(models.Model):
+    """An outgoing email, queued for delivery by the send_outbound_mail command"""
+    time = models.DateTimeField(default=datetime.datetime.now)
+    message = ForeignKey(Message, null=True, blank=True)
+
+    content = models.TextField()        # the complete email, headers and body
+    bcc = models.TextField(blank=True)
+
+    attempts = models.IntegerField(default=0)
+    next_attempt = models.DateTimeField(default=datetime.datetime.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['time']
+        indexes = [
+            models.Index(fields=['sent_at', 'next_attempt']),
+        ]
+
+    def __str__(self):
+        return "Outbound message %s (sent at %s)" % (self.pk, self.sent_at or "<not yet>")
+
+
 class AnnouncementFrom(models.Model):
     name = ForeignKey(RoleName)
     group = ForeignKey(Group)
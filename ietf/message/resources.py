@@ -11,7 +11,7 @@ from tastypie.cache import SimpleCache
 
 from ietf import api
 
-from ietf.message.models import Message, SendQueue, MessageAttachment, AnnouncementFrom
+from ietf.message.models import Message, SendQueue, MessageAttachment, AnnouncementFrom, OutboundMessage
 from ietf.person.resources import PersonResource
 from ietf.group.resources import GroupResource
 from ietf.doc.resources import DocumentResource
@@ -103,3 +103,22 @@ class AnnouncementFromResource(ModelResource):
             "group": ALL_WITH_RELATIONS,
         }
 api.message.register(AnnouncementFromResource())
+
+
+class OutboundMessageResource(ModelResource):
+    message          = ToOneField(MessageResource, 'message', null=True)
+    class Meta:
+        queryset = OutboundMessage.objects.none()
+        serializer = api.Serializer()
+        cache = SimpleCache()
+        #resource_name = 'outboundmessage'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "time": ALL,
+            "attempts": ALL,
+            "next_attempt": ALL,
+            "sent_at": ALL,
+            "message": ALL_WITH_RELATIONS,
+        }
+api.message.register(OutboundMessageResource())
@@ -3,14 +3,19 @@
 
 
 import datetime
+import smtplib
 
+from django.conf import settings
+from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse as urlreverse
+from mock import patch
 
 import debug                            # pyflakes:ignore
 
 from ietf.group.factories import GroupFactory
-from ietf.message.models import Message, SendQueue
-from ietf.message.utils import send_scheduled_message_from_send_queue
+from ietf.message.models import Message, SendQueue, OutboundMessage
+from ietf.message.utils import send_scheduled_message_from_send_queue, send_outbound_messages
 from ietf.person.models import Person
 from ietf.utils.mail import outbox, send_mail_text, send_mail_message, get_payload_text
 from ietf.utils.test_utils import TestCase
@@ -124,3 +129,55 @@ class SendScheduledAnnouncementsTests(TestCase):
         self.assertTrue("This is a test" in outbox[-1]["Subject"])
         self.assertTrue("--NextPart" in outbox[-1].as_string())
         self.assertTrue(SendQueue.objects.get(id=q.id).sent_at)
+
+
+class OutboundMessageTests(TestCase):
+    @override_settings(SERVER_MODE='production', EMAIL_OUTBOUND_QUEUE=True)
+    def test_queued_mail(self):
+        mailbox_before = len(outbox)
+        send_mail_text(None, "to@example.com", "from@example.com", "Queued message", "Hello World!", bcc="bcc@example.com")
+        self.assertEqual(len(outbox), mailbox_before)
+        queued = OutboundMessage.objects.get()
+        self.assertIsNone(queued.sent_at)
+        self.assertIsNone(queued.message.sent)
+
+        call_command('send_outbound_mail', verbosity=0)
+        self.assertEqual(len(outbox), mailbox_before + 1)
+        self.assertEqual(outbox[-1]['Subject'], "Queued message")
+        self.assertEqual(outbox[-1]['Message-ID'], queued.message.msgid)
+        queued = OutboundMessage.objects.get()
+        self.assertIsNotNone(queued.sent_at)
+        self.assertIsNotNone(queued.message.sent)
+
+        # nothing is sent twice
+        call_command('send_outbound_mail', verbosity=0)
+        self.assertEqual(len(outbox), mailbox_before + 1)
+
+    def test_queued_mail_claim(self):
+        queued = OutboundMessage.objects.create(content="To: to@example.com\nSubject: Claimed message\n\nHello World!\n")
+        leases = []
+        def send_smtp(msg, bcc=None):
+            # while a message is being sent, it is claimed for the whole claim time
+            leases.append(OutboundMessage.objects.get(pk=queued.pk).next_attempt - datetime.datetime.now())
+        with patch('ietf.message.utils.send_smtp', side_effect=send_smtp):
+            self.assertEqual(send_outbound_messages(), (1, 0))
+        self.assertEqual(len(leases), 1)
+        self.assertGreater(leases[0], datetime.timedelta(seconds=settings.EMAIL_OUTBOUND_CLAIM_TIME - 60))
+
+    @override_settings(EMAIL_OUTBOUND_MAX_ATTEMPTS=2)
+    def test_queued_mail_retry(self):
+        queued = OutboundMessage.objects.create(content="To: to@example.com\nSubject: Retried message\n\nHello World!\n")
+        with patch('ietf.message.utils.send_smtp', side_effect=smtplib.SMTPException('Unavailable')):
+            self.assertEqual(send_outbound_messages(), (0, 1))
+        queued = OutboundMessage.objects.get(pk=queued.pk)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('Unavailable', queued.last_error)
+        self.assertGreater(queued.next_attempt, datetime.datetime.now())
+
+        # not due yet
+        self.assertEqual(send_outbound_messages(), (0, 0))
+        OutboundMessage.objects.filter(pk=queued.pk).update(next_attempt=datetime.datetime.now())
+        mailbox_before = len(outbox)
+        self.assertEqual(send_outbound_messages(), (1, 0))
+        self.assertEqual(len(outbox), mailbox_before + 1)
+        self.assertEqual(outbox[-1]['Subject'], "Retried message")
@@ -2,12 +2,15 @@
 # -*- coding: utf-8 -*-
 
 
-import re, datetime, email
+import re, datetime, email, smtplib
 
+from django.conf import settings
 from django.utils.encoding import force_str
 
-from ietf.utils.mail import send_mail_text, send_mail_mime
-from ietf.message.models import Message
+from ietf.utils.log import log
+from ietf.utils.mail import ( send_mail_text, send_mail_mime, send_smtp, log_smtp_exception,
+    send_error_email, SMTPSomeRefusedRecipients )
+from ietf.message.models import Message, OutboundMessage
 
 first_dot_on_line_re = re.compile(r'^\.', re.MULTILINE)
 
@@ -57,3 +60,50 @@ def send_scheduled_message_from_send_queue(queue_item):
 
     queue_item.message.sent = queue_item.sent_at
     queue_item.message.save()
+
+def send_outbound_messages(limit=None):
+    """Send the queued outbound messages which are due, and return the number
+    of messages sent and of failed attempts.
+
+    Messages are sent one after the other over the pooled SMTP connections.
+    A failed message is retried later, with the delay doubling for each
+    attempt, until settings.EMAIL_OUTBOUND_MAX_ATTEMPTS is reached.
+    """
+    sent = failed = 0
+    now = datetime.datetime.now()
+    due = OutboundMessage.objects.filter(
+        sent_at__isnull=True,
+        next_attempt__lte=now,
+        attempts__lt=settings.EMAIL_OUTBOUND_MAX_ATTEMPTS,
+    ).select_related('message')
+    for item in due[:limit]:
+        # claim the message, so that concurrent runs don't send it too.  The
+        # lease starts now rather than at the start of the batch, which may
+        # have taken a while already.
+        lease = datetime.datetime.now() + datetime.timedelta(seconds=settings.EMAIL_OUTBOUND_CLAIM_TIME)
+        if not OutboundMessage.objects.filter(pk=item.pk, sent_at__isnull=True, next_attempt=item.next_attempt).update(next_attempt=lease):
+            continue
+        try:
+            send_smtp(email.message_from_string(item.content), item.bcc or None)
+        except SMTPSomeRefusedRecipients as e:
+            # delivered to the other recipients, so don't retry
+            log_smtp_exception(e)
+            send_error_email(e)
+        except smtplib.SMTPException as e:
+            log_smtp_exception(e)
+            item.attempts += 1
+            item.last_error = str(e)
+            item.next_attempt = datetime.datetime.now() + datetime.timedelta(
+                seconds=settings.EMAIL_OUTBOUND_RETRY_DELAY * 2 ** (item.attempts - 1))
+            item.save()
+            if item.attempts >= settings.EMAIL_OUTBOUND_MAX_ATTEMPTS:
+                log("Giving up on OutboundMessage[%s] after %s attempts" % (item.pk, item.attempts))
+                send_error_email(e)
+            failed += 1
+            continue
+        item.sent_at = datetime.datetime.now()
+        item.save()
+        if item.message:
+            Message.objects.filter(pk=item.message_id).update(sent=item.sent_at)
+        sent += 1
+    return sent, failed
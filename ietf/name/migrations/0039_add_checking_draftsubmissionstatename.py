@@ -0,0 +1,39 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+from django.db import migrations
+
+
+def forward(apps, schema_editor):
+    DraftSubmissionStateName = apps.get_model('name', 'DraftSubmissionStateName')
+    new_state_name = DraftSubmissionStateName.objects.create(
+        slug='checking',
+        name='Running Submission Checks',
+        order=1,
+        used=True,
+    )
+    for slug in ('uploaded', 'manual', 'cancel'):
+        new_state_name.next_states.add(DraftSubmissionStateName.objects.get(slug=slug))
+
+
+def reverse(apps, schema_editor):
+    DraftSubmissionStateName = apps.get_model('name', 'DraftSubmissionStateName')
+    Submission = apps.get_model('submit', 'Submission')
+
+    name_to_delete = DraftSubmissionStateName.objects.get(slug='checking')
+
+    # Refuse to migrate if there are any Submissions using the state we're about to remove
+    assert(Submission.objects.filter(state=name_to_delete).count() == 0)
+
+    name_to_delete.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('name', '0038_disuse_offagenda_and_reserved'),
+        ('submit', '0008_submissionextresource'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, reverse),
+    ]
@@ -15,6 +15,7 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import validate_email
 from django.db import models
+from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.urls import reverse as urlreverse
 from django.utils.encoding import smart_bytes
@@ -430,3 +431,18 @@ class PersonEvent(models.Model):
 class PersonApiKeyEvent(PersonEvent):
     key = ForeignKey(PersonalApiKey)
     
+
+
+@receiver(models.signals.post_save, sender=Person)
+@receiver(models.signals.post_delete, sender=Person)
+@receiver(models.signals.post_save, sender=Alias)
+@receiver(models.signals.post_delete, sender=Alias)
+@receiver(models.signals.post_save, sender=Email)
+@receiver(models.signals.post_delete, sender=Email)
+def person_typeahead_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        from ietf.person.utils import person_typeahead
+        if sender == Email:
+            person_typeahead.changed(("email", instance.address))
+        else:
+            person_typeahead.changed(("person", instance.person_id if sender == Alias else instance.pk))
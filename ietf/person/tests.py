@@ -10,6 +10,7 @@ from PIL import Image
 from pyquery import PyQuery
 
 
+from django.core.cache import cache
 from django.http import HttpRequest
 from django.test import override_settings
 from django.urls import reverse as urlreverse
@@ -27,8 +28,9 @@ from ietf.person.factories import EmailFactory, PersonFactory, UserFactory
 from ietf.person.models import Person, Alias
 from ietf.person.utils import (merge_persons, determine_merge_order, send_merge_notification,
     handle_users, get_extra_primary, dedupe_aliases, move_related_objects, merge_nominees,
-    handle_reviewer_settings, merge_users, get_dots)
+    handle_reviewer_settings, merge_users, get_dots, person_typeahead)
 from ietf.review.models import ReviewerSettings
+from ietf.utils.cache import bump_cache_generation
 from ietf.utils.test_utils import TestCase, login_testing_unauthorized
 from ietf.utils.mail import outbox, empty_outbox
 
@@ -49,6 +51,50 @@ class PersonTests(TestCase):
         data = r.json()
         self.assertEqual(data[0]["id"], person.email_address())
 
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-person-typeahead'}})
+    def test_ajax_search_persons(self):
+        url = urlreverse("ietf.person.views.ajax_select2_search", kwargs={ "model_name": "person"})
+        later = PersonFactory(name="Jane Abqwertyzz")
+        r = self.client.get(url, dict(q="qwertyzz"))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([d["id"] for d in r.json()], [later.pk])
+
+        # the index is refreshed when persons are added, and matches at the
+        # start of a word are ranked first
+        first = PersonFactory(name="Joe Qwertyzz")
+        r = self.client.get(url, dict(q="qwertyzz"))
+        self.assertEqual([d["id"] for d in r.json()], [first.pk, later.pk])
+        r = self.client.get(url, dict(q="jane qwertyzz"))
+        self.assertEqual([d["id"] for d in r.json()], [later.pk])
+
+        # case and accents are ignored
+        accented = PersonFactory(name="Zoë Élqwertyzz")
+        r = self.client.get(url, dict(q="ELQWERTYZZ zoe"))
+        self.assertEqual([d["id"] for d in r.json()], [accented.pk])
+
+        # email addresses are searched with an @ in the term
+        email = EmailFactory(person=later, address="jane@qwertyzz.example.com")
+        r = self.client.get(url, dict(q="@qwertyzz.example"))
+        self.assertEqual([d["id"] for d in r.json()], [later.pk])
+        email.delete()
+        r = self.client.get(url, dict(q="@qwertyzz.example"))
+        self.assertEqual(r.json(), [])
+
+        # changes are applied to the index rather than rebuilding it, also
+        # when they are made in another process
+        index = person_typeahead.get()
+        Alias.objects.filter(person=first).update(name="Joe Asdfghzz")
+        cache.set(person_typeahead.change_key(bump_cache_generation(person_typeahead.cache_key)), ("person", first.pk))
+        r = self.client.get(url, dict(q="asdfghzz"))
+        self.assertEqual([d["id"] for d in r.json()], [first.pk])
+        r = self.client.get(url, dict(q="joe qwertyzz"))
+        self.assertEqual(r.json(), [])
+        self.assertIs(person_typeahead.get(), index)
+
+        # missed changes which are no longer kept rebuild the index
+        cache.delete(person_typeahead.change_key(bump_cache_generation(person_typeahead.cache_key)))
+        self.assertIsNot(person_typeahead.get(), index)
+
     def test_ajax_person_email_json(self):
         person = PersonFactory()
         EmailFactory.create_batch(5, person=person)
@@ -8,6 +8,8 @@ import pprint
 import sys
 import syslog
 
+from collections import defaultdict
+
 from django.contrib import admin
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
@@ -15,8 +17,9 @@ from django.db.models import Q
 
 import debug                            # pyflakes:ignore
 
-from ietf.person.models import Person
+from ietf.person.models import Alias, Email, Person
 from ietf.utils.mail import send_mail
+from ietf.utils.typeahead import CurrentTypeahead, TypeaheadIndex, rank_matches
 
 def merge_persons(request, source, target, file=sys.stdout, verbose=False):
     changes = []
@@ -239,3 +242,88 @@ def get_dots(person):
         if roles.filter(group__acronym__startswith='nomcom', name_id__in=('chair','member')).exists():
             dots.append('nomcom')
         return dots
+
+class PersonTypeahead(object):
+    """Alias names and email addresses of all persons, indexed for the
+    select2 person and email searches."""
+
+    def __init__(self):
+        self.names = TypeaheadIndex(Alias.objects.values_list("person_id", "name"))
+        self.addresses = TypeaheadIndex(Email.objects.values_list("address", "address"))
+        self.person_names = {}
+        self.users = set()
+        for pk, name, user_id in Person.objects.values_list("pk", "name", "user_id"):
+            self.person_names[pk] = name
+            if user_id is not None:
+                self.users.add(pk)
+        self.email_persons = {}
+        self.person_emails = defaultdict(list)
+        self.active_emails = set()
+        for address, person_id, active in Email.objects.values_list("address", "person_id", "active"):
+            self.email_persons[address] = person_id
+            self.person_emails[person_id].append(address)
+            if active:
+                self.active_emails.add(address)
+
+    def update(self, change):
+        """Bring the entries of a person, given as ("person", pk), or of an
+        email address, given as ("email", address), up to date."""
+        kind, key = change
+        if kind == "person":
+            self.names.update(key, Alias.objects.filter(person=key).values_list("name", flat=True))
+            person = Person.objects.filter(pk=key).values_list("name", "user_id").first()
+            self.users.discard(key)
+            if person is None:
+                self.person_names.pop(key, None)
+            else:
+                self.person_names[key] = person[0]
+                if person[1] is not None:
+                    self.users.add(key)
+        elif kind == "email":
+            if key in self.email_persons:
+                emails = self.person_emails[self.email_persons.pop(key)]
+                if key in emails:
+                    emails.remove(key)
+            self.active_emails.discard(key)
+            email = Email.objects.filter(address=key).values_list("person_id", "active").first()
+            self.addresses.update(key, [key] if email else [])
+            if email is not None:
+                self.email_persons[key] = email[0]
+                self.person_emails[email[0]].append(key)
+                if email[1]:
+                    self.active_emails.add(key)
+
+    def persons(self, terms, only_users=False):
+        """Return the pks of the persons with an alias containing each term,
+        or for terms with an @, an alias or email address containing it."""
+        term_matches = []
+        for t in terms:
+            found = self.names.matches(t)
+            if "@" in t: # allow searching email address if there's a @ in the search term
+                for address, score in self.addresses.matches(t).items():
+                    person_id = self.email_persons[address]
+                    if person_id is not None:
+                        found[person_id] = max(found.get(person_id, 0), score)
+            term_matches.append(found)
+        pks = rank_matches(term_matches, lambda pk: self.person_names.get(pk, ""))
+        if only_users:
+            pks = [ pk for pk in pks if pk in self.users ]
+        return pks
+
+    def emails(self, terms, only_users=False, all_emails=False):
+        """Return the addresses of the emails containing each term, or
+        belonging to a person with an alias containing it."""
+        term_matches = []
+        for t in terms:
+            found = self.addresses.matches(t)
+            for person_id, score in self.names.matches(t).items():
+                for address in self.person_emails[person_id]:
+                    found[address] = max(found.get(address, 0), score)
+            term_matches.append(found)
+        addresses = rank_matches(term_matches, lambda address: self.person_names.get(self.email_persons[address], ""))
+        return [ address for address in addresses
+                 if self.email_persons[address] is not None
+                 and (all_emails or address in self.active_emails)
+                 and (not only_users or self.email_persons[address] in self.users) ]
+
+person_typeahead = CurrentTypeahead("person:typeahead:generation", PersonTypeahead)
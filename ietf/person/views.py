@@ -7,7 +7,6 @@ from io import StringIO, BytesIO
 from PIL import Image
 
 from django.contrib import messages
-from django.db.models import Q
 from django.http import HttpResponse, Http404
 from django.shortcuts import render, get_object_or_404, redirect
 
@@ -17,7 +16,7 @@ from ietf.ietfauth.utils import role_required
 from ietf.person.models import Email, Person, Alias
 from ietf.person.fields import select2_id_name_json
 from ietf.person.forms import MergeForm
-from ietf.person.utils import handle_users, merge_persons
+from ietf.person.utils import handle_users, merge_persons, person_typeahead
 
 
 def ajax_select2_search(request, model_name):
@@ -28,42 +27,28 @@ def ajax_select2_search(request, model_name):
 
     q = [w.strip() for w in request.GET.get('q', '').split() if w.strip()]
 
-    if not q:
-        objs = model.objects.none()
-    else:
-        query = Q()
-        for t in q:
-            if model == Email:
-                query &= Q(person__alias__name__icontains=t) | Q(address__icontains=t)
-            elif model == Person:
-                if "@" in t: # allow searching email address if there's a @ in the search term
-                    query &= Q(alias__name__icontains=t) | Q(email__address__icontains=t)
-                else:
-                    query &= Q(alias__name__icontains=t)
-
-        objs = model.objects.filter(query)
-
     # require an account at the Datatracker
     only_users = request.GET.get("user") == "1"
     all_emails = request.GET.get("a", "0") == "1"
 
-    if model == Email:
-        objs = objs.exclude(person=None).order_by('person__name')
-        if not all_emails:
-            objs = objs.filter(active=True)
-        if only_users:
-            objs = objs.exclude(person__user=None)
-    elif model == Person:
-        objs = objs.order_by("name")
-        if only_users:
-            objs = objs.exclude(user=None)
-
     try:
         page = int(request.GET.get("p", 1)) - 1
     except ValueError:
         page = 0
 
-    objs = objs.distinct()[page:page + 10]
+    if not q:
+        objs = []
+    else:
+        index = person_typeahead.get()
+        if model == Email:
+            pks = index.emails(q, only_users=only_users, all_emails=all_emails)
+            qs = Email.objects.select_related("person")
+        else:
+            pks = index.persons(q, only_users=only_users)
+            qs = Person.objects.all()
+        pks = pks[page:page + 10]
+        found = qs.in_bulk(pks)
+        objs = [ found[pk] for pk in pks if pk in found ]
 
     return HttpResponse(select2_id_name_json(objs), content_type='application/json')
 
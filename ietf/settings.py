@@ -755,16 +755,54 @@ CACHES = {
             'MAX_ENTRIES': 5000,
         },
     },
+    'agenda': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/a/cache/datatracker/agenda',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    'yangvalidation': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/a/cache/datatracker/yangvalidation',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,      # 100,000
+        },
+    },
 }
 
+DOC_SEARCH_CACHE_TIME = 60*60*24      # 1 day; results are also invalidated on document changes
+
+TYPEAHEAD_REBUILD_INTERVAL = 60*5       # 5 minutes; only used without a shared cache to pass on changes
+
 HTMLIZER_VERSION = 1
 HTMLIZER_URL_PREFIX = "/doc/html"
 HTMLIZER_CACHE_TIME = 60*60*24*14       # 14 days
 PDFIZER_CACHE_TIME = HTMLIZER_CACHE_TIME
 PDFIZER_URL_PREFIX = IDTRACKER_BASE_URL+"/doc/pdf"
+# Worker processes rendering new revisions and RFCs in the background; 0 disables
+DOC_PRERENDER_WORKERS = 2
+
+# Telechat and session document bundles (tarfiles and combined PDFs)
+DOCUMENT_BUNDLE_CACHE_DIR = '/a/cache/datatracker/bundles'
+DOCUMENT_BUNDLE_CACHE_MAX_AGE = 60*60*24*14 # 14 days
 
 # Email settings
 IPR_EMAIL_FROM = 'ietf-ipr@ietf.org'
+
+# Outgoing mail
+EMAIL_SMTP_POOL_SIZE = 2                # idle SMTP connections kept open per process
+EMAIL_SMTP_CONNECTION_MAX_AGE = 300     # seconds; older connections are not reused
+EMAIL_OUTBOUND_QUEUE = False            # in production, queue mail for the send_outbound_mail command
+EMAIL_OUTBOUND_MAX_ATTEMPTS = 8
+EMAIL_OUTBOUND_RETRY_DELAY = 60         # seconds, doubled for each further attempt
+EMAIL_OUTBOUND_CLAIM_TIME = 15*60       # seconds; much longer than sending a message can take
+
+# Community list notifications
+COMMUNITY_NOTIFICATION_QUEUE = False    # queue notifications for the send_community_notifications command
+COMMUNITY_NOTIFICATION_DIGEST_WINDOW = 5*60 # seconds; changes within this are sent in one email
+COMMUNITY_NOTIFICATION_CLAIM_TIME = 60*60  # seconds; notifications claimed by a run that died are sent after this
+
 AUDIO_IMPORT_EMAIL = ['ietf@meetecho.com']
 IANA_EVAL_EMAIL = "drafts-eval@icann.org"
 SESSION_REQUEST_FROM_EMAIL = 'IETF Meeting Session Request Tool <session-request@ietf.org>' 
@@ -787,6 +825,9 @@ RFC_EDITOR_GROUP_NOTIFICATION_EMAIL = "webmaster@rfc-editor.org"
 RFC_EDITOR_QUEUE_URL = "https://www.rfc-editor.org/queue2.xml"
 RFC_EDITOR_INDEX_URL = "https://www.rfc-editor.org/rfc/rfc-index.xml"
 RFC_EDITOR_ERRATA_JSON_URL = "https://www.rfc-editor.org/errata.json"
+# How long unchanged RFC index entries are skipped by bin/rfc-editor-index-updates
+# before they are compared with the database again
+RFC_EDITOR_INDEX_ENTRY_CACHE_TIME = 60*60*24*7
 RFC_EDITOR_ERRATA_URL = "https://www.rfc-editor.org/errata_search.php?rfc={rfc_number}&amp;rec_status=0"
 RFC_EDITOR_INLINE_ERRATA_URL = "https://www.rfc-editor.org/rfc/inline-errata/rfc{rfc_number}.html"
 RFC_EDITOR_INFO_BASE_URL = "https://www.rfc-editor.org/info/"
@@ -841,6 +882,9 @@ SUBMIT_YANG_CATALOG_IMPACT_DESC = "Yang impact analysis for {draft}"
 SUBMIT_YANG_CATALOG_MODULE_URL = "https://www.yangcatalog.org/yang-search/module_details.php?module={module}"
 SUBMIT_YANG_CATALOG_MODULE_DESC = "Yang catalog entry for {module}"
 
+# Validation results for unchanged yang models and libraries are reused for this long
+SUBMIT_YANG_VALIDATION_CACHE_TIME = 60*60*24*30     # 30 days
+
 SUBMIT_YANG_CATALOG_CHECKER_URL = "https://yangcatalog.org/yangvalidator/api/v1/datatracker/{type}"
 
 IDSUBMIT_CHECKER_CLASSES = (
@@ -849,6 +893,17 @@ IDSUBMIT_CHECKER_CLASSES = (
 #    "ietf.submit.checkers.DraftYangvalidatorChecker",    
 )
 
+# Number of threads used to run the submission checkers, and the yang model
+# validations within the yang checker, concurrently
+IDSUBMIT_CHECKER_WORKERS = 4
+
+# Run the submission checkers for manual uploads after the upload request has
+# returned, with the submission in the 'checking' state until they complete
+IDSUBMIT_CHECK_IN_BACKGROUND = False
+# Seconds after which submissions still in the 'checking' state are taken to
+# have lost their checks, which the requeue_submission_checks command runs again
+IDSUBMIT_CHECK_STUCK_AFTER = 30*60
+
 
 IDSUBMIT_MANUAL_STAGING_DIR = '/tmp/'
 
@@ -978,6 +1033,8 @@ FLOORPLAN_LAST_LEGACY_MEETING = 95  # last meeting to use FLOORPLAN_LEGACY_BASE_
 MEETING_USES_CODIMD_DATE = datetime.date(2020,7,6)
 MEETING_LEGACY_OFFICE_HOURS_END = 112  # last meeting to use legacy office hours representation
 
+MEETING_AGENDA_SNAPSHOT_CACHE_TIME = 60*60*24   # 1 day; snapshots are also invalidated on agenda changes
+
 # Maximum dimensions to accept at all
 MEETINGHOST_LOGO_MAX_UPLOAD_WIDTH = 400
 MEETINGHOST_LOGO_MAX_UPLOAD_HEIGHT = 400
@@ -1005,6 +1062,11 @@ RSYNC_BINARY = '/usr/bin/rsync'
 YANGLINT_BINARY = '/usr/bin/yanglint'
 DE_GFM_BINARY = '/usr/bin/de-gfm.ruby2.5'
 
+# Rendered group document dependency graphs
+GROUP_DEPENDENCY_GRAPH_DIR = '/a/cache/datatracker/dependencies'
+GROUP_DEPENDENCY_GRAPH_MAX_AGE = 60*60*24*14 # 14 days
+GROUP_DEPENDENCY_GRAPH_WORKERS = 2
+
 # Account settings
 DAYS_TO_EXPIRE_REGISTRATION_LINK = 3
 HTPASSWD_COMMAND = "/usr/bin/htpasswd"
@@ -1301,7 +1363,26 @@ if SERVER_MODE != 'production':
                 'MAX_ENTRIES': 5000,
             },
         },
+        'agenda': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+            #'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/var/cache/datatracker/agenda',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+            },
+        },
+        'yangvalidation': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+            #'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/var/cache/datatracker/yangvalidation',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+            },
+        },
     }
+    DOCUMENT_BUNDLE_CACHE_DIR = None
+    GROUP_DEPENDENCY_GRAPH_DIR = None
+    DOC_PRERENDER_WORKERS = 0
     SESSION_ENGINE = "django.contrib.sessions.backends.db"
 
     if 'SECRET_KEY' not in locals():
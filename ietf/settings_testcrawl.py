@@ -55,6 +55,22 @@ CACHES = {
             'MAX_ENTRIES': 5000,
         },
     },
+    'agenda': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        #'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/cache/datatracker/agenda',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    'yangvalidation': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        #'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/cache/datatracker/yangvalidation',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
 
 PASSWORD_HASHERS = [ 'django.contrib.auth.hashers.MD5PasswordHasher', ]
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from ietf.stats.models import AffiliationAlias, AffiliationIgnoredEnding, CountryAlias, MeetingRegistration
+from ietf.stats.models import ( AffiliationAlias, AffiliationIgnoredEnding, AuthorStats, CountryAlias,
+    DocumentStats, DocumentYearStats, MeetingRegistration )
 
 
 class AffiliationAliasAdmin(admin.ModelAdmin):
@@ -26,3 +27,23 @@ class MeetingRegistrationAdmin(admin.ModelAdmin):
     search_fields = ['meeting__number', 'first_name', 'last_name', 'affiliation', 'country_code', 'email', ]
     raw_id_fields = ['person']
 admin.site.register(MeetingRegistration, MeetingRegistrationAdmin)
+
+class DocumentStatsAdmin(admin.ModelAdmin):
+    list_filter = ['rfc', ]
+    list_display = ['name', 'rfc', 'author_count', 'pages', 'words', 'formats', 'citations', 'time', 'updated', ]
+    search_fields = ['name', ]
+    raw_id_fields = ['document']
+admin.site.register(DocumentStats, DocumentStatsAdmin)
+
+class DocumentYearStatsAdmin(admin.ModelAdmin):
+    list_filter = ['year', ]
+    list_display = ['document', 'year', ]
+    search_fields = ['document__name', ]
+    raw_id_fields = ['document']
+admin.site.register(DocumentYearStats, DocumentYearStatsAdmin)
+
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = ['document', 'person', 'name', 'affiliation', 'country', ]
+    search_fields = ['document__name', 'name', 'affiliation', 'country', ]
+    raw_id_fields = ['document', 'person']
+admin.site.register(AuthorStats, AuthorStatsAdmin)
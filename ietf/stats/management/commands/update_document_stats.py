@@ -0,0 +1,28 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+from django.core.management.base import BaseCommand
+
+import debug                            # pyflakes:ignore
+
+from ietf.stats.utils import update_changed_document_stats, update_document_stats
+
+
+class Command(BaseCommand):
+    help = ('Update the document statistics tables for the drafts and RFCs with events since '
+            'the last update, or rebuild them from scratch with --all.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', default=False,
+                            help='rebuild the statistics of all drafts and RFCs')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='number of documents to update per batch (default 1000)')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            count = update_document_stats(batch_size=options['batch_size'])
+        else:
+            count = update_changed_document_stats()
+        if options.get('verbosity', 1) > 0:
+            self.stdout.write('Updated statistics for %d documents' % count)
@@ -0,0 +1,55 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+
+from django.db import migrations, models
+import django.db.models.deletion
+import ietf.utils.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doc', '0045_documentsearchindex'),
+        ('person', '0021_auto_20211210_0805'),
+        ('stats', '0003_meetingregistration_attended'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentStats',
+            fields=[
+                ('document', ietf.utils.models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='doc.Document')),
+                ('name', models.CharField(help_text='RFC name for RFCs, draft name otherwise', max_length=255)),
+                ('rfc', models.BooleanField(default=False)),
+                ('author_count', models.IntegerField(default=0)),
+                ('pages', models.IntegerField(blank=True, null=True)),
+                ('words', models.IntegerField(blank=True, null=True)),
+                ('formats', models.CharField(blank=True, help_text="Comma-separated, e.g. 'TXT,XML'", max_length=255)),
+                ('formal_languages', models.CharField(blank=True, help_text='Comma-separated formal language names', max_length=255)),
+                ('citations', models.IntegerField(default=0)),
+                ('time', models.DateTimeField(blank=True, help_text='Time of the latest revision or RFC publication', null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('affiliation', models.CharField(blank=True, max_length=100)),
+                ('country', models.CharField(blank=True, max_length=255)),
+                ('document', ietf.utils.models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='authors', to='stats.DocumentStats')),
+                ('person', ietf.utils.models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='person.Person')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DocumentYearStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('document', ietf.utils.models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='years', to='stats.DocumentStats')),
+            ],
+            options={
+                'unique_together': {('document', 'year')},
+            },
+        ),
+    ]
@@ -6,10 +6,11 @@ from django.db import models
 
 import debug                            # pyflakes:ignore
 
+from ietf.doc.models import Document
 from ietf.meeting.models import Meeting
 from ietf.name.models import CountryName
 from ietf.person.models import Person
-from ietf.utils.models import ForeignKey
+from ietf.utils.models import ForeignKey, OneToOneField
 
 
 class AffiliationAlias(models.Model):
@@ -65,3 +66,43 @@ class MeetingRegistration(models.Model):
 
     def __str__(self):
         return "{} {}".format(self.first_name, self.last_name)
+
+class DocumentStats(models.Model):
+    """Facts about a draft or RFC for the document statistics, maintained by
+    ietf.stats.utils.update_document_stats()."""
+    document = OneToOneField(Document, primary_key=True)
+    name = models.CharField(max_length=255, help_text="RFC name for RFCs, draft name otherwise")
+    rfc = models.BooleanField(default=False)
+    author_count = models.IntegerField(default=0)
+    pages = models.IntegerField(blank=True, null=True)
+    words = models.IntegerField(blank=True, null=True)
+    formats = models.CharField(max_length=255, blank=True, help_text="Comma-separated, e.g. 'TXT,XML'")
+    formal_languages = models.CharField(max_length=255, blank=True, help_text="Comma-separated formal language names")
+    citations = models.IntegerField(default=0)
+    time = models.DateTimeField(blank=True, null=True, help_text="Time of the latest revision or RFC publication")
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+class DocumentYearStats(models.Model):
+    """Records that a revision of the document, or the RFC, was published in year."""
+    document = ForeignKey(DocumentStats, related_name="years")
+    year = models.IntegerField()
+
+    def __str__(self):
+        return "{} {}".format(self.document_id, self.year)
+
+    class Meta:
+        unique_together = [('document', 'year')]
+
+class AuthorStats(models.Model):
+    """An author of a document, for the author statistics."""
+    document = ForeignKey(DocumentStats, related_name="authors")
+    person = ForeignKey(Person)
+    name = models.CharField(max_length=255)
+    affiliation = models.CharField(max_length=100, blank=True)
+    country = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return "{} ({})".format(self.name, self.document_id)
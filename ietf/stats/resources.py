@@ -11,7 +11,8 @@ from tastypie.cache import SimpleCache
 from ietf import api
 from ietf.api import ToOneField                         # pyflakes:ignore
 
-from ietf.stats.models import CountryAlias, AffiliationIgnoredEnding, AffiliationAlias, MeetingRegistration
+from ietf.stats.models import ( CountryAlias, AffiliationIgnoredEnding, AffiliationAlias, MeetingRegistration,
+    DocumentStats, DocumentYearStats, AuthorStats )
 
 
 from ietf.name.resources import CountryNameResource
@@ -82,3 +83,62 @@ class MeetingRegistrationResource(ModelResource):
             "person": ALL_WITH_RELATIONS,
         }
 api.stats.register(MeetingRegistrationResource())
+
+
+from ietf.doc.resources import DocumentResource
+class DocumentStatsResource(ModelResource):
+    document         = ToOneField(DocumentResource, 'document')
+    class Meta:
+        queryset = DocumentStats.objects.all()
+        serializer = api.Serializer()
+        cache = SimpleCache()
+        #resource_name = 'documentstats'
+        ordering = ['document', ]
+        filtering = { 
+            "name": ALL,
+            "rfc": ALL,
+            "author_count": ALL,
+            "pages": ALL,
+            "words": ALL,
+            "formats": ALL,
+            "formal_languages": ALL,
+            "citations": ALL,
+            "time": ALL,
+            "updated": ALL,
+            "document": ALL_WITH_RELATIONS,
+        }
+api.stats.register(DocumentStatsResource())
+
+class DocumentYearStatsResource(ModelResource):
+    document         = ToOneField(DocumentStatsResource, 'document')
+    class Meta:
+        queryset = DocumentYearStats.objects.all()
+        serializer = api.Serializer()
+        cache = SimpleCache()
+        #resource_name = 'documentyearstats'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "year": ALL,
+            "document": ALL_WITH_RELATIONS,
+        }
+api.stats.register(DocumentYearStatsResource())
+
+class AuthorStatsResource(ModelResource):
+    document         = ToOneField(DocumentStatsResource, 'document')
+    person           = ToOneField(PersonResource, 'person')
+    class Meta:
+        queryset = AuthorStats.objects.all()
+        serializer = api.Serializer()
+        cache = SimpleCache()
+        #resource_name = 'authorstats'
+        ordering = ['id', ]
+        filtering = { 
+            "id": ALL,
+            "name": ALL,
+            "affiliation": ALL,
+            "country": ALL,
+            "document": ALL_WITH_RELATIONS,
+            "person": ALL_WITH_RELATIONS,
+        }
+api.stats.register(AuthorStatsResource())
@@ -19,7 +19,7 @@ from ietf.utils.test_utils import login_testing_unauthorized, TestCase
 import ietf.stats.views
 
 from ietf.submit.models import Submission
-from ietf.doc.factories import WgDraftFactory, WgRfcFactory
+from ietf.doc.factories import WgDraftFactory, WgRfcFactory, DocEventFactory
 from ietf.doc.models import Document, DocAlias, State, RelatedDocument, NewRevisionDocEvent, DocumentAuthor
 from ietf.group.factories import RoleFactory
 from ietf.meeting.factories import MeetingFactory
@@ -27,8 +27,8 @@ from ietf.person.factories import PersonFactory
 from ietf.person.models import Person, Email
 from ietf.name.models import FormalLanguageName, DocRelationshipName, CountryName
 from ietf.review.factories import ReviewRequestFactory, ReviewerSettingsFactory, ReviewAssignmentFactory
-from ietf.stats.models import MeetingRegistration, CountryAlias
-from ietf.stats.utils import get_meeting_registration_data
+from ietf.stats.models import MeetingRegistration, CountryAlias, DocumentStats
+from ietf.stats.utils import get_meeting_registration_data, update_document_stats, update_changed_document_stats
 
 
 class StatisticsTests(TestCase):
@@ -92,6 +92,21 @@ class StatisticsTests(TestCase):
             time=datetime.datetime.now() - datetime.timedelta(days=1000)
         )
 
+        self.assertEqual(update_document_stats(), Document.objects.filter(type="draft").count())
+        stats = DocumentStats.objects.get(document=draft)
+        self.assertFalse(stats.rfc)
+        self.assertEqual(stats.words, 4000)
+        self.assertEqual(stats.formats, "TXT")
+        self.assertEqual(stats.formal_languages, FormalLanguageName.objects.get(slug="xml").name)
+        self.assertEqual(stats.citations, 1)
+        self.assertTrue(stats.years.exists())
+        self.assertTrue(stats.authors.filter(affiliation="IETF", country="Germany").exists())
+
+        # documents with new events are updated
+        draft.formal_languages.clear()
+        DocEventFactory(doc=draft)
+        self.assertGreaterEqual(update_changed_document_stats(), 1)
+        self.assertEqual(DocumentStats.objects.get(document=draft).formal_languages, "")
 
         # check redirect
         url = urlreverse(ietf.stats.views.document_stats)
@@ -2,16 +2,23 @@
 # -*- coding: utf-8 -*-
 
 
+import itertools
+import os
 import re
 import requests
 from collections import defaultdict
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max
 
 import debug                            # pyflakes:ignore
 
-from ietf.stats.models import AffiliationAlias, AffiliationIgnoredEnding, CountryAlias, MeetingRegistration
+from ietf.doc.models import Document, DocAlias, DocEvent, DocumentAuthor, RelatedDocument
+from ietf.stats.models import ( AffiliationAlias, AffiliationIgnoredEnding, CountryAlias, MeetingRegistration,
+    DocumentStats, DocumentYearStats, AuthorStats )
+from ietf.submit.models import Submission
 from ietf.name.models import CountryName
 from ietf.person.models import Person, Email, Alias
 from ietf.person.name import unidecode_name
@@ -221,6 +228,113 @@ def compute_hirsch_index(citation_counts):
     return i
 
 
+CITATION_RELATIONSHIPS = ['refnorm', 'refinfo', 'refunk', 'refold']
+
+def _formats_on_disk(filenames, list_dirs=False):
+    """Return a dictionary from the given file names without extension to the
+    upper-cased extensions of the document files found for them."""
+    found = defaultdict(set)
+    dirs = [settings.INTERNET_ALL_DRAFTS_ARCHIVE_DIR, settings.RFC_PATH]
+    if list_dirs:
+        # cheaper than checking each file when going through the whole corpus
+        for filename in itertools.chain.from_iterable(os.listdir(d) for d in dirs):
+            t = filename.split(".", 1)
+            if len(t) == 2 and t[0] in filenames and t[1].lower() in settings.DOCUMENT_FORMAT_WHITELIST:
+                found[t[0]].add(t[1].upper())
+    else:
+        for filename in filenames:
+            for ext in settings.DOCUMENT_FORMAT_WHITELIST:
+                if any(os.path.exists(os.path.join(d, "{}.{}".format(filename, ext))) for d in dirs):
+                    found[filename].add(ext.upper())
+    return found
+
+def update_document_stats(doc_ids=None, batch_size=1000):
+    """Rebuild the DocumentStats, DocumentYearStats and AuthorStats rows of
+    the drafts and RFCs with the given ids, or of all of them.  Returns the
+    number of documents updated."""
+    docs = Document.objects.filter(type="draft")
+    if doc_ids is None:
+        DocumentStats.objects.exclude(document__in=docs).delete()
+    else:
+        docs = docs.filter(pk__in=doc_ids)
+    ids = list(docs.order_by("pk").values_list("pk", flat=True))
+
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+
+        rfc_ids = set(Document.objects.filter(pk__in=batch, states__type="draft", states__slug="rfc").values_list("pk", flat=True))
+
+        rfc_names = {}
+        for doc_id, name in DocAlias.docs.through.objects.filter(document__in=batch, docalias__name__startswith="rfc").values_list("document", "docalias__name"):
+            rfc_names[doc_id] = name
+
+        authors = defaultdict(list)
+        for doc_id, person_id, name, affiliation, country in DocumentAuthor.objects.filter(document__in=batch).values_list("document", "person", "person__name", "affiliation", "country"):
+            authors[doc_id].append(AuthorStats(document_id=doc_id, person_id=person_id, name=name, affiliation=affiliation, country=country))
+
+        citations = dict(RelatedDocument.objects.filter(
+            relationship__in=CITATION_RELATIONSHIPS, target__docs__in=batch,
+        ).values_list("target__docs").annotate(Count("pk")))
+
+        formal_languages = defaultdict(list)
+        for doc_id, name in Document.formal_languages.through.objects.filter(document__in=batch).values_list("document", "formallanguagename__name").order_by("formallanguagename__name"):
+            formal_languages[doc_id].append(name)
+
+        times = {}
+        years = defaultdict(set)
+        for doc_id, time in DocEvent.objects.filter(doc__in=batch, type__in=["published_rfc", "new_revision"]).values_list("doc", "time"):
+            times[doc_id] = max(time, times.get(doc_id, time))
+            years[doc_id].add(time.year)
+
+        # on new documents, we should have a Submission row with the file
+        # types, the rest are looked up on disk
+        file_types = dict(Submission.objects.filter(draft__in=batch).values_list("draft", "file_types").order_by("submission_date", "id"))
+
+        stats = []
+        missing_formats = {}
+        for doc_id, name, rev, pages, words in Document.objects.filter(pk__in=batch).values_list("pk", "name", "rev", "pages", "words"):
+            formats = { ext.lstrip(".").upper() for ext in file_types.get(doc_id, "").split(",") if ext }
+            stats.append(DocumentStats(
+                document_id=doc_id,
+                name=rfc_names.get(doc_id, name),
+                rfc=doc_id in rfc_ids,
+                author_count=len(authors[doc_id]),
+                pages=pages,
+                words=words,
+                formats=",".join(sorted(formats)),
+                formal_languages=",".join(formal_languages[doc_id]),
+                citations=citations.get(doc_id, 0),
+                time=times.get(doc_id),
+            ))
+            if not formats:
+                s = stats[-1]
+                missing_formats[s.name if s.name.startswith("rfc") else "{}-{}".format(s.name, rev)] = s
+
+        for filename, formats in _formats_on_disk(missing_formats, list_dirs=doc_ids is None).items():
+            missing_formats[filename].formats = ",".join(sorted(formats))
+
+        with transaction.atomic():
+            DocumentStats.objects.filter(document__in=batch).delete()
+            DocumentStats.objects.bulk_create(stats)
+            DocumentYearStats.objects.bulk_create(DocumentYearStats(document_id=doc_id, year=year) for doc_id in batch for year in sorted(years[doc_id]))
+            AuthorStats.objects.bulk_create(a for doc_id in batch for a in authors[doc_id])
+
+    return len(ids)
+
+def update_changed_document_stats():
+    """Update the document statistics of the drafts and RFCs with events
+    since the last update, and of the documents they cite.  If there are no
+    statistics yet, they are built from scratch."""
+    last_update = DocumentStats.objects.aggregate(Max("updated"))["updated__max"]
+    if last_update is None:
+        return update_document_stats()
+    changed = set(DocEvent.objects.filter(doc__type="draft", time__gte=last_update).values_list("doc", flat=True).distinct())
+    changed.update(RelatedDocument.objects.filter(
+        source__in=changed, relationship__in=CITATION_RELATIONSHIPS, target__docs__type="draft",
+    ).values_list("target__docs", flat=True))
+    return update_document_stats(changed) if changed else 0
+
+
 def get_meeting_registration_data(meeting):
     """"Retrieve registration attendee data and summary statistics.  Returns number
     of Registration records created.
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 
+import hashlib
 import io
 import os
 import re
@@ -9,8 +10,11 @@ import shutil
 import sys
 import tempfile
 
+from typing import Dict, Tuple        # pyflakes:ignore
+from concurrent.futures import ThreadPoolExecutor
 from xym import xym
 from django.conf import settings
+from django.core.cache import caches
 
 import debug                            # pyflakes:ignore
 
@@ -117,11 +121,51 @@ class DraftIdnitsChecker(object):
 
         return passed, message, errors, warnings, info
 
+# File digests for yang_library_fingerprint(), by path, with the size and
+# modification time they were computed for
+_library_file_digests = {}          # type: Dict[str, Tuple[Tuple[int, int], str]]
+
+def yang_library_fingerprint(dirs, exclude=(), remember=True):
+    """
+    Return a digest of the names and contents of the files in the given yang
+    library directories, leaving out the file names in exclude.  Unless remember
+    is False, file digests are remembered by file size and modification time, so
+    that only new or changed files need to be read on later calls.
+    """
+    sha = hashlib.sha256()
+    for dir in dirs:
+        sha.update(b'\0')
+        if not os.path.isdir(dir):
+            continue
+        for entry in sorted(os.scandir(dir), key=lambda e: e.name):
+            if not entry.is_file() or entry.name in exclude:
+                continue
+            stat = entry.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+            known = _library_file_digests.get(entry.path)
+            if known and known[0] == signature:
+                digest = known[1]
+            else:
+                with io.open(entry.path, 'rb') as file:
+                    digest = hashlib.sha256(file.read()).hexdigest()
+                if remember:
+                    _library_file_digests[entry.path] = (signature, digest)
+            sha.update(entry.name.encode('utf-8'))
+            sha.update(digest.encode('ascii'))
+    return sha.hexdigest()
+
 class DraftYangChecker(object):
 
     name = "yang validation"
     symbol = '<span class="large">\u262f</span>'
 
+    def __init__(self):
+        # Look up the tool versions up front, so that the checks themselves, which
+        # may run in worker threads, don't need database access.
+        self.versions = dict(VersionInfo.objects.values_list('command', 'version'))
+        self.cache_hits = 0
+        self.cache_misses = 0
+
     def check_file_txt(self, path):
         name = os.path.basename(path)
         workdir = tempfile.mkdtemp()
@@ -177,7 +221,7 @@ class DraftYangChecker(object):
         model_list = list(set(model_list))
 
         command = "xym"
-        cmd_version = VersionInfo.objects.get(command=command).version
+        cmd_version = self.versions[command]
         message = "%s:\n%s\n\n" % (cmd_version, out.replace('\n\n','\n').strip() if code == 0 else err)
 
         results.append({
@@ -189,109 +233,161 @@ class DraftYangChecker(object):
             "items": [],
         })
 
-        for model in model_list:
-            path = os.path.join(workdir, model)
-            message = ""
-            passed = True
-            errors = 0
-            warnings = 0
-            items = []
-            modpath = ':'.join([
-                                workdir,
-                                settings.SUBMIT_YANG_RFC_MODEL_DIR,
-                                settings.SUBMIT_YANG_DRAFT_MODEL_DIR,
-                                settings.SUBMIT_YANG_IANA_MODEL_DIR,
-                                settings.SUBMIT_YANG_CATALOG_MODEL_DIR,
-                            ])
-            if os.path.exists(path):
-                with io.open(path) as file:
-                    text = file.readlines()
-                # pyang
-                cmd_template = settings.SUBMIT_PYANG_COMMAND
+        venv_path = os.environ.get('VIRTUAL_ENV') or os.path.join(os.getcwd(), 'env')
+        venv_bin = os.path.join(venv_path, 'bin')
+        if not venv_bin in os.environ.get('PATH', '').split(':'):
+            os.environ['PATH'] = os.environ.get('PATH', '') + ":" + venv_bin
+
+        # The validation results depend on the other extracted models and the yang
+        # libraries as well as on the model itself, so fingerprint them before the
+        # validated models are moved into the draft library.  Library copies of the
+        # extracted models are shadowed by the extracted ones, so leave them out.
+        fingerprint = ':'.join([
+            yang_library_fingerprint([workdir], remember=False),
+            yang_library_fingerprint([
+                settings.SUBMIT_YANG_RFC_MODEL_DIR,
+                settings.SUBMIT_YANG_DRAFT_MODEL_DIR,
+                settings.SUBMIT_YANG_IANA_MODEL_DIR,
+                settings.SUBMIT_YANG_CATALOG_MODEL_DIR,
+            ], exclude=set(model_list)),
+        ])
+
+        # Each model is validated by external tools, so validate them in parallel
+        with ThreadPoolExecutor(max_workers=settings.IDSUBMIT_CHECKER_WORKERS) as executor:
+            checked = list(executor.map(lambda model: self.check_model(workdir, model, fingerprint), model_list))
+        results.extend(result for result, cached in checked)
+        self.cache_hits += sum(1 for result, cached in checked if cached)
+        self.cache_misses += sum(1 for result, cached in checked if not cached)
+
+        shutil.rmtree(workdir)
+
+        passed  = all( res["passed"] for res in results )
+        message = "\n".join([ "\n".join([res['name']+':', res["message"]]) for res in results ])
+        errors  = sum(res["errors"] for res in results )
+        warnings  = sum(res["warnings"] for res in results )
+        items  = [ e for res in results for e in res["items"] ]
+        info['items'] = items
+        info['code']['yang'] = model_list
+        return passed, message, errors, warnings, info
+
+    def validation_cache_key(self, model, digest, fingerprint):
+        """
+        Return the validation cache key for a model with the given name and content
+        digest, validated against libraries with the given fingerprint.
+        """
+        parts = [model, digest, fingerprint]
+        cmd_templates = [settings.SUBMIT_PYANG_COMMAND]
+        if settings.SUBMIT_YANGLINT_COMMAND and os.path.exists(settings.YANGLINT_BINARY):
+            cmd_templates.append(settings.SUBMIT_YANGLINT_COMMAND)
+        for cmd_template in cmd_templates:
+            command = [ w for w in cmd_template.split() if not '=' in w ][0]
+            parts += [cmd_template, self.versions.get(command, '')]
+        return 'yang:%s' % hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def check_model(self, workdir, model, fingerprint):
+        """
+        Validate a single extracted yang model with pyang and yanglint, and return
+        a result summary and whether it came from the validation cache.  The model
+        file is moved to the draft model directory.
+        """
+        path = os.path.join(workdir, model)
+        dest = os.path.join(settings.SUBMIT_YANG_DRAFT_MODEL_DIR, model)
+        cache = caches['yangvalidation']
+        cache_key = None
+        if os.path.exists(path):
+            with io.open(path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+            cache_key = self.validation_cache_key(model, digest, fingerprint)
+            result = cache.get(cache_key)
+            if result is not None:
+                shutil.move(path, dest)
+                return result, True
+        message = ""
+        passed = True
+        errors = 0
+        warnings = 0
+        items = []
+        modpath = ':'.join([
+                            workdir,
+                            settings.SUBMIT_YANG_RFC_MODEL_DIR,
+                            settings.SUBMIT_YANG_DRAFT_MODEL_DIR,
+                            settings.SUBMIT_YANG_IANA_MODEL_DIR,
+                            settings.SUBMIT_YANG_CATALOG_MODEL_DIR,
+                        ])
+        if os.path.exists(path):
+            with io.open(path) as file:
+                text = file.readlines()
+            # pyang
+            cmd_template = settings.SUBMIT_PYANG_COMMAND
+            command = [ w for w in cmd_template.split() if not '=' in w ][0]
+            cmd_version = self.versions[command]
+            cmd = cmd_template.format(libs=modpath, model=path)
+            code, out, err = pipe(cmd)
+            out = out.decode('utf-8')
+            err = err.decode('utf-8')
+            if code > 0 or len(err.strip()) > 0 :
+                error_lines = err.splitlines()
+                assertion('len(error_lines) > 0')
+                for line in error_lines:
+                    if line.strip():
+                        try:
+                            fn, lnum, msg = line.split(':', 2)
+                            lnum = int(lnum)
+                            if fn == model and (lnum-1) in range(len(text)):
+                                line = text[lnum-1].rstrip()
+                            else:
+                                line = None
+                            items.append((lnum, line, msg))
+                            if 'error: ' in msg:
+                                errors += 1
+                            if 'warning: ' in msg:
+                                warnings += 1
+                        except ValueError:
+                            pass
+            #passed = passed and code == 0 # For the submission tool.  Yang checks always pass
+            message += "%s: %s:\n%s\n" % (cmd_version, cmd_template, out+"No validation errors\n" if (code == 0 and len(err) == 0) else out+err)
+
+            # yanglint
+            set_coverage_checking(False) # we can't count the following as it may or may not be run, depending on setup
+            if settings.SUBMIT_YANGLINT_COMMAND and os.path.exists(settings.YANGLINT_BINARY):
+                cmd_template = settings.SUBMIT_YANGLINT_COMMAND
                 command = [ w for w in cmd_template.split() if not '=' in w ][0]
-                cmd_version = VersionInfo.objects.get(command=command).version
-                cmd = cmd_template.format(libs=modpath, model=path)
-                venv_path = os.environ.get('VIRTUAL_ENV') or os.path.join(os.getcwd(), 'env')
-                venv_bin = os.path.join(venv_path, 'bin')
-                if not venv_bin in os.environ.get('PATH', '').split(':'):
-                    os.environ['PATH'] = os.environ.get('PATH', '') + ":" + venv_bin
+                cmd_version = self.versions[command]
+                cmd = cmd_template.format(model=path, rfclib=settings.SUBMIT_YANG_RFC_MODEL_DIR, tmplib=workdir,
+                    draftlib=settings.SUBMIT_YANG_DRAFT_MODEL_DIR, ianalib=settings.SUBMIT_YANG_IANA_MODEL_DIR,
+                    cataloglib=settings.SUBMIT_YANG_CATALOG_MODEL_DIR, )
                 code, out, err = pipe(cmd)
                 out = out.decode('utf-8')
                 err = err.decode('utf-8')
-                if code > 0 or len(err.strip()) > 0 :
-                    error_lines = err.splitlines()
-                    assertion('len(error_lines) > 0')
-                    for line in error_lines:
+                if code > 0 or len(err.strip()) > 0:
+                    err_lines = err.splitlines()
+                    for line in err_lines:
                         if line.strip():
                             try:
-                                fn, lnum, msg = line.split(':', 2)
-                                lnum = int(lnum)
-                                if fn == model and (lnum-1) in range(len(text)):
-                                    line = text[lnum-1].rstrip()
-                                else:
-                                    line = None
-                                items.append((lnum, line, msg))
-                                if 'error: ' in msg:
+                                if 'err : ' in line:
                                     errors += 1
-                                if 'warning: ' in msg:
+                                if 'warn: ' in line:
                                     warnings += 1
                             except ValueError:
                                 pass
                 #passed = passed and code == 0 # For the submission tool.  Yang checks always pass
                 message += "%s: %s:\n%s\n" % (cmd_version, cmd_template, out+"No validation errors\n" if (code == 0 and len(err) == 0) else out+err)
+            set_coverage_checking(True)
+        else:
+            errors += 1
+            message += "No such file: %s\nPossible mismatch between extracted xym file name and returned module name?\n" % (path)
 
-                # yanglint
-                set_coverage_checking(False) # we can't count the following as it may or may not be run, depending on setup
-                if settings.SUBMIT_YANGLINT_COMMAND and os.path.exists(settings.YANGLINT_BINARY):
-                    cmd_template = settings.SUBMIT_YANGLINT_COMMAND
-                    command = [ w for w in cmd_template.split() if not '=' in w ][0]
-                    cmd_version = VersionInfo.objects.get(command=command).version
-                    cmd = cmd_template.format(model=path, rfclib=settings.SUBMIT_YANG_RFC_MODEL_DIR, tmplib=workdir,
-                        draftlib=settings.SUBMIT_YANG_DRAFT_MODEL_DIR, ianalib=settings.SUBMIT_YANG_IANA_MODEL_DIR,
-                        cataloglib=settings.SUBMIT_YANG_CATALOG_MODEL_DIR, )
-                    code, out, err = pipe(cmd)
-                    out = out.decode('utf-8')
-                    err = err.decode('utf-8')
-                    if code > 0 or len(err.strip()) > 0:
-                        err_lines = err.splitlines()
-                        for line in err_lines:
-                            if line.strip():
-                                try:
-                                    if 'err : ' in line:
-                                        errors += 1
-                                    if 'warn: ' in line:
-                                        warnings += 1
-                                except ValueError:
-                                    pass
-                    #passed = passed and code == 0 # For the submission tool.  Yang checks always pass
-                    message += "%s: %s:\n%s\n" % (cmd_version, cmd_template, out+"No validation errors\n" if (code == 0 and len(err) == 0) else out+err)
-                set_coverage_checking(True)
-            else:
-                errors += 1
-                message += "No such file: %s\nPossible mismatch between extracted xym file name and returned module name?\n" % (path)
-
-            dest = os.path.join(settings.SUBMIT_YANG_DRAFT_MODEL_DIR, model)
-            shutil.move(path, dest)
-
-            # summary result
-            results.append({
-                "name": model,
-                "passed":  passed,
-                "message": message,
-                "warnings": warnings,
-                "errors":  errors,
-                "items": items,
-            })
-
-
-        shutil.rmtree(workdir)
-
-        passed  = all( res["passed"] for res in results )
-        message = "\n".join([ "\n".join([res['name']+':', res["message"]]) for res in results ])
-        errors  = sum(res["errors"] for res in results )
-        warnings  = sum(res["warnings"] for res in results )
-        items  = [ e for res in results for e in res["items"] ]
-        info['items'] = items
-        info['code']['yang'] = model_list
-        return passed, message, errors, warnings, info
+        shutil.move(path, dest)
 
+        # summary result
+        result = {
+            "name": model,
+            "passed":  passed,
+            "message": message,
+            "warnings": warnings,
+            "errors":  errors,
+            "items": items,
+        }
+        if cache_key:
+            cache.set(cache_key, result, settings.SUBMIT_YANG_VALIDATION_CACHE_TIME)
+        return result, False
@@ -0,0 +1,35 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+
+
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import debug                            # pyflakes:ignore
+
+from ietf.submit.utils import rerun_stuck_submission_checks
+
+class Command(BaseCommand):
+    help = """
+
+    Run the submission checkers again on submissions left in the 'checking'
+    state, which happens when the process running the background checks of
+    an upload (see settings.IDSUBMIT_CHECK_IN_BACKGROUND) is restarted
+    before they complete.
+
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=settings.IDSUBMIT_CHECK_STUCK_AFTER,
+            help="Seconds a submission must have been checking for (default %(default)s).",
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 0:
+            raise CommandError('--older-than must not be negative')
+        submissions = rerun_stuck_submission_checks(datetime.timedelta(seconds=options['older_than']))
+        if options['verbosity'] > 1 or (options['verbosity'] > 0 and submissions):
+            self.stdout.write('Ran the checks again for %s submissions' % len(submissions))
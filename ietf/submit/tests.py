@@ -16,6 +16,7 @@ from pyquery import PyQuery
 from pathlib import Path
 
 from django.conf import settings
+from django.core.management import call_command
 from django.test import override_settings
 from django.test.client import RequestFactory
 from django.urls import reverse as urlreverse
@@ -24,7 +25,7 @@ from django.utils.encoding import force_str, force_text
 import debug                            # pyflakes:ignore
 
 from ietf.submit.utils import (expirable_submissions, expire_submission, find_submission_filenames,
-                               post_submission)
+                               post_submission, rerun_stuck_submission_checks, run_submission_checks, submission_file_names)
 from ietf.doc.factories import DocumentFactory, WgDraftFactory, IndividualDraftFactory, IndividualRfcFactory
 from ietf.doc.models import ( Document, DocAlias, DocEvent, State,
     BallotPositionDocEvent, DocumentAuthor, SubmissionDocEvent )
@@ -38,6 +39,7 @@ from ietf.message.models import Message
 from ietf.name.models import FormalLanguageName
 from ietf.person.models import Person
 from ietf.person.factories import UserFactory, PersonFactory, EmailFactory
+from ietf.submit.checkers import DraftYangChecker
 from ietf.submit.factories import SubmissionFactory, SubmissionExtResourceFactory
 from ietf.submit.models import Submission, Preapproval, SubmissionExtResource
 from ietf.submit.mail import add_submission_email, process_response_email
@@ -902,6 +904,68 @@ class SubmitTests(BaseSubmitTestCase):
         self.assertEqual(docauth.country, '')
         self.verify_bibxml_ids_creation(doc)
 
+    @override_settings(IDSUBMIT_CHECK_IN_BACKGROUND=True)
+    def test_submit_with_background_checks(self):
+        name = "draft-authorname-testing-background-checks"
+        rev = "00"
+        author = PersonFactory()
+        with mock.patch('ietf.submit.utils.transaction.on_commit') as mock_on_commit:
+            r = self.create_and_post_submission(name, rev, author)
+        self.assertTrue(mock_on_commit.called)
+        status_url = r["Location"]
+
+        submission = Submission.objects.get(name=name)
+        self.assertEqual(submission.state_id, "checking")
+        self.assertEqual(submission.checks.count(), 0)
+
+        r = self.client.get(status_url)
+        self.assertEqual(r.status_code, 200)
+        self.assertContains(r, "submission checks are still running")
+        q = PyQuery(r.content)
+        self.assertEqual(len(q('meta[http-equiv="refresh"]')), 1)
+
+        # the checks are run by the background executor after the upload has been
+        # committed, which doesn't happen in tests.  Submissions left checking,
+        # as after a restart, get their checks run again, but not right away.
+        self.assertEqual(rerun_stuck_submission_checks(), [])
+        self.assertEqual(submission_file_names(submission)['txt'], os.path.join(self.staging_dir, "%s-%s.txt" % (name, rev)))
+        submission.submissionevent_set.update(time=datetime.datetime.now() - datetime.timedelta(hours=1))
+        call_command('requeue_submission_checks', verbosity=0)
+
+        submission = Submission.objects.get(pk=submission.pk)
+        self.assertEqual(submission.state_id, "uploaded")
+        self.assertEqual(submission.checks.count(), len(settings.IDSUBMIT_CHECKER_CLASSES))
+
+        r = self.client.get(status_url)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotContains(r, "submission checks are still running")
+        q = PyQuery(r.content)
+        self.assertEqual(len(q('meta[http-equiv="refresh"]')), 0)
+
+    @override_settings(IDSUBMIT_CHECK_IN_BACKGROUND=True)
+    def test_submit_with_failing_background_checks(self):
+        name = "draft-authorname-testing-failing-checks"
+        rev = "00"
+        with mock.patch('ietf.submit.utils.transaction.on_commit'):
+            self.create_and_post_submission(name, rev, PersonFactory())
+        submission = Submission.objects.get(name=name)
+        file_name = submission_file_names(submission)
+
+        # a crashed checker leaves the submission checking, rather than
+        # letting it through without the checks
+        with mock.patch('ietf.submit.utils.apply_checkers', side_effect=RuntimeError("checker crashed")):
+            with self.assertRaises(RuntimeError):
+                run_submission_checks(submission.pk, file_name)
+            self.assertEqual(Submission.objects.get(pk=submission.pk).state_id, "checking")
+
+            # and when it crashes again, the checks are recorded as failed
+            submission.submissionevent_set.update(time=datetime.datetime.now() - datetime.timedelta(hours=1))
+            self.assertEqual(rerun_stuck_submission_checks(), [submission])
+        submission = Submission.objects.get(pk=submission.pk)
+        self.assertEqual(submission.state_id, "uploaded")
+        self.assertEqual([c.passed for c in submission.checks.all()], [False])
+        self.assertIn("checker crashed", submission.checks.first().message)
+
     def test_submit_new_draft_no_org_or_address_txt(self):
         self.submit_new_draft_no_org_or_address(['txt'])
 
@@ -1809,6 +1873,33 @@ class SubmitTests(BaseSubmitTestCase):
         if settings.SUBMIT_YANGLINT_COMMAND and os.path.exists(settings.YANGLINT_BINARY):
             self.assertIn("No validation errors", m)
 
+    @override_settings(CACHES=dict(settings.CACHES, yangvalidation={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}))
+    def test_yang_validation_cache(self):
+        name = "draft-yang-testing-invalid"
+        rev = "00"
+        path = os.path.join(self.staging_dir, "%s-%s.txt" % (name, rev))
+        with io.open(path, 'w') as file:
+            file.write(submission_file(name, rev, None, "txt", "test_submission_invalid_yang.txt")[0].read())
+
+        checker = DraftYangChecker()
+        passed, message, errors, warnings, info = checker.check_file_txt(path)
+        self.assertEqual((checker.cache_hits, checker.cache_misses), (0, 1))
+        self.assertEqual(errors, 1)
+
+        # an unchanged model is not validated again
+        checker = DraftYangChecker()
+        with mock.patch('ietf.submit.checkers.pipe') as mock_pipe:
+            self.assertEqual(checker.check_file_txt(path), (passed, message, errors, warnings, info))
+        self.assertFalse(mock_pipe.called)
+        self.assertEqual((checker.cache_hits, checker.cache_misses), (1, 0))
+
+        # a change in the yang libraries invalidates the cached result
+        with io.open(os.path.join(settings.SUBMIT_YANG_RFC_MODEL_DIR, 'ietf-test@2021-01-01.yang'), 'w') as file:
+            file.write('module ietf-test { }\n')
+        checker = DraftYangChecker()
+        checker.check_file_txt(path)
+        self.assertEqual((checker.cache_hits, checker.cache_misses), (0, 1))
+
     def submit_conflicting_submissiondocevent_rev(self, new_rev='01', existing_rev='01'):
         """Test submitting a rev when an equal or later SubmissionDocEvent rev exists
 
@@ -9,12 +9,14 @@ import pathlib
 import re
 import time
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Callable, Optional # pyflakes:ignore
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email 
-from django.db import transaction
+from django.db import connections, transaction
+from django.db.models import Max, Q
 from django.http import HttpRequest     # pyflakes:ignore
 from django.utils.module_loading import import_string
 from django.template.loader import render_to_string
@@ -837,29 +839,120 @@ def fill_in_submission(form, submission, authors, abstract, file_size):
 
 def apply_checkers(submission, file_name):
     # run submission checkers
-    def apply_check(submission, checker, method, fn):
+    def apply_check(checker, method, fn):
+        lap = time.time()
         func = getattr(checker, method)
-        passed, message, errors, warnings, info = func(fn)
-        check = SubmissionCheck(submission=submission, checker=checker.name, passed=passed,
-                                message=message, errors=errors, warnings=warnings, items=info,
-                                symbol=checker.symbol)
-        check.save()
+        return func(fn), time.time() - lap
 
     mark = time.time()
+    checks = []
+    cache_hits = 0
+    cache_misses = 0
     for checker_path in settings.IDSUBMIT_CHECKER_CLASSES:
-        lap = time.time()
         checker_class = import_string(checker_path)
         checker = checker_class()
         # ordered list of methods to try
         for method in ("check_fragment_xml", "check_file_xml", "check_fragment_txt", "check_file_txt", ):
             ext = method[-3:]
             if hasattr(checker, method) and ext in file_name:
-                apply_check(submission, checker, method, file_name[ext])
+                checks.append((checker, method, file_name[ext]))
                 break
-        tau = time.time() - lap
-        log.log(f"ran {checker.__class__.__name__} ({tau:.3}s) for {file_name}")
+
+    # The checkers spend most of their time waiting for external tools, so run them
+    # concurrently.  The check results are saved from this thread, as the database
+    # connection can't be shared with the worker threads.
+    with ThreadPoolExecutor(max_workers=settings.IDSUBMIT_CHECKER_WORKERS) as executor:
+        futures = { executor.submit(apply_check, checker, method, fn): checker for checker, method, fn in checks }
+        for future in as_completed(futures):
+            checker = futures[future]
+            (passed, message, errors, warnings, info), tau = future.result()
+            check = SubmissionCheck(submission=submission, checker=checker.name, passed=passed,
+                                    message=message, errors=errors, warnings=warnings, items=info,
+                                    symbol=checker.symbol)
+            check.save()
+            # checkers with a result cache report how well it did
+            if hasattr(checker, 'cache_hits'):
+                cache_hits += checker.cache_hits
+                cache_misses += checker.cache_misses
+                log.log(f"ran {checker.__class__.__name__} ({tau:.3}s, cache hits {checker.cache_hits}, misses {checker.cache_misses}) for {file_name}")
+            else:
+                log.log(f"ran {checker.__class__.__name__} ({tau:.3}s) for {file_name}")
     tau = time.time() - mark
-    log.log(f"ran submission checks ({tau:.3}s) for {file_name}")
+    log.log(f"ran submission checks ({tau:.3}s, cache hits {cache_hits}, misses {cache_misses}) for {file_name}")
+
+def start_submission_checks(submission, file_name):
+    """Put an uploaded submission in the 'checking' state, and run the submission
+    checkers on it in the background once the current transaction has committed."""
+    submission.state = DraftSubmissionStateName.objects.get(slug="checking")
+    submission.save()
+    submission_id = submission.pk
+    transaction.on_commit(lambda: _background_check_executor.submit(_run_background_checks, submission_id, file_name))
+
+def run_submission_checks(submission_id, file_name):
+    """Run the submission checkers on a submission in the 'checking' state, and move
+    it to the 'uploaded' state when done, unless it has been moved on meanwhile.
+    If a checker fails, the submission is left in the 'checking' state, to be
+    picked up by rerun_stuck_submission_checks()."""
+    submission = Submission.objects.get(pk=submission_id)
+    try:
+        apply_checkers(submission, file_name)
+    except Exception as e:
+        log.log(f"Exception while running submission checks for submission {submission_id}: {e}")
+        raise
+    Submission.objects.filter(pk=submission_id, state_id="checking").update(state_id="uploaded")
+
+def submission_file_names(submission):
+    """Return the staged files of a submission by extension, like
+    get_draft_meta() does for an upload."""
+    file_name = {}
+    for ext in submission.file_types.split(','):
+        if ext:
+            file_name[ext.lstrip('.')] = os.path.join(settings.IDSUBMIT_STAGING_PATH, '%s-%s%s' % (submission.name, submission.rev, ext))
+    # the text rendering of an xml-only submission
+    txt = os.path.join(settings.IDSUBMIT_STAGING_PATH, '%s-%s.txt' % (submission.name, submission.rev))
+    if 'txt' not in file_name and os.path.exists(txt):
+        file_name['txt'] = txt
+    return file_name
+
+def rerun_stuck_submission_checks(older_than=None):
+    """Run the submission checkers again on the submissions which have been
+    in the 'checking' state for longer than older_than (a timedelta,
+    settings.IDSUBMIT_CHECK_STUCK_AFTER seconds by default).  That happens
+    when the process running the background checks was restarted before
+    they completed.  Returns the submissions."""
+    if older_than is None:
+        older_than = datetime.timedelta(seconds=settings.IDSUBMIT_CHECK_STUCK_AFTER)
+    cutoff = datetime.datetime.now() - older_than
+    submissions = list(Submission.objects.filter(state_id="checking")
+                       .annotate(last_event=Max("submissionevent__time"))
+                       .filter(Q(last_event__lt=cutoff) | Q(last_event__isnull=True, submission_date__lt=cutoff.date())))
+    for submission in submissions:
+        # drop the results of the interrupted run, and note the new one, which
+        # also keeps the next run from picking the submission up right away
+        SubmissionCheck.objects.filter(submission=submission).delete()
+        SubmissionEvent.objects.create(submission=submission, desc="Restarted the submission checks")
+        log.log(f"restarting the submission checks for submission {submission.pk}")
+        try:
+            run_submission_checks(submission.pk, submission_file_names(submission))
+        except Exception as e:
+            # failed a second time, so let the submitter and the secretariat
+            # see that the checks didn't pass rather than retrying for good
+            SubmissionCheck.objects.create(submission=submission, checker="submission checks", passed=False,
+                                           message="The submission checks could not be completed: %s" % e,
+                                           errors=1, warnings=0, items=[])
+            Submission.objects.filter(pk=submission.pk, state_id="checking").update(state_id="uploaded")
+    return submissions
+
+def _run_background_checks(submission_id, file_name):
+    try:
+        run_submission_checks(submission_id, file_name)
+    except Exception:
+        pass                            # logged, and left for rerun_stuck_submission_checks()
+    finally:
+        # don't leave connections opened by this thread behind
+        connections.close_all()
+
+_background_check_executor = ThreadPoolExecutor(max_workers=settings.IDSUBMIT_CHECKER_WORKERS)
 
 def accept_submission_requires_prev_auth_approval(submission):
     """Does acceptance process require approval of previous authors?"""
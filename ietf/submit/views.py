@@ -37,7 +37,7 @@ from ietf.submit.models import (Submission, Preapproval, SubmissionExtResource,
 from ietf.submit.utils import ( approvable_submissions_for_user, preapprovals_for_user,
     recently_approved_by_user, validate_submission, create_submission_event, docevent_from_submission,
     post_submission, cancel_submission, rename_submission_files, remove_submission_files, get_draft_meta,
-    get_submission, fill_in_submission, apply_checkers, save_files, 
+    get_submission, fill_in_submission, apply_checkers, start_submission_checks, save_files,
     check_submission_revision_consistency, accept_submission, accept_submission_requires_group_approval,
     accept_submission_requires_prev_auth_approval, update_submission_external_resources )
 from ietf.stats.utils import clean_country_name
@@ -64,7 +64,10 @@ def upload_submission(request):
                         submission.delete()
                     raise
 
-                apply_checkers(submission, file_name)
+                if settings.IDSUBMIT_CHECK_IN_BACKGROUND:
+                    start_submission_checks(submission, file_name)
+                else:
+                    apply_checkers(submission, file_name)
 
                 consistency_error = check_submission_revision_consistency(submission)
                 if consistency_error:
@@ -268,6 +271,8 @@ def submission_status(request, submission_id, access_token=None):
 
     if submission.state_id == "cancel":
         message = ('error', 'This submission has been cancelled, modification is no longer possible.')
+    elif submission.state_id == "checking":
+        message = ('success', 'The submission checks are still running. This page will be updated as they complete.')
     elif submission.state_id == "auth":
         message = ('success', 'The submission is pending email authentication. An email has been sent to: %s' % ", ".join(confirmation_list))
     elif submission.state_id == "grp-appr":
@@ -4,17 +4,24 @@
 
 import base64
 import datetime
+import hashlib
 import re
 import requests
 
 from urllib.parse import urlencode
 from xml.dom import pulldom, Node
+from xml.etree import ElementTree
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.utils.encoding import smart_bytes, force_str, force_text
 
 import debug                            # pyflakes:ignore
 
+import ietf
+
 from ietf.doc.models import ( Document, DocAlias, State, StateType, DocEvent, DocRelationshipName,
     DocTagName, DocTypeName, RelatedDocument )
 from ietf.doc.expire import move_draft_files_to_archive
@@ -236,8 +243,15 @@ def update_drafts_from_queue(drafts):
     return changed, warnings
 
 
-def parse_index(response):
-    """Parse RFC Editor index XML into a bunch of tuples."""
+def iter_index(response, also_list=None):
+    """Parse RFC Editor index XML incrementally, yielding a tuple for each
+    RFC entry as it is read.  Elements are discarded once processed, so
+    memory use doesn't grow with the size of the index.
+
+    The also list of an entry holds the sub-series documents it is part of,
+    as given by the entry itself and by the bcp/fyi/std entries read before
+    it.  Pass in a dict as also_list to collect the sub-series membership
+    from all of the index, see parse_index()."""
 
     def normalize_std_name(std_name):
         # remove zero padding
@@ -249,21 +263,35 @@ def parse_index(response):
                 pass
         return std_name
 
-    def extract_doc_list(parentNode, tagName):
+    def get_child_text(parent, tag_name):
+        return '\n\n'.join(child.text or "" for child in parent if child.tag == tag_name)
+
+    def extract_doc_list(parent, tag_name):
         l = []
-        for u in parentNode.getElementsByTagName(tagName):
-            for d in u.getElementsByTagName("doc-id"):
-                l.append(normalize_std_name(d.firstChild.data))
+        for u in parent.iter(tag_name):
+            for d in u.iter("doc-id"):
+                l.append(normalize_std_name(d.text))
         return l
 
-    also_list = {}
-    data = []
-    events = pulldom.parse(response)
-    for event, node in events:
+    if also_list is None:
+        also_list = {}
+    depth = 0
+    context = ElementTree.iterparse(response, events=("start", "end"))
+    for event, node in context:
+        if event == "start":
+            if depth == 0:
+                root = node
+            depth += 1
+            continue
+
+        depth -= 1
+        # drop the namespace, all of the index is in the same one
+        node.tag = node.tag.rsplit("}", 1)[-1]
+        if depth != 1:
+            continue
+
         try:
-            if event == pulldom.START_ELEMENT and node.tagName in ["bcp-entry", "fyi-entry", "std-entry"]:
-                events.expandNode(node)
-                node.normalize()
+            if node.tag in ["bcp-entry", "fyi-entry", "std-entry"]:
                 bcpid = normalize_std_name(get_child_text(node, "doc-id"))
                 doclist = extract_doc_list(node, "is-also")
                 for docid in doclist:
@@ -272,17 +300,15 @@ def parse_index(response):
                     else:
                         also_list[docid] = [bcpid]
 
-            elif event == pulldom.START_ELEMENT and node.tagName == "rfc-entry":
-                events.expandNode(node)
-                node.normalize()
+            elif node.tag == "rfc-entry":
                 rfc_number = int(get_child_text(node, "doc-id")[3:])
                 title = get_child_text(node, "title")
 
                 authors = []
-                for author in node.getElementsByTagName("author"):
+                for author in node.iter("author"):
                     authors.append(get_child_text(author, "name"))
 
-                d = node.getElementsByTagName("date")[0]
+                d = next(node.iter("date"))
                 year = int(get_child_text(d, "year"))
                 month = get_child_text(d, "month")
                 month = ["January","February","March","April","May","June","July","August","September","October","November","December"].index(month)+1
@@ -301,39 +327,124 @@ def parse_index(response):
                     wg = None
 
                 l = []
-                for fmt in node.getElementsByTagName("format"):
+                for fmt in node.iter("format"):
                     l.append(get_child_text(fmt, "file-format"))
                 file_formats = (",".join(l)).lower()
 
                 abstract = ""
-                for abstract in node.getElementsByTagName("abstract"):
+                for abstract in node.iter("abstract"):
                     abstract = get_child_text(abstract, "p")
 
                 draft = get_child_text(node, "draft")
                 if draft and re.search(r"-\d\d$", draft):
                     draft = draft[0:-3]
 
-                if len(node.getElementsByTagName("errata-url")) > 0:
+                if next(node.iter("errata-url"), None) is not None:
                     has_errata = 1
                 else:
                     has_errata = 0
 
-                data.append((rfc_number,title,authors,rfc_published_date,current_status,updates,updated_by,obsoletes,obsoleted_by,[],draft,has_errata,stream,wg,file_formats,pages,abstract))
+                also = []
+                for docid in extract_doc_list(node, "is-also") + also_list.get("RFC%04d" % rfc_number, []):
+                    if docid not in also:
+                        also.append(docid)
+
+                yield (rfc_number,title,authors,rfc_published_date,current_status,updates,updated_by,obsoletes,obsoleted_by,also,draft,has_errata,stream,wg,file_formats,pages,abstract)
         except Exception as e:
             log("Exception when processing an RFC index entry: %s" % e)
-            log("node: %s" % node)
+            log("node: %s" % ElementTree.tostring(node, encoding="unicode"))
             raise
+        finally:
+            root.clear()
+
+
+def parse_index(response):
+    """Parse RFC Editor index XML into a bunch of tuples."""
+
+    also_list = {}
+    data = list(iter_index(response, also_list))
+    # sub-series entries may come after the RFC entries they refer to
     for d in data:
         k = "RFC%04d" % d[0]
-        if k in also_list:
-            d[9].extend(also_list[k])
+        for docid in also_list.get(k, []):
+            if docid not in d[9]:
+                d[9].append(docid)
     return data
 
 
-def update_docs_from_rfc_index(index_data, errata_data, skip_older_than_date=None):
+def rfc_index_entry_hash(entry, errata):
+    """Hash of an entry from parse_index() together with the state of its
+    errata, everything update_docs_from_rfc_index() bases its changes on."""
+    statuses = sorted(er['errata_status_code'] for er in errata.get('RFC%04d' % entry[0], []))
+    return hashlib.sha1(repr((entry, statuses)).encode('utf-8')).hexdigest()
+
+
+def _rfc_index_entry_cache_key(entry):
+    return 'sync:rfceditor:index:%s:%s' % (ietf.__version__, entry[0])
+
+
+def _errata_by_doc(errata_data):
+    errata = {}
+    for item in errata_data:
+        errata.setdefault(item['doc-id'], []).append(item)
+    return errata
+
+
+def changed_index_entries(index_data, errata_data):
+    """Return the entries of index_data which have changed since they were
+    passed to mark_index_entries_synced()."""
+    errata = _errata_by_doc(errata_data)
+    synced = cache.get_many([ _rfc_index_entry_cache_key(e) for e in index_data ])
+    return [ e for e in index_data if synced.get(_rfc_index_entry_cache_key(e)) != rfc_index_entry_hash(e, errata) ]
+
+
+def mark_index_entries_synced(index_data, errata_data):
+    """Remember the content of index entries which have been applied to the
+    database, so changed_index_entries() can skip them while unchanged."""
+    errata = _errata_by_doc(errata_data)
+    cache.set_many({ _rfc_index_entry_cache_key(e): rfc_index_entry_hash(e, errata) for e in index_data },
+                   settings.RFC_EDITOR_INDEX_ENTRY_CACHE_TIME)
+
+
+def _preload_rfc_index_batch(entries):
+    """Load what update_docs_from_rfc_index() needs to know about the
+    documents of a batch of RFC index entries in a fixed number of queries,
+    rather than a handful of queries per entry."""
+
+    rfc_names = ["rfc%s" % e[0] for e in entries]
+    draft_names = [e[10] for e in entries if e[10]]
+    also_names = set(a.lower() for e in entries for a in (e[9] or []))
+    relation_names = set(x.lower() for e in entries for x in (e[7] or []) + (e[5] or []))
+
+    # DocAlias.document is the alias' document with the lowest pk
+    doc_id_for_alias = {}
+    for alias_name, doc_id in (DocAlias.docs.through.objects.filter(docalias__name__in=rfc_names)
+                               .values_list("docalias__name", "document_id").order_by("-document_id")):
+        doc_id_for_alias[alias_name] = doc_id
+
+    docs = Document.objects.filter(Q(pk__in=doc_id_for_alias.values()) | Q(name__in=draft_names))
+    docs = { d.pk: d for d in docs.prefetch_related("states__type", "tags") }
+
+    return dict(
+        doc_for_alias = { name: docs[doc_id] for name, doc_id in doc_id_for_alias.items() },
+        doc_for_draft = { d.name: d for d in docs.values() },
+        tag_ids = { d.pk: set(t.pk for t in d.tags.all()) for d in docs.values() },
+        published = set(DocEvent.objects.filter(doc__in=docs.keys(), type="published_rfc").values_list("doc_id", flat=True)),
+        alias_pk = dict(DocAlias.objects.filter(name__in=also_names | relation_names).values_list("name", "pk")),
+        relations = set(RelatedDocument.objects.filter(source__in=docs.keys(), relationship__in=("obs", "updates"))
+                        .values_list("source_id", "target_id", "relationship_id")),
+    )
+
+
+def update_docs_from_rfc_index(index_data, errata_data, skip_older_than_date=None, batch_size=100):
     """Given parsed data from the RFC Editor index, update the documents
     in the database. Yields a list of change descriptions for each
-    document, if any."""
+    document, if any.
+
+    The index is processed in batches of batch_size entries.  The current
+    state of the documents of a batch is loaded up front, compared with the
+    index in memory, and only the actual changes are written to the
+    database, in one transaction per batch."""
 
     errata = {}
     for item in errata_data:
@@ -367,177 +478,198 @@ def update_docs_from_rfc_index(index_data, errata_data, skip_older_than_date=Non
     relationship_obsoletes = DocRelationshipName.objects.get(slug="obs")
     relationship_updates = DocRelationshipName.objects.get(slug="updates")
 
-    system = Person.objects.get(name="(System)")
-
-    for rfc_number, title, authors, rfc_published_date, current_status, updates, updated_by, obsoletes, obsoleted_by, also, draft, has_errata, stream, wg, file_formats, pages, abstract in index_data:
+    states = { (s.type_id, s.slug): s for s in State.objects.select_related("type").filter(
+        Q(type="draft", slug="rfc") | Q(type="draft-iesg", slug="idexists") | Q(slug="pub"),
+        type__in=("draft", "draft-iesg", "draft-stream-iab", "draft-stream-irtf", "draft-stream-ise")) }
 
-        if skip_older_than_date and rfc_published_date < skip_older_than_date:
-            # speed up the process by skipping old entries
-            continue
+    system = Person.objects.get(name="(System)")
 
-        # we assume two things can happen: we get a new RFC, or an
-        # attribute has been updated at the RFC Editor (RFC Editor
-        # attributes take precedence over our local attributes)
-        events = []
-        changes = []
-        rfc_published = False
-
-        # make sure we got the document and alias
-        doc = None
-        name = "rfc%s" % rfc_number
-        a = DocAlias.objects.filter(name=name)
-        if a:
-            doc = a[0].document
-        else:
-            if draft:
-                try:
-                    doc = Document.objects.get(name=draft)
-                except Document.DoesNotExist:
-                    pass
-
-            if not doc:
-                changes.append("created document %s" % prettify_std_name(name))
-                doc = Document.objects.create(name=name, type=DocTypeName.objects.get(slug="draft"))
-
-            # add alias
-            alias, __ = DocAlias.objects.get_or_create(name=name)
-            alias.docs.add(doc)
-            changes.append("created alias %s" % prettify_std_name(name))
-
-        # check attributes
-        if title != doc.title:
-            doc.title = title
-            changes.append("changed title to '%s'" % doc.title)
-
-        if abstract and abstract != doc.abstract:
-            doc.abstract = abstract
-            changes.append("changed abstract to '%s'" % doc.abstract)
-
-        if pages and int(pages) != doc.pages:
-            doc.pages = int(pages)
-            changes.append("changed pages to %s" % doc.pages)
-
-        if std_level_mapping[current_status] != doc.std_level:
-            doc.std_level = std_level_mapping[current_status]
-            changes.append("changed standardization level to %s" % doc.std_level)
-
-        if doc.get_state_slug() != "rfc":
-            doc.set_state(State.objects.get(used=True, type="draft", slug="rfc"))
-            move_draft_files_to_archive(doc, doc.rev)
-            changes.append("changed state to %s" % doc.get_state())
-
-        if doc.stream != stream_mapping[stream]:
-            doc.stream = stream_mapping[stream]
-            changes.append("changed stream to %s" % doc.stream)
-
-        if not doc.group: # if we have no group assigned, check if RFC Editor has a suggestion
-            if wg:
-                doc.group = Group.objects.get(acronym=wg)
-                changes.append("set group to %s" % doc.group)
-            else:
-                doc.group = Group.objects.get(type="individ") # fallback for newly created doc
-
-        if not doc.latest_event(type="published_rfc"):
-            e = DocEvent(doc=doc, rev=doc.rev, type="published_rfc")
-            # unfortunately, rfc_published_date doesn't include the correct day
-            # at the moment because the data only has month/year, so
-            # try to deduce it
-            d = datetime.datetime.combine(rfc_published_date, datetime.time())
-            synthesized = datetime.datetime.now()
-            if abs(d - synthesized) > datetime.timedelta(days=60):
-                synthesized = d
-            else:
-                direction = -1 if (d - synthesized).total_seconds() < 0 else +1
-                while synthesized.month != d.month or synthesized.year != d.year:
-                    synthesized += datetime.timedelta(days=direction)
-            e.time = synthesized
-            e.by = system
-            e.desc = "RFC published"
-            e.save()
-            events.append(e)
-
-            changes.append("added RFC published event at %s" % e.time.strftime("%Y-%m-%d"))
-            rfc_published = True
-
-        for t in ("draft-iesg", "draft-stream-iab", "draft-stream-irtf", "draft-stream-ise"):
-            prev_state = doc.get_state(t)
-            if prev_state is not None:
-                if prev_state.slug not in ("pub", "idexists"):
-                    new_state = State.objects.select_related("type").get(used=True, type=t, slug="pub")
-                    doc.set_state(new_state)
-                    changes.append("changed %s to %s" % (new_state.type.label, new_state))
-                    e = update_action_holders(doc, prev_state, new_state)
-                    if e:
-                        events.append(e)
-            elif t == 'draft-iesg':
-                doc.set_state(State.objects.get(type_id='draft-iesg', slug='idexists'))
-
-        def parse_relation_list(l):
-            res = []
-            for x in l:
-                if x[:3] in ("NIC", "IEN", "STD", "RTR"):
-                    # try translating this to RFCs that we can handle
-                    # sensibly; otherwise we'll have to ignore them
-                    l = DocAlias.objects.filter(name__startswith="rfc", docs__docalias__name=x.lower())
-                else:
-                    l = DocAlias.objects.filter(name=x.lower())
-
-                for a in l:
-                    if a not in res:
-                        res.append(a)
-            return res
-
-        for x in parse_relation_list(obsoletes):
-            if not RelatedDocument.objects.filter(source=doc, target=x, relationship=relationship_obsoletes):
-                r = RelatedDocument.objects.create(source=doc, target=x, relationship=relationship_obsoletes)
-                changes.append("created %s relation between %s and %s" % (r.relationship.name.lower(), prettify_std_name(r.source.name), prettify_std_name(r.target.name)))
-
-        for x in parse_relation_list(updates):
-            if not RelatedDocument.objects.filter(source=doc, target=x, relationship=relationship_updates):
-                r = RelatedDocument.objects.create(source=doc, target=x, relationship=relationship_updates)
-                changes.append("created %s relation between %s and %s" % (r.relationship.name.lower(), prettify_std_name(r.source.name), prettify_std_name(r.target.name)))
-
-        if also:
-            for a in also:
-                a = a.lower()
-                if not DocAlias.objects.filter(name=a):
-                    DocAlias.objects.create(name=a).docs.add(doc)
-                    changes.append("created alias %s" % prettify_std_name(a))
-
-        doc_errata = errata.get('RFC%04d'%rfc_number, [])
-        all_rejected = doc_errata and all( er['errata_status_code']=='Rejected' for er in doc_errata )
-        if has_errata and not all_rejected:
-            if not doc.tags.filter(pk=tag_has_errata.pk).exists():
-                doc.tags.add(tag_has_errata)
-                changes.append("added Errata tag")
-            has_verified_errata = any([ er['errata_status_code']=='Verified' for er in doc_errata ])
-            if has_verified_errata and not doc.tags.filter(pk=tag_has_verified_errata.pk).exists():
-                doc.tags.add(tag_has_verified_errata)
-                changes.append("added Verified Errata tag")
-        else:
-            if doc.tags.filter(pk=tag_has_errata.pk):
-                doc.tags.remove(tag_has_errata)
-                if all_rejected:
-                    changes.append("removed Errata tag (all errata rejected)")
+    if skip_older_than_date:
+        # speed up the process by skipping old entries
+        index_data = [ e for e in index_data if e[3] >= skip_older_than_date ]
+
+    for i in range(0, len(index_data), batch_size):
+        batch = index_data[i:i + batch_size]
+        batch_changes = []
+        with transaction.atomic():
+            known = _preload_rfc_index_batch(batch)
+            # NIC, STD etc. references resolved to RFC aliases, forgotten when aliases are added
+            rfc_aliases_for = {}
+
+            for rfc_number, title, authors, rfc_published_date, current_status, updates, updated_by, obsoletes, obsoleted_by, also, draft, has_errata, stream, wg, file_formats, pages, abstract in batch:
+
+                # we assume two things can happen: we get a new RFC, or an
+                # attribute has been updated at the RFC Editor (RFC Editor
+                # attributes take precedence over our local attributes)
+                events = []
+                changes = []
+                rfc_published = False
+
+                # make sure we got the document and alias
+                name = "rfc%s" % rfc_number
+                doc = known["doc_for_alias"].get(name)
+                if not doc:
+                    if draft:
+                        doc = known["doc_for_draft"].get(draft)
+
+                    if not doc:
+                        changes.append("created document %s" % prettify_std_name(name))
+                        doc = Document.objects.create(name=name, type=DocTypeName.objects.get(slug="draft"))
+
+                    # add alias
+                    alias, __ = DocAlias.objects.get_or_create(name=name)
+                    alias.docs.add(doc)
+                    changes.append("created alias %s" % prettify_std_name(name))
+                    known["alias_pk"][name] = alias.pk
+                    rfc_aliases_for.clear()
+
+                tag_ids = known["tag_ids"].setdefault(doc.pk, set())
+
+                # check attributes
+                if title != doc.title:
+                    doc.title = title
+                    changes.append("changed title to '%s'" % doc.title)
+
+                if abstract and abstract != doc.abstract:
+                    doc.abstract = abstract
+                    changes.append("changed abstract to '%s'" % doc.abstract)
+
+                if pages and int(pages) != doc.pages:
+                    doc.pages = int(pages)
+                    changes.append("changed pages to %s" % doc.pages)
+
+                if std_level_mapping[current_status] != doc.std_level:
+                    doc.std_level = std_level_mapping[current_status]
+                    changes.append("changed standardization level to %s" % doc.std_level)
+
+                if doc.get_state_slug() != "rfc":
+                    doc.set_state(states[("draft", "rfc")])
+                    move_draft_files_to_archive(doc, doc.rev)
+                    changes.append("changed state to %s" % doc.get_state())
+
+                if doc.stream != stream_mapping[stream]:
+                    doc.stream = stream_mapping[stream]
+                    changes.append("changed stream to %s" % doc.stream)
+
+                if not doc.group: # if we have no group assigned, check if RFC Editor has a suggestion
+                    if wg:
+                        doc.group = Group.objects.get(acronym=wg)
+                        changes.append("set group to %s" % doc.group)
+                    else:
+                        doc.group = Group.objects.get(type="individ") # fallback for newly created doc
+
+                if doc.pk not in known["published"]:
+                    e = DocEvent(doc=doc, rev=doc.rev, type="published_rfc")
+                    # unfortunately, rfc_published_date doesn't include the correct day
+                    # at the moment because the data only has month/year, so
+                    # try to deduce it
+                    d = datetime.datetime.combine(rfc_published_date, datetime.time())
+                    synthesized = datetime.datetime.now()
+                    if abs(d - synthesized) > datetime.timedelta(days=60):
+                        synthesized = d
+                    else:
+                        direction = -1 if (d - synthesized).total_seconds() < 0 else +1
+                        while synthesized.month != d.month or synthesized.year != d.year:
+                            synthesized += datetime.timedelta(days=direction)
+                    e.time = synthesized
+                    e.by = system
+                    e.desc = "RFC published"
+                    e.save()
+                    events.append(e)
+                    known["published"].add(doc.pk)
+
+                    changes.append("added RFC published event at %s" % e.time.strftime("%Y-%m-%d"))
+                    rfc_published = True
+
+                for t in ("draft-iesg", "draft-stream-iab", "draft-stream-irtf", "draft-stream-ise"):
+                    prev_state = doc.get_state(t)
+                    if prev_state is not None:
+                        if prev_state.slug not in ("pub", "idexists"):
+                            new_state = states[(t, "pub")]
+                            doc.set_state(new_state)
+                            changes.append("changed %s to %s" % (new_state.type.label, new_state))
+                            e = update_action_holders(doc, prev_state, new_state)
+                            if e:
+                                events.append(e)
+                    elif t == 'draft-iesg':
+                        doc.set_state(states[("draft-iesg", "idexists")])
+
+                def parse_relation_list(l):
+                    res = []
+                    for x in l:
+                        if x[:3] in ("NIC", "IEN", "STD", "RTR"):
+                            # try translating this to RFCs that we can handle
+                            # sensibly; otherwise we'll have to ignore them
+                            if x.lower() not in rfc_aliases_for:
+                                rfc_aliases_for[x.lower()] = list(DocAlias.objects.filter(name__startswith="rfc", docs__docalias__name=x.lower()).values_list("pk", "name"))
+                            l = rfc_aliases_for[x.lower()]
+                        else:
+                            l = [ (known["alias_pk"][x.lower()], x.lower()) ] if x.lower() in known["alias_pk"] else []
+
+                        for a in l:
+                            if a not in res:
+                                res.append(a)
+                    return res
+
+                for relationship, l in ((relationship_obsoletes, obsoletes), (relationship_updates, updates)):
+                    for target_pk, target_name in parse_relation_list(l):
+                        if (doc.pk, target_pk, relationship.pk) not in known["relations"]:
+                            RelatedDocument.objects.create(source=doc, target_id=target_pk, relationship=relationship)
+                            known["relations"].add((doc.pk, target_pk, relationship.pk))
+                            changes.append("created %s relation between %s and %s" % (relationship.name.lower(), prettify_std_name(doc.name), prettify_std_name(target_name)))
+
+                if also:
+                    for a in also:
+                        a = a.lower()
+                        if a not in known["alias_pk"]:
+                            alias = DocAlias.objects.create(name=a)
+                            alias.docs.add(doc)
+                            known["alias_pk"][a] = alias.pk
+                            rfc_aliases_for.clear()
+                            changes.append("created alias %s" % prettify_std_name(a))
+
+                doc_errata = errata.get('RFC%04d'%rfc_number, [])
+                all_rejected = doc_errata and all( er['errata_status_code']=='Rejected' for er in doc_errata )
+                if has_errata and not all_rejected:
+                    if tag_has_errata.pk not in tag_ids:
+                        doc.tags.add(tag_has_errata)
+                        tag_ids.add(tag_has_errata.pk)
+                        changes.append("added Errata tag")
+                    has_verified_errata = any([ er['errata_status_code']=='Verified' for er in doc_errata ])
+                    if has_verified_errata and tag_has_verified_errata.pk not in tag_ids:
+                        doc.tags.add(tag_has_verified_errata)
+                        tag_ids.add(tag_has_verified_errata.pk)
+                        changes.append("added Verified Errata tag")
                 else:
-                    changes.append("removed Errata tag")
-            if doc.tags.filter(pk=tag_has_verified_errata.pk):
-                doc.tags.remove(tag_has_verified_errata)
-                changes.append("removed Verified Errata tag")
-
-        if changes:
-            events.append(DocEvent.objects.create(
-                doc=doc,
-                rev=doc.rev,
-                by=system,
-                type="sync_from_rfc_editor",
-                desc="Received changes through RFC Editor sync (%s)" % ", ".join(changes),
-            ))
-
-            doc.save_with_history(events)
-
-        if changes:
-            yield changes, doc, rfc_published
+                    if tag_has_errata.pk in tag_ids:
+                        doc.tags.remove(tag_has_errata)
+                        tag_ids.discard(tag_has_errata.pk)
+                        if all_rejected:
+                            changes.append("removed Errata tag (all errata rejected)")
+                        else:
+                            changes.append("removed Errata tag")
+                    if tag_has_verified_errata.pk in tag_ids:
+                        doc.tags.remove(tag_has_verified_errata)
+                        tag_ids.discard(tag_has_verified_errata.pk)
+                        changes.append("removed Verified Errata tag")
+
+                if changes:
+                    events.append(DocEvent.objects.create(
+                        doc=doc,
+                        rev=doc.rev,
+                        by=system,
+                        type="sync_from_rfc_editor",
+                        desc="Received changes through RFC Editor sync (%s)" % ", ".join(changes),
+                    ))
+
+                    doc.save_with_history(events)
+
+                    batch_changes.append((changes, doc, rfc_published))
+
+        # yield outside the transaction, so that a consumer which stops
+        # iterating doesn't roll back the batch
+        for item in batch_changes:
+            yield item
 
 
 def post_approved_draft(url, name):
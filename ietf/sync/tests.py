@@ -9,6 +9,9 @@ import datetime
 import quopri
 
 from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse as urlreverse
 
 import debug                            # pyflakes:ignore
@@ -222,6 +225,7 @@ class RFCSyncTests(TestCase):
         with io.open(os.path.join(settings.INTERNET_DRAFT_PATH, name), 'w') as f:
             f.write("a" * size)
 
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-rfc-index'}})
     def test_rfc_index(self):
         area = GroupFactory(type_id='area')
         doc = WgDraftFactory(
@@ -371,8 +375,24 @@ class RFCSyncTests(TestCase):
         self.assertTrue(os.path.exists(os.path.join(settings.INTERNET_DRAFT_ARCHIVE_DIR, draft_filename)))
 
         # make sure we can apply it again with no changes
-        changed = list(rfceditor.update_docs_from_rfc_index(data, errata, today - datetime.timedelta(days=30)))
+        with CaptureQueriesContext(connection) as queries:
+            changed = list(rfceditor.update_docs_from_rfc_index(data, errata, today - datetime.timedelta(days=30)))
         self.assertEqual(len(changed), 0)
+        # unchanged entries are compared with preloaded data, without per-document queries
+        self.assertLess(len(queries), 40)
+
+        # entries marked as synced are skipped until they or their errata change
+        self.assertEqual(rfceditor.changed_index_entries(data, errata), data)
+        rfceditor.mark_index_entries_synced(data, errata)
+        self.assertEqual(rfceditor.changed_index_entries(data, errata), [])
+        # errata of other documents don't matter
+        errata[0]["errata_status_code"] = "Rejected"
+        self.assertEqual(rfceditor.changed_index_entries(data, errata), [])
+        errata.append(dict(errata[0], errata_id=2, **{"doc-id": "RFC1234", "errata_status_code": "Verified"}))
+        self.assertEqual(rfceditor.changed_index_entries(data, errata), data)
+        rfceditor.mark_index_entries_synced(data, errata)
+        errata[-1]["errata_status_code"] = "Rejected"
+        self.assertEqual(rfceditor.changed_index_entries(data, errata), data)
 
     def _generate_rfc_queue_xml(self, draft, state, auth48_url=None):
         """Generate an RFC queue xml string for a draft"""
@@ -0,0 +1,137 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+"""
+Streaming gzipped tar archives of document files, with a disk cache of
+complete archives.
+
+The archives are keyed on the kind of bundle and the (name, rev) pairs of
+the documents in it.  Since a document revision doesn't change, a cached
+archive can be served as long as it is kept.  Archives with missing or
+failed files are not cached, as these may be there at the next download.
+"""
+
+import hashlib
+import io
+import os
+import tarfile
+import tempfile
+import time
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.encoding import force_bytes
+
+import debug                            # pyflakes:ignore
+
+from ietf.utils.log import log
+
+
+def bundle_cache_path(kind, key):
+    """Return the path of the cached bundle of the given kind for key, a list
+    of (name, rev) pairs, or None if bundles aren't cached."""
+    if not settings.DOCUMENT_BUNDLE_CACHE_DIR:
+        return None
+    digest = hashlib.sha1(force_bytes(repr(sorted(key)))).hexdigest()
+    return os.path.join(settings.DOCUMENT_BUNDLE_CACHE_DIR, "%s-%s" % (kind, digest))
+
+def open_bundle_cache_file(path):
+    """Return a temporary file to write a bundle to be saved as path with
+    save_bundle_cache_file(), or None if the cache directory can't be used."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=".tmp-", delete=False)
+    except OSError as e:
+        log("Not caching %s: %s" % (path, e))
+        return None
+
+def save_bundle_cache_file(tmp, path):
+    """Move a completely written temporary bundle file in place, and remove
+    cached bundles older than settings.DOCUMENT_BUNDLE_CACHE_MAX_AGE."""
+    tmp.close()
+    os.rename(tmp.name, path)
+    cutoff = time.time() - settings.DOCUMENT_BUNDLE_CACHE_MAX_AGE
+    for entry in os.scandir(os.path.dirname(path)):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+def discard_bundle_cache_file(tmp):
+    tmp.close()
+    if os.path.exists(tmp.name):
+        os.unlink(tmp.name)
+
+
+class _Chunks(object):
+    """Write-only file which collects what the tarfile module writes, for
+    passing on as the next chunk of a streaming response."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def _tarfile_chunks(files, cache_path):
+    chunks = _Chunks()
+    tarstream = tarfile.open(mode="w|gz", fileobj=chunks)
+    manifest = io.BytesIO()
+    complete = True
+    tmp = open_bundle_cache_file(cache_path) if cache_path else None
+    try:
+        for arcname, path in files:
+            path = force_bytes(path)
+            if os.path.exists(path):
+                try:
+                    tarstream.add(path, arcname)
+                    manifest.write(b"Included:  %s\n" % path)
+                except Exception as e:
+                    manifest.write(b"Failed (%s): %s\n" % (force_bytes(e), path))
+                    complete = False
+            else:
+                manifest.write(b"Not found: %s\n" % path)
+                complete = False
+
+            data = chunks.pop()
+            if data:
+                if tmp:
+                    tmp.write(data)
+                yield data
+
+        manifest.seek(0)
+        t = tarfile.TarInfo(name="manifest.txt")
+        t.size = len(manifest.getvalue())
+        t.mtime = time.time()
+        tarstream.addfile(t, manifest)
+        tarstream.close()
+
+        data = chunks.pop()
+        if tmp:
+            tmp.write(data)
+            if complete:
+                save_bundle_cache_file(tmp, cache_path)
+                tmp = None
+        yield data
+    finally:
+        if tmp:
+            discard_bundle_cache_file(tmp)
+
+def tarfile_response(filename, kind, key, files):
+    """Return a response with a gzipped tar archive of files, an iterable of
+    (arcname, path) pairs, followed by a manifest.txt listing which files
+    were included.  The archive is streamed as each file is added, and saved
+    to the bundle cache under kind and key, a list of (name, rev) pairs, so
+    later requests for the same documents are served from disk."""
+    cache_path = bundle_cache_path(kind, key)
+    if cache_path and os.path.exists(cache_path):
+        response = FileResponse(open(cache_path, "rb"), content_type="application/octet-stream")
+    else:
+        response = StreamingHttpResponse(_tarfile_chunks(files, cache_path), content_type="application/octet-stream")
+    response["Content-Disposition"] = "attachment; filename=%s" % filename
+    return response
@@ -0,0 +1,37 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+"""
+Generation counters in the shared cache.
+
+A generation counter versions data derived from the database, like cached
+search results or in-memory indexes: whatever changes the underlying data
+bumps the counter, and derived data kept for an earlier generation is then
+known to be stale, in every process.
+"""
+
+import time
+
+from django.core.cache import cache
+
+import debug                            # pyflakes:ignore
+
+
+def cache_generation(key):
+    """Return the current value of the generation counter key, starting it
+    if there is none."""
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the current time, so that a lost counter doesn't match
+        # a generation that was handed out before it was lost
+        cache.add(key, int(time.time() * 1000000), None)
+        generation = cache.get(key)
+    return generation
+
+def bump_cache_generation(key):
+    """Move the generation counter key on to a new generation, and return
+    it, or None if there is no counter to move on."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # no counter yet, it will be started by the next lookup
+        return None
@@ -9,6 +9,7 @@ import re
 import smtplib
 import sys
 import textwrap
+import threading
 import time
 import traceback
 
@@ -80,12 +81,76 @@ class SMTPSomeRefusedRecipients(smtplib.SMTPException):
     def summary_refusals(self):
         return ", ".join(["%s (%s)"%(x,self.refusals[x][0]) for x in self.refusals])
 
+# Idle SMTP connections, reused by send_smtp() to avoid a connection setup
+# and handshake for every message
+_smtp_pool = []                         # type: List[smtplib.SMTP]
+_smtp_pool_lock = threading.Lock()
+
+def _open_smtp_connection():
+    server = smtplib.SMTP()
+    #log("SMTP server: %s" % repr(server))
+    #if settings.DEBUG:
+    #    server.set_debuglevel(1)
+    conn_code, conn_msg = server.connect(SMTP_ADDR['ip4'], SMTP_ADDR['port'])
+    #log("SMTP connect: code: %s; msg: %s" % (conn_code, conn_msg))
+    if settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD:
+        server.ehlo()
+        if 'starttls' not in server.esmtp_features:
+            raise ImproperlyConfigured('password configured but starttls not supported')
+        (retval, retmsg) = server.starttls()
+        if retval != 220:
+            raise ImproperlyConfigured('password configured but tls failed: %d %s' % ( retval, retmsg ))
+        # Send a new EHLO, since without TLS the server might not
+        # advertise the AUTH capability.
+        server.ehlo()
+        server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
+    server.opened_at = time.time()
+    return server
+
+def _close_smtp_connection(server):
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+def get_smtp_connection():
+    """Return an SMTP connection from the pool, if there is one still usable,
+    or else a new connection.  Hand it back with release_smtp_connection()."""
+    while True:
+        with _smtp_pool_lock:
+            if not _smtp_pool:
+                break
+            server = _smtp_pool.pop()
+        if time.time() - server.opened_at < settings.EMAIL_SMTP_CONNECTION_MAX_AGE:
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+        _close_smtp_connection(server)
+    return _open_smtp_connection()
+
+def release_smtp_connection(server):
+    with _smtp_pool_lock:
+        if len(_smtp_pool) < settings.EMAIL_SMTP_POOL_SIZE:
+            _smtp_pool.append(server)
+            return
+    _close_smtp_connection(server)
+
+def close_smtp_connections():
+    with _smtp_pool_lock:
+        servers = _smtp_pool[:]
+        _smtp_pool[:] = []
+    for server in servers:
+        _close_smtp_connection(server)
+
 def send_smtp(msg, bcc=None):
     '''
     Send a Message via SMTP, based on the django email server settings.
     The destination list will be taken from the To:/Cc: headers in the
     Message.  The From address will be used if present or will default
-    to the django setting DEFAULT_FROM_EMAIL
+    to the django setting DEFAULT_FROM_EMAIL.  Connections are taken from,
+    and returned to, the SMTP connection pool.
 
     If someone has set test_mode=True, then append the msg to
     the outbox.
@@ -104,27 +169,21 @@ def send_smtp(msg, bcc=None):
             outbox.append(msg)
         server = None
         try:
-            server = smtplib.SMTP()
-            #log("SMTP server: %s" % repr(server))
-            #if settings.DEBUG:
-            #    server.set_debuglevel(1)
-            conn_code, conn_msg = server.connect(SMTP_ADDR['ip4'], SMTP_ADDR['port'])
-            #log("SMTP connect: code: %s; msg: %s" % (conn_code, conn_msg))
-            if settings.EMAIL_HOST_USER and settings.EMAIL_HOST_PASSWORD:
-                server.ehlo()
-                if 'starttls' not in server.esmtp_features:
-                    raise ImproperlyConfigured('password configured but starttls not supported')
-                (retval, retmsg) = server.starttls()
-                if retval != 220:
-                    raise ImproperlyConfigured('password configured but tls failed: %d %s' % ( retval, retmsg ))
-                # Send a new EHLO, since without TLS the server might not
-                # advertise the AUTH capability.
-                server.ehlo()
-                server.login(settings.EMAIL_HOST_USER, settings.EMAIL_HOST_PASSWORD)
-            unhandled = server.sendmail(frm, to, force_bytes(msg.as_string()))
+            server = get_smtp_connection()
+            try:
+                unhandled = server.sendmail(frm, to, force_bytes(msg.as_string()))
+            except smtplib.SMTPRecipientsRefused:
+                # the connection is still good
+                release_smtp_connection(server)
+                server = None
+                raise
+            release_smtp_connection(server)
+            server = None
             if unhandled != {}:
                 raise SMTPSomeRefusedRecipients(message="%d addresses were refused"%len(unhandled),original_msg=msg,refusals=unhandled)
         except Exception as e:
+            if server is not None:
+                _close_smtp_connection(server)
             # need to improve log message
             log("Exception while trying to send email from '%s' to %s subject '%s'" % (frm, to, msg.get('Subject', '[no subject]')), e=e)
             if isinstance(e, smtplib.SMTPException):
@@ -132,11 +191,6 @@ def send_smtp(msg, bcc=None):
                 raise 
             else:
                 raise smtplib.SMTPException({'really': sys.exc_info()[0], 'value': sys.exc_info()[1], 'tb': traceback.format_tb(sys.exc_info()[2])})
-        finally:
-            try:
-                server.quit()
-            except smtplib.SMTPServerDisconnected:
-                pass
         subj = force_text(msg.get('Subject', '[no subject]'))
         tau = time.time() - mark
         log("sent email (%.3fs) from '%s' to %s id %s subject '%s'" % (tau, frm, to, msg.get('Message-ID', ''), subj))
@@ -347,6 +401,13 @@ def save_as_message(request, msg, bcc):
     log("Saved outgoing email from '%s' to %s id %s subject '%s as Message[%s]'" % (m.frm, m.to, m.msgid, m.subject, m.pk))
     return m
 
+def queue_outbound_mail(msg, bcc, message=None):
+    """Queue a message for delivery by the send_outbound_mail management command"""
+    add_headers(msg)
+    q = ietf.message.models.OutboundMessage.objects.create(message=message, content=msg.as_string(), bcc=bcc or '')
+    log("Queued outgoing email from '%s' to %s id %s subject '%s' as OutboundMessage[%s]" % (msg.get('From'), msg.get('To'), msg.get('Message-ID'), force_text(msg.get('Subject', '[no subject]')), q.pk))
+    return q
+
 def send_mail_mime(request, to, frm, subject, msg, cc=None, extra=None, toUser=False, bcc=None, copy=True, save=True):
     """Send MIME message with content already filled in."""
     
@@ -370,7 +431,11 @@ def send_mail_mime(request, to, frm, subject, msg, cc=None, extra=None, toUser=F
     else:
         message = None
 
-    if test_mode or debugging or production:
+    if production and settings.EMAIL_OUTBOUND_QUEUE:
+        # don't make the request wait for the SMTP server
+        queue_outbound_mail(msg, bcc, message)
+        show_that_mail_was_sent(request,'Email was queued for sending',msg,bcc)
+    elif test_mode or debugging or production:
         try:
             send_smtp(msg, bcc)
             if save:
@@ -0,0 +1,73 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+"""
+Hit and miss counters for application level caches, and latency counters for
+background work.  The counters are kept in the default cache, so that they
+are shared by all server processes.
+"""
+
+from django.core.cache import cache
+
+import debug                            # pyflakes:ignore
+
+CACHE_METRICS = []                      # names of the registered cache metrics
+LATENCY_METRICS = []                    # names of the registered latency metrics
+
+def register_cache_metric(name):
+    if not name in CACHE_METRICS:
+        CACHE_METRICS.append(name)
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # no such key yet
+        cache.add(key, 1, None)
+
+def record_cache_hit(name):
+    _increment("metrics:cache:%s:hits" % name)
+
+def record_cache_miss(name):
+    _increment("metrics:cache:%s:misses" % name)
+
+def cache_metrics():
+    """Return the hit and miss counts and the hit ratio of the registered cache metrics"""
+    metrics = {}
+    for name in CACHE_METRICS:
+        hits = cache.get("metrics:cache:%s:hits" % name) or 0
+        misses = cache.get("metrics:cache:%s:misses" % name) or 0
+        metrics[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+        }
+    return metrics
+
+def register_latency_metric(name):
+    if not name in LATENCY_METRICS:
+        LATENCY_METRICS.append(name)
+
+def record_latency(name, seconds):
+    milliseconds = int(seconds * 1000)
+    _increment("metrics:latency:%s:count" % name)
+    try:
+        cache.incr("metrics:latency:%s:total" % name, milliseconds)
+    except ValueError:
+        cache.add("metrics:latency:%s:total" % name, milliseconds, None)
+    if milliseconds > (cache.get("metrics:latency:%s:max" % name) or 0):
+        cache.set("metrics:latency:%s:max" % name, milliseconds, None)
+
+def latency_metrics():
+    """Return the count, mean and maximum of the recorded latencies in seconds
+    for the registered latency metrics"""
+    metrics = {}
+    for name in LATENCY_METRICS:
+        count = cache.get("metrics:latency:%s:count" % name) or 0
+        total = cache.get("metrics:latency:%s:total" % name) or 0
+        maximum = cache.get("metrics:latency:%s:max" % name) or 0
+        metrics[name] = {
+            "count": count,
+            "mean": total / count / 1000 if count else None,
+            "max": maximum / 1000,
+        }
+    return metrics
@@ -549,6 +549,8 @@ class IetfTestRunner(DiscoverRunner):
         # switch to a much faster hasher
         settings.PASSWORD_HASHERS = ( 'django.contrib.auth.hashers.MD5PasswordHasher', )
         settings.SERVER_MODE = 'test'
+        # the tests roll back the database, so don't keep typeahead indexes around
+        settings.TYPEAHEAD_REBUILD_INTERVAL = 0
         #
         print("     Datatracker %s test suite, %s:" % (ietf.__version__, time.strftime("%d %B %Y %H:%M:%S %Z")))
         print("     Python %s." % sys.version.replace('\n', ' '))
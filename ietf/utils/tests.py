@@ -6,6 +6,7 @@ import io
 import os.path
 import shutil
 import sys
+import tarfile
 import types
 
 from typing import Dict, List       # pyflakes:ignore
@@ -23,11 +24,13 @@ from tempfile import mkdtemp
 from django.apps import apps
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.cache import cache
 from django.core.management import call_command
 from django.template import Context
 from django.template import Template    # pyflakes:ignore
 from django.template.defaulttags import URLNode
 from django.template.loader import get_template
+from django.test import override_settings
 from django.templatetags.static import StaticNode
 from django.urls import reverse as urlreverse
 
@@ -557,3 +560,47 @@ class TestRFC2047Strings(TestCase):
             )
         for encoded_str, unicode in names: 
             self.assertEqual(unicode, parse_unicode(encoded_str))
+
+class CacheGenerationTests(TestCase):
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-cache-generation'}})
+    def test_cache_generation(self):
+        from ietf.utils.cache import bump_cache_generation, cache_generation
+        key = "test:generation"
+        bump_cache_generation(key)      # no counter yet
+        generation = cache_generation(key)
+        self.assertIsNotNone(generation)
+        self.assertEqual(cache_generation(key), generation)
+        bump_cache_generation(key)
+        self.assertEqual(cache_generation(key), generation + 1)
+        cache.delete(key)
+        self.assertGreater(cache_generation(key), generation + 1)
+
+class ArchiveTests(TestCase):
+    settings_temp_path_overrides = TestCase.settings_temp_path_overrides + ['DOCUMENT_BUNDLE_CACHE_DIR']
+
+    def test_tarfile_response(self):
+        from ietf.utils.archive import tarfile_response
+        path = os.path.join(settings.INTERNET_DRAFT_PATH, "draft-foo-00.txt")
+        missing = os.path.join(settings.INTERNET_DRAFT_PATH, "draft-bar-01.txt")
+        with io.open(path, "w") as f:
+            f.write("foo content")
+
+        def get(files):
+            r = tarfile_response("foo.tgz", "test", [ (os.path.basename(p)[:-7], os.path.basename(p)[-6:-4]) for p in files ],
+                                 [ (os.path.basename(p), p) for p in files ])
+            self.assertEqual(r["Content-Disposition"], "attachment; filename=foo.tgz")
+            return tarfile.open(None, fileobj=io.BytesIO(b"".join(r.streaming_content)))
+
+        # archives with missing files are not cached
+        tar = get([path, missing])
+        self.assertEqual(tar.getnames(), ["draft-foo-00.txt", "manifest.txt"])
+        self.assertIn(b"Not found", tar.extractfile("manifest.txt").read())
+        self.assertEqual(os.listdir(settings.DOCUMENT_BUNDLE_CACHE_DIR), [])
+
+        # complete archives are, and are served from disk afterwards
+        tar = get([path])
+        self.assertEqual(tar.extractfile("draft-foo-00.txt").read(), b"foo content")
+        self.assertEqual(len(os.listdir(settings.DOCUMENT_BUNDLE_CACHE_DIR)), 1)
+        os.unlink(path)
+        tar = get([path])
+        self.assertEqual(tar.extractfile("draft-foo-00.txt").read(), b"foo content")
@@ -0,0 +1,179 @@
+# Copyright The IETF Trust 2021, All Rights Reserved
+# -*- coding: utf-8 -*-
+"""
+In-memory indexes for the select2 search endpoints.
+
+An index holds short texts, like names and email addresses, each with the
+key of the object it belongs to.  Looking up a term finds the keys of the
+texts containing it, ignoring case and accents, the way a chain of
+icontains lookups does, without going to the database.  Texts are found
+through their trigrams, so a lookup only has to check the texts which
+contain the least common trigram of the term.
+"""
+
+import time
+import unidecode
+
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+import debug                            # pyflakes:ignore
+
+from ietf.utils.cache import bump_cache_generation, cache_generation
+
+
+TYPEAHEAD_CHANGE_LOG_TIME = 60*60       # 1 hour; processes which are further behind rebuild their index
+TYPEAHEAD_MAX_REPLAYED_CHANGES = 200    # rebuilding is cheaper than replaying more changes than this
+
+def normalize_typeahead_text(text):
+    return unidecode.unidecode(text or "").lower()
+
+class TypeaheadIndex(object):
+
+    def __init__(self, entries):
+        """Build the index from entries, an iterable of (key, text) pairs."""
+        self.keys = []
+        self.texts = []
+        self.trigrams = {}
+        self.positions = None
+        self.removed = 0
+        for key, text in entries:
+            self.add(key, text)
+
+    def __len__(self):
+        return len(self.texts) - self.removed
+
+    def add(self, key, text):
+        text = normalize_typeahead_text(text)
+        if not text:
+            return
+        i = len(self.texts)
+        self.keys.append(key)
+        self.texts.append(text)
+        if self.positions is not None:
+            self.positions.setdefault(key, []).append(i)
+        for trigram in { text[j:j + 3] for j in range(len(text) - 2) }:
+            entries = self.trigrams.get(trigram)
+            if entries is None:
+                entries = self.trigrams[trigram] = array('I')
+            entries.append(i)
+
+    def update(self, key, texts):
+        """Replace the texts of key with texts.  The old texts are only
+        marked as removed, they are dropped when the index is rebuilt."""
+        if self.positions is None:
+            # only needed for updates, so not kept up from the start
+            self.positions = {}
+            for i, k in enumerate(self.keys):
+                if self.texts[i] is not None:
+                    self.positions.setdefault(k, []).append(i)
+        for i in self.positions.pop(key, []):
+            self.texts[i] = None
+            self.removed += 1
+        for text in texts:
+            self.add(key, text)
+
+    def matches(self, term):
+        """Return a dict with the keys of the texts containing term, mapped
+        to 1 if term is found at the start of a word in one of them, 0
+        otherwise."""
+        term = normalize_typeahead_text(term)
+        if len(term) < 3:
+            candidates = range(len(self.texts))
+        else:
+            candidates = None
+            for j in range(len(term) - 2):
+                entries = self.trigrams.get(term[j:j + 3])
+                if entries is None:
+                    return {}
+                if candidates is None or len(entries) < len(candidates):
+                    candidates = entries
+
+        found = {}
+        for i in candidates:
+            text = self.texts[i]
+            if text is None:
+                continue
+            pos = text.find(term)
+            if pos >= 0:
+                key = self.keys[i]
+                found[key] = max(found.get(key, 0), int(pos == 0 or not text[pos - 1].isalnum()))
+        return found
+
+def rank_matches(term_matches, sort_key):
+    """Given the matches() of each search term, return the keys matching all
+    of them, with the keys with more terms found at the start of a word
+    first, and then ordered by sort_key(key)."""
+    scores = None
+    for found in term_matches:
+        if scores is None:
+            scores = dict(found)
+        else:
+            scores = { key: score + found[key] for key, score in scores.items() if key in found }
+    if not scores:
+        return []
+    return sorted(scores, key=lambda key: (-scores[key], sort_key(key)))
+
+
+class CurrentTypeahead(object):
+    """The index of this process built by build().
+
+    The generation counter in the cache shows when the indexed data has
+    changed in any process.  Changes reported with changed() are applied to
+    the index of the reporting process right away, and kept in the cache
+    under their generation, so that other processes can apply them to their
+    indexes with the update() method of the index too.  Processes which have
+    missed changes that are no longer kept rebuild their index.  Without a
+    shared cache there is no counter, and the index is rebuilt every
+    TYPEAHEAD_REBUILD_INTERVAL seconds to pick up changes made in other
+    processes."""
+
+    def __init__(self, cache_key, build):
+        self.cache_key = cache_key
+        self.build = build
+        self.index = None
+        self.index_generation = None
+        self.index_time = None
+
+    def change_key(self, generation):
+        return "%s:%s" % (self.cache_key, generation)
+
+    def current(self, generation):
+        """Bring the index up to generation by applying the changes since its
+        own generation, and return whether that worked."""
+        if generation is None:
+            return time.time() - self.index_time < settings.TYPEAHEAD_REBUILD_INTERVAL
+        if self.index_generation is None or not 0 <= generation - self.index_generation <= TYPEAHEAD_MAX_REPLAYED_CHANGES:
+            return False
+        keys = [ self.change_key(g) for g in range(self.index_generation + 1, generation + 1) ]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return False
+        for key in keys:
+            self.index.update(changes[key])
+        self.index_generation = generation
+        return True
+
+    def get(self):
+        generation = cache_generation(self.cache_key)
+        if self.index is None or not self.current(generation):
+            self.index = self.build()
+            self.index_generation = generation
+            self.index_time = time.time()
+        return self.index
+
+    def changed(self, change):
+        """Apply change to the index of this process, and pass it on to the
+        other processes once the current transaction is committed."""
+        if self.index is not None:
+            self.index.update(change)
+
+        def publish():
+            generation = bump_cache_generation(self.cache_key)
+            if generation is not None:
+                cache.set(self.change_key(generation), change, TYPEAHEAD_CHANGE_LOG_TIME)
+
+        transaction.on_commit(publish)